@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark Backend Inference (PyTorch vs ONNX Runtime vs OpenVINO)
+Jalankan di setiap mesin untuk memilih backend CPU tercepat
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from detector import HumanDetector
+from detections import count_matches
+from model_backend import BACKENDS
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark backend inference HumanDetector')
+
+    parser.add_argument('--model', type=str, default='models/yolov8n.pt',
+                        help='Path ke model YOLOv8 .pt (default: models/yolov8n.pt)')
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS),
+                        choices=list(BACKENDS),
+                        help='Backend yang diuji (default: semua)')
+    parser.add_argument('--video', type=str,
+                        help='Video untuk benchmark (disarankan rekaman camera sendiri)')
+    parser.add_argument('--frames', type=int, default=100,
+                        help='Jumlah frame yang diukur (default: 100)')
+    parser.add_argument('--warmup', type=int, default=5,
+                        help='Jumlah inference warm-up sebelum diukur (default: 5)')
+    parser.add_argument('--batch', type=int, default=1,
+                        help='Batch size (default: 1)')
+    parser.add_argument('--imgsz', type=int, default=640,
+                        help='Ukuran input inference (default: 640)')
+    parser.add_argument('--conf', type=float, default=0.4,
+                        help='Confidence threshold (default: 0.4)')
+    parser.add_argument('--output', type=str,
+                        help='Simpan hasil ke file JSON')
+
+    return parser.parse_args()
+
+
+def load_frames(video_path, count):
+    """Ambil frame dari video, atau frame sintetis jika tidak ada video"""
+    if not video_path:
+        print("⚠️  Tanpa --video: pakai frame sintetis (hasil deteksi tidak bisa dibandingkan)")
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(count)]
+
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+
+    if not frames:
+        print(f"❌ Tidak bisa membaca frame dari {video_path}")
+        sys.exit(1)
+
+    return frames
+
+
+def run_backend(backend, frames, args):
+    """Ukur load time, warm-up, latency dan FPS untuk satu backend"""
+    detector = HumanDetector(args.model, args.conf, backend=backend, imgsz=args.imgsz)
+
+    start = time.perf_counter()
+    if not detector.load_model():
+        return None, None
+    load_time = time.perf_counter() - start
+
+    batches = [frames[i:i + args.batch] for i in range(0, len(frames), args.batch)]
+
+    # Warm-up (inference pertama biasanya jauh lebih lambat)
+    start = time.perf_counter()
+    detector.detect_batch(batches[0])
+    first_inference = time.perf_counter() - start
+    for _ in range(max(0, args.warmup - 1)):
+        detector.detect_batch(batches[0])
+
+    latencies = []
+    results = []
+    start = time.perf_counter()
+    for batch in batches:
+        t0 = time.perf_counter()
+        results.extend(detector.detect_batch(batch))
+        latencies.append((time.perf_counter() - t0) * 1000 / len(batch))
+    total = time.perf_counter() - start
+
+    stats = {
+        'backend': backend,
+        'load_time_s': load_time,
+        'first_inference_ms': first_inference * 1000,
+        'mean_latency_ms': float(np.mean(latencies)),
+        'p50_latency_ms': float(np.percentile(latencies, 50)),
+        'p95_latency_ms': float(np.percentile(latencies, 95)),
+        'fps': len(frames) / total,
+        'detections': int(sum(len(d) for d in results)),
+    }
+    return stats, results
+
+
+def main():
+    args = parse_arguments()
+
+    print("=" * 70)
+    print("BENCHMARK BACKEND INFERENCE")
+    print("=" * 70)
+    print(f"Model: {args.model}")
+    print(f"Backends: {', '.join(args.backends)}")
+    print(f"Frames: {args.frames}, batch: {args.batch}, imgsz: {args.imgsz}")
+    print("-" * 70)
+
+    frames = load_frames(args.video, args.frames)
+
+    report = []
+    reference = None
+    for backend in args.backends:
+        print(f"\n[{backend}] Loading & benchmarking...")
+        stats, results = run_backend(backend, frames, args)
+        if stats is None:
+            print(f"❌ {backend}: gagal load model (dependency belum terinstall?)")
+            continue
+
+        # Bandingkan hasil deteksi dengan backend pertama yang berhasil
+        if reference is None:
+            reference = (backend, results)
+        else:
+            ref_total = sum(len(d) for d in reference[1])
+            matches = sum(count_matches(d, r) for d, r in zip(results, reference[1]))
+            stats['agreement_vs'] = reference[0]
+            stats['agreement'] = matches / ref_total if ref_total else 1.0
+
+        report.append(stats)
+        print(f"✅ {backend}: {stats['fps']:.1f} FPS, mean {stats['mean_latency_ms']:.1f} ms, "
+              f"p95 {stats['p95_latency_ms']:.1f} ms")
+
+    if not report:
+        print("\n❌ Tidak ada backend yang berhasil dijalankan")
+        return
+
+    print("\n" + "=" * 70)
+    print(f"{'Backend':<10} {'Load(s)':>8} {'First(ms)':>10} {'Mean(ms)':>9} {'P95(ms)':>8} "
+          f"{'FPS':>7} {'Agree':>7}")
+    print("-" * 70)
+    for stats in report:
+        agreement = f"{stats['agreement']:.0%}" if 'agreement' in stats else '-'
+        print(f"{stats['backend']:<10} {stats['load_time_s']:>8.1f} {stats['first_inference_ms']:>10.1f} "
+              f"{stats['mean_latency_ms']:>9.1f} {stats['p95_latency_ms']:>8.1f} "
+              f"{stats['fps']:>7.1f} {agreement:>7}")
+    print("=" * 70)
+
+    fastest = max(report, key=lambda s: s['fps'])
+    print(f"\n✅ RECOMMENDATION: backend '{fastest['backend']}' tercepat di mesin ini")
+    print("Untuk apply: edit camera_config.py -> MODEL_CONFIG['backend']")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'model': args.model, 'imgsz': args.imgsz, 'batch': args.batch,
+                       'frames': len(frames), 'results': report}, f, indent=2)
+        print(f"Hasil disimpan: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
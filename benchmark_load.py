@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+"""
+Benchmark Beban Multi-Camera (Camera Virtual)
+N camera virtual memutar file video lokal dengan frame rate asli (opsional
+lewat RTSP stand-in server lokal, dengan jitter dan disconnect), menjalankan
+MultiCameraSystem atau api_server end-to-end, lalu menyimpan FPS per camera,
+frame yang di-drop, percentile latency, CPU dan RSS ke JSON untuk dibandingkan
+antar commit
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import cv2
+
+from motion_gate import DEFAULT_MOTION_CONFIG
+from virtual_camera import RtspReplayServer, get_replay_stats, reset_replay_stats
+
+try:
+    import psutil
+except ImportError:  # Optional: CPU / RSS proses child (worker inference, ffmpeg)
+    psutil = None
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('benchmark_load')
+
+PROGRESS_INTERVAL = 10.0
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark beban multi-camera dengan camera virtual')
+
+    parser.add_argument('videos', nargs='+',
+                        help='File video sumber (dibagi bergiliran ke camera virtual)')
+    parser.add_argument('--target', choices=['multi', 'api'], default='multi',
+                        help='multi = MultiCameraSystem, api = api_server lewat HTTP (default: multi)')
+    parser.add_argument('--cameras', type=int, default=4,
+                        help='Jumlah camera virtual (default: 4)')
+    parser.add_argument('--duration', type=float, default=60.0,
+                        help='Detik pengukuran (default: 60)')
+    parser.add_argument('--warmup', type=float, default=10.0,
+                        help='Detik sebelum pengukuran dimulai (connect, warm-up model) (default: 10)')
+    parser.add_argument('--fps', type=float,
+                        help='Frame rate replay (default: FPS file)')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Keterlambatan acak maksimal per frame dalam detik (default: 0)')
+    parser.add_argument('--disconnect-every', type=float,
+                        help='Rata-rata detik antar disconnect per camera (default: tanpa disconnect)')
+    parser.add_argument('--disconnect-duration', type=float, default=3.0,
+                        help='Detik camera offline setelah disconnect (default: 3)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed jitter / jadwal disconnect (default: 0)')
+    parser.add_argument('--rtsp', action='store_true',
+                        help='Sajikan camera lewat RTSP lokal (mediamtx + ffmpeg) alih-alih decoder replay')
+    parser.add_argument('--rtsp-port', type=int, default=8554,
+                        help='Port RTSP stand-in server (default: 8554)')
+    parser.add_argument('--mediamtx', type=str, default='mediamtx',
+                        help="Binary mediamtx ('' = server RTSP sudah berjalan) (default: mediamtx)")
+    parser.add_argument('--decoder', choices=['opencv', 'pyav'], default='opencv',
+                        help='Decoder camera untuk mode --rtsp (default: opencv)')
+    parser.add_argument('--decode-size', action='store_true',
+                        help="Downscale di decoder ke imgsz ('decode_size': True)")
+    parser.add_argument('--model', type=str, default='models/yolov8n.pt',
+                        help='Path ke model YOLOv8 (default: models/yolov8n.pt)')
+    parser.add_argument('--backend', type=str, choices=['pytorch', 'onnx', 'openvino', 'openvino-int8'],
+                        help='Backend inference CPU (default: tebak dari --model)')
+    parser.add_argument('--conf', type=float, default=0.4,
+                        help='Confidence threshold (default: 0.4)')
+    parser.add_argument('--imgsz', type=int, default=640,
+                        help='Ukuran input inference (default: 640)')
+    parser.add_argument('--batch', type=int, default=8,
+                        help='Batch inference MultiCameraSystem (default: 8)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Proses worker inference (default: 0 = di proses ini)')
+    parser.add_argument('--no-motion', action='store_true',
+                        help='Matikan motion gate (inference setiap frame)')
+    parser.add_argument('--api-port', type=int, default=5055,
+                        help='Port api_server untuk --target api (default: 5055)')
+    parser.add_argument('--stream-clients', type=int, default=0,
+                        help='Client MJPEG per camera untuk --target api (default: 0)')
+    parser.add_argument('--label', type=str,
+                        help='Label run (misalnya nama branch / perubahan)')
+    parser.add_argument('--output', type=str,
+                        help='File JSON hasil (default: outputs/benchmarks/load_<target>_<waktu>.json)')
+    parser.add_argument('--compare', type=str,
+                        help='File JSON hasil run sebelumnya untuk dibandingkan')
+
+    return parser.parse_args()
+
+
+class ResourceSampler:
+    """Sampling CPU (%) dan RSS (MB) proses ini (+ child jika psutil ada) setiap interval"""
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.samples = []  # (cpu_percent, rss_mb)
+        self._stop = threading.Event()
+        self._thread = None
+        self._process = psutil.Process() if psutil is not None else None
+
+    def _children(self):
+        try:
+            return self._process.children(recursive=True)
+        except psutil.Error:
+            return []
+
+    def _rss_mb(self):
+        if self._process is not None:
+            rss = self._process.memory_info().rss
+            for child in self._children():
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return rss / 1e6
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+        except (OSError, ValueError):
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3  # Linux: kB (peak)
+
+    def _cpu_seconds(self):
+        seconds = time.process_time()
+        if self._process is not None:
+            for child in self._children():
+                try:
+                    times = child.cpu_times()
+                    seconds += times.user + times.system
+                except psutil.Error:
+                    pass
+        return seconds
+
+    def _run(self):
+        last_wall, last_cpu = time.time(), self._cpu_seconds()
+        while not self._stop.wait(self.interval):
+            wall, cpu = time.time(), self._cpu_seconds()
+            # Child baru / selesai bisa membuat delta negatif, dibatasi 0
+            self.samples.append((max(0.0, (cpu - last_cpu) / (wall - last_wall) * 100), self._rss_mb()))
+            last_wall, last_cpu = wall, cpu
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ResourceSampler")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+
+    def summary(self):
+        cpu = [s[0] for s in self.samples]
+        rss = [s[1] for s in self.samples]
+        return {
+            'cpu_cores': os.cpu_count(),
+            'cpu_percent_mean': sum(cpu) / len(cpu) if cpu else None,
+            'cpu_percent_max': max(cpu) if cpu else None,
+            'rss_mb_mean': sum(rss) / len(rss) if rss else None,
+            'rss_mb_max': max(rss) if rss else None,
+            'includes_children': psutil is not None,
+        }
+
+
+def git_revision():
+    """Commit + status dirty working tree (None jika bukan git repo)"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return {'commit': commit, 'dirty': bool(dirty)}
+
+
+def build_cameras(args, server=None):
+    """
+    Konfigurasi camera virtual (format camera_config.get_enabled_cameras)
+
+    Setiap camera mulai di posisi berbeda di file sumber agar gerakan tidak serempak.
+    """
+    durations = {}
+    for video in args.videos:
+        cap = cv2.VideoCapture(video)
+        if not cap.isOpened():
+            raise FileNotFoundError(f"Tidak bisa membuka video: {video}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        durations[video] = cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps
+        cap.release()
+
+    copies = -(-args.cameras // len(args.videos))  # Camera per file sumber
+    cameras = []
+    for index in range(args.cameras):
+        video = args.videos[index % len(args.videos)]
+        name = f"virtual-{index + 1:02d}"
+        camera = {'name': name}
+        if server is not None:
+            camera['rtsp_url'] = server.publish(name, video)
+            camera['decoder'] = args.decoder
+        else:
+            camera['rtsp_url'] = video
+            camera['decoder'] = 'replay'
+            camera['decoder_options'] = {
+                'fps': args.fps,
+                'start': durations[video] * (index // len(args.videos)) / copies,
+                'jitter': args.jitter,
+                'disconnect_every': args.disconnect_every,
+                'disconnect_duration': args.disconnect_duration,
+                'seed': args.seed + index,
+            }
+        if args.decode_size:
+            camera['decode_size'] = True
+        cameras.append(camera)
+    return cameras
+
+
+def camera_counters(frames, reader, connection):
+    """Counter kumulatif satu camera (dibandingkan awal vs akhir pengukuran)"""
+    return {
+        'frames': frames,
+        'decoded': reader['decoded_frames'],
+        'dropped': reader['dropped_frames'],
+        'connects': (connection or {}).get('connects', 0),
+        'stalls': (connection or {}).get('stalls', 0),
+    }
+
+
+def camera_results(start, end, duration, replay, server_stats):
+    """FPS, drop, reconnect per camera dari selisih counter"""
+    results = {}
+    for name, last in end.items():
+        first = start.get(name, dict.fromkeys(last, 0))
+        delta = {key: last[key] - first[key] for key in last}
+        entry = {
+            'frames': delta['frames'],
+            'fps': delta['frames'] / duration,
+            'decoded_frames': delta['decoded'],
+            'decoded_fps': delta['decoded'] / duration,
+            'dropped_frames': delta['dropped'],
+            'drop_ratio': delta['dropped'] / delta['decoded'] if delta['decoded'] else None,
+            'reconnects': delta['connects'],
+            'stalls': delta['stalls'],
+        }
+        if name in replay:
+            entry['disconnects'] = replay[name]['disconnects']
+            entry['refused_connects'] = replay[name]['refused']
+            lag = replay[name]['lag']
+            entry['source_lag_ms'] = {'p50': lag['p50_ms'], 'p99': lag['p99_ms'], 'max': lag['max_ms']}
+        elif name in server_stats:
+            entry['disconnects'] = server_stats[name]['disconnects']
+        results[name] = entry
+    return results
+
+
+def wait_with_progress(seconds, progress):
+    """Tunggu sambil log progress (callable -> str) setiap PROGRESS_INTERVAL"""
+    end = time.time() + seconds
+    while True:
+        remaining = end - time.time()
+        if remaining <= 0:
+            break
+        time.sleep(min(PROGRESS_INTERVAL, remaining))
+        logger.info(progress())
+
+
+def run_multi_camera(args, cameras):
+    """Jalankan MultiCameraSystem headless dan ukur"""
+    from multi_camera import MultiCameraSystem
+
+    system = MultiCameraSystem(
+        cameras_config=cameras,
+        model_path=args.model,
+        conf_threshold=args.conf,
+        batch_size=args.batch,
+        backend=args.backend,
+        imgsz=args.imgsz,
+        motion_config=None if args.no_motion else dict(DEFAULT_MOTION_CONFIG),
+        workers=args.workers
+    )
+    # Headless (tanpa display_grid): frame hasil tidak diantrekan untuk display
+    system.display_queue = None
+
+    def counters():
+        connections = system.connection_manager.get_stats()
+        return {p.camera_name: camera_counters(p.frame_count, p.camera.get_stats(),
+                                               connections.get(p.camera_name))
+                for p in system.processors}
+
+    def progress():
+        fps = sum(p.fps for p in system.processors)
+        connected = sum(p.camera.is_connected for p in system.processors)
+        return f"{connected}/{len(system.processors)} connected, {fps:.1f} FPS total"
+
+    system.start()
+    try:
+        wait_with_progress(args.warmup, progress)
+        system.latency.reset()
+        reset_replay_stats()
+        start = counters()
+        sampler = ResourceSampler()
+        sampler.start()
+        measure_start = time.time()
+
+        wait_with_progress(args.duration, progress)
+
+        duration = time.time() - measure_start
+        end = counters()
+        sampler.stop()
+        result = {
+            'duration_s': duration,
+            'counters': (start, end),
+            'latency': system.latency.snapshot(),
+            'resources': sampler.summary(),
+            'scheduler': system.scheduler.get_stats() if system.scheduler is not None else None,
+        }
+    finally:
+        system.stop()
+    return result
+
+
+def _stream_client(url, counts, key, stop):
+    """Client MJPEG: hitung frame yang diterima (beban encode + kirim di api_server)"""
+    import requests
+    try:
+        with requests.get(url, stream=True, timeout=10) as response:
+            for chunk in response.iter_content(chunk_size=65536):
+                counts[key] = counts.get(key, 0) + chunk.count(b'--frame')
+                if stop.is_set():
+                    break
+    except requests.RequestException as e:
+        logger.warning(f"Stream client {key}: {str(e)}")
+
+
+def _sse_client(url, counts, stop):
+    """Client SSE /api/events (latency capture_to_sse tercatat saat event terkirim)"""
+    import requests
+    try:
+        with requests.get(url, stream=True, timeout=10) as response:
+            for line in response.iter_lines():
+                if line.startswith(b'data:'):
+                    counts['events'] = counts.get('events', 0) + 1
+                if stop.is_set():
+                    break
+    except requests.RequestException as e:
+        logger.warning(f"SSE client: {str(e)}")
+
+
+def run_api_server(args, cameras):
+    """Jalankan api_server di thread, tambah camera lewat REST API, ukur"""
+    import requests
+    from werkzeug.serving import make_server
+
+    import api_server
+    from inference_pool import InferenceWorkerPool
+
+    api_server.CONFIG.update({
+        'model_path': args.model,
+        'backend': args.backend,
+        'conf_threshold': args.conf,
+        'motion': {} if args.no_motion else dict(DEFAULT_MOTION_CONFIG),
+    })
+    api_server.detector = api_server.create_detector()
+    if api_server.detector is None:
+        raise RuntimeError("Failed to load model")
+    if args.workers > 0:
+        api_server.inference_pool = InferenceWorkerPool(api_server.detector, args.workers)
+        api_server.inference_pool.start()
+
+    server = make_server('127.0.0.1', args.api_port, api_server.app, threaded=True)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True, name="ApiServer")
+    server_thread.start()
+    base = f"http://127.0.0.1:{args.api_port}"
+
+    stop = threading.Event()
+    client_counts = {}
+    clients = []
+
+    def counters():
+        connections = api_server.get_connection_manager().get_stats()
+        return {camera_id: camera_counters(cam.frame_count, cam.camera.get_stats(), connections.get(camera_id))
+                for camera_id, cam in list(api_server.cameras.items())}
+
+    def progress():
+        cameras_info = requests.get(f"{base}/api/cameras", timeout=5).json()['cameras']
+        fps = sum(cam['fps'] for cam in cameras_info)
+        return f"{len(cameras_info)} cameras, {fps:.1f} FPS total, {client_counts.get('events', 0)} SSE events"
+
+    try:
+        for camera in cameras:
+            body = {'camera_id': camera['name'], 'rtsp_url': camera['rtsp_url'], 'decoder': camera['decoder']}
+            for key in ('decoder_options', 'decode_size'):
+                if key in camera:
+                    body[key] = camera[key]
+            response = requests.post(f"{base}/api/camera/add", json=body, timeout=30)
+            if response.status_code != 201:
+                logger.warning(f"{camera['name']}: add gagal ({response.status_code}): {response.text.strip()}")
+
+        sse = threading.Thread(target=_sse_client, args=(f"{base}/api/events", client_counts, stop), daemon=True)
+        sse.start()
+        clients.append(sse)
+        for camera in cameras:
+            for index in range(args.stream_clients):
+                key = f"{camera['name']}#{index}"
+                client = threading.Thread(target=_stream_client, daemon=True,
+                                          args=(f"{base}/api/camera/{camera['name']}/stream", client_counts,
+                                                key, stop))
+                client.start()
+                clients.append(client)
+
+        wait_with_progress(args.warmup, progress)
+        requests.post(f"{base}/api/latency/reset", timeout=5)
+        reset_replay_stats()
+        start = counters()
+        stream_start = {key: n for key, n in client_counts.items() if key != 'events'}
+        sampler = ResourceSampler()
+        sampler.start()
+        measure_start = time.time()
+
+        wait_with_progress(args.duration, progress)
+
+        duration = time.time() - measure_start
+        end = counters()
+        sampler.stop()
+        stream_fps = {key: (n - stream_start.get(key, 0)) / duration
+                      for key, n in client_counts.items() if key != 'events'}
+        result = {
+            'duration_s': duration,
+            'counters': (start, end),
+            'latency': requests.get(f"{base}/api/latency", timeout=5).json(),
+            'resources': sampler.summary(),
+            'status': requests.get(f"{base}/api/status", timeout=5).json(),
+            'stream_clients_fps': stream_fps,
+            'sse_events': client_counts.get('events', 0),
+        }
+    finally:
+        for camera_id in list(api_server.cameras):
+            try:
+                requests.delete(f"{base}/api/camera/{camera_id}", timeout=10)
+            except requests.RequestException:
+                api_server.cameras.pop(camera_id).stop()
+        stop.set()
+        server.shutdown()
+        if api_server.connection_manager is not None:
+            api_server.connection_manager.stop()
+        if api_server.snapshot_writer is not None:
+            api_server.snapshot_writer.stop()
+        if api_server.inference_pool is not None:
+            api_server.inference_pool.stop()
+    return result
+
+
+def summarize(cameras):
+    """Total semua camera"""
+    fps = [c['fps'] for c in cameras.values()]
+    decoded = sum(c['decoded_frames'] for c in cameras.values())
+    dropped = sum(c['dropped_frames'] for c in cameras.values())
+    return {
+        'fps_total': sum(fps),
+        'fps_min': min(fps) if fps else None,
+        'fps_mean': sum(fps) / len(fps) if fps else None,
+        'dropped_frames': dropped,
+        'drop_ratio': dropped / decoded if decoded else None,
+        'disconnects': sum(c.get('disconnects', 0) for c in cameras.values()),
+        'reconnects': sum(c['reconnects'] for c in cameras.values()),
+    }
+
+
+def key_metrics(report):
+    """Metrik utama untuk perbandingan antar run"""
+    stages = report['latency']['stages']
+    detection = stages.get('capture_to_detection', {})
+    return {
+        'fps_total': report['summary']['fps_total'],
+        'fps_min': report['summary']['fps_min'],
+        'dropped_frames': report['summary']['dropped_frames'],
+        'capture_to_detection_p50_ms': detection.get('p50_ms'),
+        'capture_to_detection_p99_ms': detection.get('p99_ms'),
+        'cpu_percent_mean': report['resources']['cpu_percent_mean'],
+        'rss_mb_max': report['resources']['rss_mb_max'],
+    }
+
+
+def _format_metric(value):
+    return f"{value:.6g}" if isinstance(value, (int, float)) else '-'
+
+
+def print_comparison(report, baseline_path):
+    """Tabel metrik utama run ini vs run sebelumnya"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    revision = baseline.get('git') or {}
+    print("\n" + "=" * 70)
+    print(f"VS {baseline_path} ({baseline.get('label') or revision.get('commit') or '-'}, "
+          f"{baseline['config']['cameras']} cameras, target {baseline['config']['target']})")
+    print("-" * 70)
+    print(f"{'Metric':<30} {'Baseline':>12} {'Current':>12} {'Change':>10}")
+    current = key_metrics(report)
+    previous = key_metrics(baseline)
+    for name, value in current.items():
+        before = previous.get(name)
+        change = f"{(value - before) / before:+.0%}" if value is not None and before else '-'
+        print(f"{name:<30} {_format_metric(before):>12} {_format_metric(value):>12} {change:>10}")
+    print("=" * 70)
+
+
+def main():
+    args = parse_arguments()
+
+    print("=" * 70)
+    print("BENCHMARK BEBAN MULTI-CAMERA")
+    print("=" * 70)
+    print(f"Target: {args.target}, cameras: {args.cameras}, sumber: {', '.join(args.videos)}")
+    print(f"Warm-up {args.warmup:.0f}s, pengukuran {args.duration:.0f}s, jitter {args.jitter}s, "
+          f"disconnect setiap {args.disconnect_every or '-'}s")
+    print("-" * 70)
+
+    server = None
+    if args.rtsp:
+        if args.jitter:
+            logger.warning("Jitter tidak didukung di mode --rtsp (stream copy), diabaikan")
+        server = RtspReplayServer(args.rtsp_port, args.mediamtx or None,
+                                  disconnect_every=args.disconnect_every,
+                                  disconnect_duration=args.disconnect_duration, seed=args.seed)
+        server.start()
+
+    started = datetime.now()
+    try:
+        cameras = build_cameras(args, server)
+        run = run_multi_camera if args.target == 'multi' else run_api_server
+        result = run(args, cameras)
+        server_stats = server.get_stats() if server is not None else {}
+    finally:
+        if server is not None:
+            server.stop()
+
+    start, end = result.pop('counters')
+    per_camera = camera_results(start, end, result['duration_s'], get_replay_stats(), server_stats)
+    report = {
+        'label': args.label,
+        'started': started.isoformat(),
+        'git': git_revision(),
+        'host': {'platform': platform.platform(), 'python': platform.python_version(),
+                 'cpu_count': os.cpu_count()},
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'summary': summarize(per_camera),
+        'cameras': per_camera,
+        **result,
+    }
+
+    output = Path(args.output or f"outputs/benchmarks/load_{args.target}_{started.strftime('%Y%m%d_%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 70)
+    print(f"{'Camera':<14} {'FPS':>7} {'Decoded':>8} {'Dropped':>8} {'Disc.':>6} {'Reconn.':>8} {'Lag p99':>9}")
+    print("-" * 70)
+    for name, stats in per_camera.items():
+        lag = (stats.get('source_lag_ms') or {}).get('p99')
+        print(f"{name:<14} {stats['fps']:>7.1f} {stats['decoded_fps']:>8.1f} {stats['dropped_frames']:>8} "
+              f"{stats.get('disconnects', 0):>6} {stats['reconnects']:>8} "
+              f"{f'{lag:.0f} ms' if lag is not None else '-':>9}")
+    print("-" * 70)
+    summary = report['summary']
+    print(f"Total: {summary['fps_total']:.1f} FPS (min {summary['fps_min'] or 0:.1f} per camera), "
+          f"{summary['dropped_frames']} dropped, {summary['disconnects']} disconnects")
+    for stage in ('capture_to_detection', 'capture_to_event', 'capture_to_sse'):
+        histogram = report['latency']['stages'].get(stage)
+        if histogram:
+            print(f"{stage}: p50 {histogram['p50_ms']:.1f} ms, p90 {histogram['p90_ms']:.1f} ms, "
+                  f"p99 {histogram['p99_ms']:.1f} ms")
+    resources = report['resources']
+    if resources['cpu_percent_mean'] is not None:
+        print(f"CPU: {resources['cpu_percent_mean']:.0f}% mean / {resources['cpu_percent_max']:.0f}% max "
+              f"({resources['cpu_cores']} cores), RSS max {resources['rss_mb_max']:.0f} MB")
+    print("=" * 70)
+    print(f"Hasil disimpan: {output}")
+
+    if args.compare:
+        print_comparison(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
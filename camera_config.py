@@ -27,6 +27,8 @@ CAMERAS = [
         'password': 'Admin123',
         'channel': 102,
         'port': 554,
+        # Optional: tiled inference for long-range views (small, distant people)
+        'tiling': {'rows': 2, 'cols': 2, 'overlap': 0.2, 'motion_only': True},
         'enabled': False  # Disabled - enable when ready
     },
     
@@ -49,6 +51,12 @@ CAMERAS = [
         'password': 'Admin123',
         'channel': 102,
         'port': 554,
+        # Optional: ROI polygons (normalized 0-1 or pixels) - only the doorway is analyzed
+        # 'roi': [
+        #     [(0.30, 0.15), (0.70, 0.15), (0.70, 1.00), (0.30, 1.00)],
+        # ],
+        # Optional: downscale in the decoder to the model input size (True = detector imgsz)
+        # 'decode_size': True,
         'enabled': True
     },
     
@@ -60,6 +68,15 @@ CAMERAS = [
         'password': 'Admin123',
         'channel': 102,
         'port': 554,
+        'motion': {'enabled': True, 'max_staleness': 10.0},  # Optional: override MOTION_CONFIG (False = always infer)
+        # Optional: PyAV decoder, decode keyframes only after 30 s without motion/people
+        'decoder': 'pyav',
+        'decoder_options': {'transport': 'tcp', 'read_timeout': 5.0},  # RTSP over TCP, stall timeout
+        'idle_decode': {'mode': 'keyframes', 'idle_after': 30.0},
+        # Optional: event clips - 5 s before / after detections, H.264 packets remuxed to MP4 (PyAV only)
+        'clips': {'pre_roll': 5.0, 'post_roll': 5.0, 'output_dir': 'outputs/clips'},
+        # Optional: dual stream - detect on this substream (102), person crops from mainstream 101
+        'dual_stream': {'interval': 1.0, 'save_dir': 'outputs/evidence'},
         'enabled': False  # Disabled
     },
     
@@ -75,9 +92,72 @@ CAMERAS = [
 # Model Configuration
 MODEL_CONFIG = {
     'model_path': 'models/yolov8n.pt',
+    'backend': 'pytorch',    # pytorch, onnx, openvino, openvino-int8 (CPU) - lihat benchmark_backends.py
+    'imgsz': 640,            # Inference input size
     'conf_threshold': 0.40,  # Confidence threshold for detection (0.0-1.0) - raised to reduce false positives
     'iou_threshold': 0.45,   # IoU threshold for NMS
     'classes': [0],          # 0 = person only
+    'batch_size': 8,         # Max frames per batch inference (1 = disable batching)
+    'max_batch_wait': 0.02,  # Max seconds to wait for a batch to fill
+    'workers': 0,            # Inference worker processes, frames via shared memory (0 = single process)
+    'threads_per_worker': None,  # Torch threads per worker (None = CPU cores / workers)
+}
+
+# Adaptive inference size: degrade imgsz per camera when the node is overloaded
+LATENCY_CONFIG = {
+    'enabled': False,
+    'sizes': [320, 480, 640],
+    'target_latency_ms': None,   # Per-frame inference budget, OR
+    'node_fps_target': 40,       # Total inference FPS the node must sustain (all cameras)
+    'min_box_height': 24,        # Keep resolution while people are smaller than this (model pixels)
+}
+
+# Tracker: run YOLO every N frames, predict boxes (with stable track IDs) in between
+TRACKING_CONFIG = {
+    'enabled': False,
+    'detect_interval': 3,        # Full inference every N frames
+    'max_age': 30,               # Frames a lost track is kept for re-association
+    'max_uncertainty': 0.15,     # Force inference earlier when predictions drift (per-axis std / box height)
+}
+
+# Connection manager: parallel connect, reconnect in background with jittered exponential backoff
+CONNECTION_CONFIG = {
+    'max_parallel': 16,          # Connects running at the same time
+    'initial_backoff': 1.0,      # Seconds before the first reconnect attempt
+    'max_backoff': 60.0,         # Max seconds between attempts
+    'stall_timeout': 10.0,       # Seconds without a new frame -> stream stalled, reconnect
+}
+
+# Background snapshot / evidence writer: bounded queue, JPEG encode + disk writes on worker threads
+SNAPSHOT_CONFIG = {
+    'workers': 2,                # Encode + write threads
+    'queue_size': 64,            # Pending snapshots, oldest dropped when full
+    'min_interval': 1.0,         # Seconds - max one rate-limited snapshot per camera per interval
+}
+
+# Headless ingest for hundreds of cameras (run_ingest.py): asyncio supervisor + decoder processes
+INGEST_CONFIG = {
+    'decoder_processes': 4,      # Decoder processes, cameras spread evenly
+    'cameras_per_process': 64,   # Max cameras per decoder process (reader + decode thread each)
+    'sample_fps': 5.0,           # Frames per second per camera sent to inference (all frames still decoded)
+    'slots': 64,                 # Shared memory frame slots (use 'decode_size' per camera for small slots)
+    'queue_size': 32,            # Shared inference queue, oldest frame dropped when full
+    'stall_timeout': 10.0,       # Seconds without a new frame -> camera restarted
+}
+
+
+# ========================================
+# MOTION GATE CONFIGURATION
+# ========================================
+
+# Skip YOLO inference saat scene statis (hasil deteksi terakhir dipakai ulang)
+# Opt-in: aktifkan di sini untuk semua camera, atau per camera dengan 'motion': {'enabled': True}
+MOTION_CONFIG = {
+    'enabled': False,
+    'width': 160,                # Downscaled width for frame differencing
+    'pixel_threshold': 25,       # Min intensity change per pixel (0-255)
+    'min_changed_ratio': 0.002,  # Min ratio of changed pixels to count as motion
+    'max_staleness': 5.0,        # Seconds - force a full inference at least this often
 }
 
 
@@ -111,6 +191,11 @@ LOGGING_CONFIG = {
 # HELPER FUNCTIONS
 # ========================================
 
+# Optional per-camera keys passed through to the processors
+CAMERA_OPTIONS = ('motion', 'roi', 'tiling', 'threaded', 'decoder', 'decoder_options', 'idle_decode',
+                  'decode_size', 'dual_stream', 'mainstream_url', 'clips')
+
+
 def get_enabled_cameras():
     """Get list of enabled cameras dengan RTSP URL"""
     enabled = []
@@ -118,10 +203,14 @@ def get_enabled_cameras():
     for cam in CAMERAS:
         if cam['enabled']:
             rtsp_url = build_rtsp_url(cam)
-            enabled.append({
+            entry = {
                 'name': cam['name'],
                 'rtsp_url': rtsp_url
-            })
+            }
+            for key in CAMERA_OPTIONS:
+                if key in cam:
+                    entry[key] = cam[key]
+            enabled.append(entry)
     
     return enabled
 
@@ -177,6 +266,12 @@ def validate_config():
     if len(names) != len(set(names)):
         errors.append("Duplicate camera names found!")
     
+    # Check ROI polygons
+    for cam in CAMERAS:
+        for polygon in cam.get('roi') or []:
+            if len(polygon) < 3:
+                errors.append(f"{cam['name']}: ROI polygon needs at least 3 points")
+    
     # Check model file
     import os
     if not os.path.exists(MODEL_CONFIG['model_path']):
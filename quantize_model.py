@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+INT8 Quantization YOLOv8 untuk CPU (OpenVINO)
+Kalibrasi dengan frame dari rekaman camera sendiri, lalu bandingkan dengan model FP32
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from detector import HumanDetector
+from detections import count_matches
+from model_backend import resolve_model_path
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.ts')
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='INT8 quantization + laporan akurasi/throughput')
+
+    parser.add_argument('--model', type=str, default='models/yolov8n.pt',
+                        help='Path ke model YOLOv8 FP32 .pt (default: models/yolov8n.pt)')
+    parser.add_argument('--clips', nargs='+', required=True,
+                        help='File video rekaman (atau folder berisi video) dari site')
+    parser.add_argument('--samples', type=int, default=300,
+                        help='Jumlah frame kalibrasi (default: 300)')
+    parser.add_argument('--eval-samples', type=int, default=200,
+                        help='Jumlah frame evaluasi, terpisah dari kalibrasi (default: 200)')
+    parser.add_argument('--imgsz', type=int, default=640,
+                        help='Ukuran input inference, samakan dengan imgsz saat deteksi (default: 640)')
+    parser.add_argument('--conf', type=float, default=0.4,
+                        help='Confidence threshold untuk evaluasi (default: 0.4)')
+    parser.add_argument('--calibration-dir', type=str, default='models/calibration',
+                        help='Folder output frame kalibrasi (default: models/calibration)')
+    parser.add_argument('--report', type=str, default='outputs/int8_report.json',
+                        help='Path laporan JSON (default: outputs/int8_report.json)')
+    parser.add_argument('--skip-export', action='store_true',
+                        help='Pakai model INT8 yang sudah ada, hanya buat laporan')
+
+    return parser.parse_args()
+
+
+def find_clips(paths):
+    """Kumpulkan file video dari argumen --clips"""
+    clips = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            clips.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in VIDEO_EXTENSIONS))
+        elif path.exists():
+            clips.append(path)
+        else:
+            print(f"⚠️  Clip tidak ditemukan: {path}")
+    return clips
+
+
+def sample_frames(clips, count):
+    """
+    Ambil frame tersebar merata dari semua clip
+
+    Returns:
+        list: List of (clip_name, frame)
+    """
+    per_clip = max(1, int(np.ceil(count / max(1, len(clips)))))
+    frames = []
+
+    for clip in clips:
+        cap = cv2.VideoCapture(str(clip))
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if total <= 0:
+            print(f"⚠️  Tidak bisa membaca {clip}")
+            cap.release()
+            continue
+
+        wanted = set(np.linspace(0, total - 1, per_clip, dtype=int).tolist())
+        index = 0
+        while wanted and index < total:
+            # grab() saja untuk frame yang tidak dipakai
+            if index in wanted:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.append((clip.name, frame))
+                wanted.discard(index)
+            elif not cap.grab():
+                break
+            index += 1
+        cap.release()
+
+    return frames
+
+
+def write_calibration_set(frames, calibration_dir, model_path):
+    """
+    Simpan frame kalibrasi + dataset YAML untuk ultralytics export int8
+
+    Returns:
+        str: Path dataset YAML
+    """
+    images_dir = Path(calibration_dir) / 'images'
+    images_dir.mkdir(parents=True, exist_ok=True)
+
+    for old in images_dir.glob('*.jpg'):
+        old.unlink()
+
+    for idx, (_, frame) in enumerate(frames):
+        cv2.imwrite(str(images_dir / f"calib_{idx:05d}.jpg"), frame)
+
+    # Head model tetap 80 class COCO; nama class disalin dari model
+    from ultralytics import YOLO
+    names = YOLO(model_path).names
+
+    yaml_path = Path(calibration_dir) / 'calibration.yaml'
+    with open(yaml_path, 'w') as f:
+        f.write(f"path: {Path(calibration_dir).resolve()}\n")
+        f.write("train: images\n")
+        f.write("val: images\n")
+        f.write("names:\n")
+        for class_id, name in names.items():
+            f.write(f"  {class_id}: {name}\n")
+
+    return str(yaml_path)
+
+
+def evaluate(detector, frames):
+    """Jalankan detector pada frame evaluasi, ukur FPS"""
+    detector.detect(frames[0][1])  # warm-up
+
+    results = []
+    start = time.perf_counter()
+    for _, frame in frames:
+        results.append(detector.detect(frame))
+    elapsed = time.perf_counter() - start
+
+    return results, len(frames) / elapsed
+
+
+def build_report(frames, fp32_results, int8_results):
+    """Precision/recall INT8 terhadap FP32 (model FP32 sebagai acuan), total dan per clip"""
+    per_clip = {}
+    for (clip, _), fp32, int8 in zip(frames, fp32_results, int8_results):
+        stats = per_clip.setdefault(clip, {'fp32_detections': 0, 'int8_detections': 0, 'matches': 0})
+        stats['fp32_detections'] += len(fp32)
+        stats['int8_detections'] += len(int8)
+        stats['matches'] += count_matches(int8, fp32)
+
+    def finalize(stats):
+        stats['precision'] = stats['matches'] / stats['int8_detections'] if stats['int8_detections'] else 1.0
+        stats['recall'] = stats['matches'] / stats['fp32_detections'] if stats['fp32_detections'] else 1.0
+        return stats
+
+    total = {'fp32_detections': 0, 'int8_detections': 0, 'matches': 0}
+    for stats in per_clip.values():
+        for key in total:
+            total[key] += stats[key]
+        finalize(stats)
+
+    return finalize(total), per_clip
+
+
+def main():
+    args = parse_arguments()
+
+    print("=" * 70)
+    print("INT8 QUANTIZATION - PERSON DETECTOR")
+    print("=" * 70)
+
+    clips = find_clips(args.clips)
+    if not clips:
+        print("❌ Tidak ada clip video yang bisa dipakai")
+        sys.exit(1)
+    print(f"Clips: {len(clips)}")
+
+    # Frame kalibrasi dan evaluasi diambil terpisah (ganjil/genap) dari clip yang sama
+    frames = sample_frames(clips, args.samples + args.eval_samples)
+    calibration_frames = frames[::2][:args.samples]
+    eval_frames = frames[1::2][:args.eval_samples]
+    print(f"Frames: {len(calibration_frames)} kalibrasi, {len(eval_frames)} evaluasi")
+
+    if not args.skip_export:
+        print("\n[1/3] Menyimpan calibration set...")
+        data_yaml = write_calibration_set(calibration_frames, args.calibration_dir, args.model)
+        print(f"✅ {data_yaml}")
+
+        print("\n[2/3] Export model INT8 (OpenVINO + NNCF)...")
+        int8_path = resolve_model_path(args.model, 'openvino-int8', args.imgsz, data=data_yaml, force=True)
+        print(f"✅ Model INT8: {int8_path}")
+
+    print("\n[3/3] Evaluasi FP32 vs INT8...")
+    fp32 = HumanDetector(args.model, args.conf, backend='pytorch', imgsz=args.imgsz)
+    int8 = HumanDetector(args.model, args.conf, backend='openvino-int8', imgsz=args.imgsz)
+    if not fp32.load_model() or not int8.load_model():
+        print("❌ Gagal load model")
+        sys.exit(1)
+
+    fp32_results, fp32_fps = evaluate(fp32, eval_frames)
+    int8_results, int8_fps = evaluate(int8, eval_frames)
+    total, per_clip = build_report(eval_frames, fp32_results, int8_results)
+
+    print("\n" + "=" * 70)
+    print(f"{'Clip':<30} {'FP32':>6} {'INT8':>6} {'Precision':>10} {'Recall':>8}")
+    print("-" * 70)
+    for clip, stats in per_clip.items():
+        print(f"{clip[:30]:<30} {stats['fp32_detections']:>6} {stats['int8_detections']:>6} "
+              f"{stats['precision']:>10.1%} {stats['recall']:>8.1%}")
+    print("-" * 70)
+    print(f"{'TOTAL':<30} {total['fp32_detections']:>6} {total['int8_detections']:>6} "
+          f"{total['precision']:>10.1%} {total['recall']:>8.1%}")
+    print(f"\nFPS FP32: {fp32_fps:.1f}  |  FPS INT8: {int8_fps:.1f}  |  Speedup: {int8_fps / fp32_fps:.2f}x")
+    print("=" * 70)
+
+    report = {
+        'model': args.model,
+        'imgsz': args.imgsz,
+        'conf_threshold': args.conf,
+        'reference': 'fp32',
+        'clips': [str(c) for c in clips],
+        'eval_frames': len(eval_frames),
+        'fp32_fps': fp32_fps,
+        'int8_fps': int8_fps,
+        'speedup': int8_fps / fp32_fps,
+        'total': total,
+        'per_clip': per_clip,
+    }
+    Path(args.report).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Laporan disimpan: {args.report}")
+
+    print("\nUntuk apply di site ini: edit camera_config.py -> MODEL_CONFIG['backend'] = 'openvino-int8'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Headless Ingest untuk Ratusan Camera
+Satu event loop asyncio + proses decoder, tanpa tampilan (statistik di log)
+"""
+
+import os
+import sys
+import time
+sys.path.append('.')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from detector import HumanDetector
+from ingest_supervisor import IngestSupervisor
+from latency_trace import LatencyRecorder
+from camera_config import get_enabled_cameras, MODEL_CONFIG, INGEST_CONFIG, validate_config
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+STATS_INTERVAL = 10.0
+
+
+def log_detections(camera_name, frame, detections, meta):
+    """Callback hasil deteksi (thread event loop - jangan blocking)"""
+    if len(detections):
+        logger.info(f"{camera_name}: {len(detections)} human(s), frame {meta['seq']}")
+
+
+def main():
+    print("\n" + "=" * 60)
+    print("HEADLESS INGEST")
+    print("=" * 60)
+
+    if not validate_config():
+        print("\n❌ Please fix configuration errors in camera_config.py")
+        return
+
+    cameras = get_enabled_cameras()
+    if not cameras:
+        print("\n❌ No cameras enabled! Edit camera_config.py to enable cameras.")
+        return
+
+    detector = HumanDetector(
+        model_path=MODEL_CONFIG['model_path'],
+        conf_threshold=MODEL_CONFIG['conf_threshold'],
+        backend=MODEL_CONFIG.get('backend'),
+        imgsz=MODEL_CONFIG.get('imgsz', 640)
+    )
+    if not detector.load_model():
+        print("\n❌ Failed to load model")
+        return
+
+    latency = LatencyRecorder()
+    detector.set_latency_recorder(latency)
+
+    config = dict(INGEST_CONFIG)
+    config.setdefault('batch_size', MODEL_CONFIG.get('batch_size', 8))
+    config.setdefault('max_batch_wait', MODEL_CONFIG.get('max_batch_wait', 0.02))
+    supervisor = IngestSupervisor.from_config(detector, config, on_detections=log_detections)
+
+    print(f"\n✅ Starting ingest with {len(cameras)} camera(s)... (Ctrl+C to stop)")
+    supervisor.start()
+    try:
+        for camera in cameras:
+            supervisor.add_camera(camera)
+
+        while True:
+            time.sleep(STATS_INTERVAL)
+            stats = supervisor.get_stats()
+            stages = latency.snapshot()['stages']
+            capture = stages.get('capture_to_detection', {})
+            logger.info(
+                f"Cameras {stats['connected']}/{stats['cameras']} connected | "
+                f"inferred {stats['inferred_frames']} in {stats['batches']} batches | "
+                f"dropped decoder {stats['decoder_dropped']} / queue {stats['queue_dropped']} | "
+                f"queue {stats['inference_queue']} | threads {stats['threads']} | "
+                f"capture->detection p50 {capture.get('p50_ms') or 0:.0f} ms, p99 {capture.get('p99_ms') or 0:.0f} ms"
+            )
+
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Interrupted by user")
+
+    finally:
+        print("\n🛑 Stopping ingest...")
+        supervisor.stop()
+        print("✅ Ingest stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,13 @@ Multi-Camera System dengan Config File
 Lebih mudah untuk manage banyak cameras
 """
 
+import os
 import sys
 sys.path.append('.')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
 
-from src.multi_camera import MultiCameraSystem
-from camera_config import get_enabled_cameras, MODEL_CONFIG, validate_config, print_camera_list
+from multi_camera import MultiCameraSystem
+from camera_config import get_enabled_cameras, MODEL_CONFIG, MOTION_CONFIG, LATENCY_CONFIG, TRACKING_CONFIG, CONNECTION_CONFIG, SNAPSHOT_CONFIG, validate_config, print_camera_list
 import logging
 
 logger = logging.getLogger(__name__)
@@ -40,7 +42,18 @@ def main():
         system = MultiCameraSystem(
             cameras_config=cameras,
             model_path=MODEL_CONFIG['model_path'],
-            conf_threshold=MODEL_CONFIG['conf_threshold']
+            conf_threshold=MODEL_CONFIG['conf_threshold'],
+            batch_size=MODEL_CONFIG.get('batch_size', 1),
+            max_batch_wait=MODEL_CONFIG.get('max_batch_wait', 0.02),
+            backend=MODEL_CONFIG.get('backend'),
+            imgsz=MODEL_CONFIG.get('imgsz', 640),
+            motion_config=MOTION_CONFIG,
+            latency_config=LATENCY_CONFIG,
+            tracking_config=TRACKING_CONFIG,
+            workers=MODEL_CONFIG.get('workers', 0),
+            threads_per_worker=MODEL_CONFIG.get('threads_per_worker'),
+            connection_config=CONNECTION_CONFIG,
+            snapshot_config=SNAPSHOT_CONFIG
         )
         
         # Start all cameras
@@ -5,26 +5,78 @@ Menangani koneksi dan streaming dari kamera Hikvision menggunakan RTSP
 
 import cv2
 import logging
+import threading
+import time
+from collections import deque
 from datetime import datetime
 
+from pyav_capture import PyAVCapture, DEFAULT_PYAV_OPTIONS
+from virtual_camera import ReplayCapture, DEFAULT_REPLAY_OPTIONS
+
+# Decode dikurangi saat camera idle (decoder 'pyav'), bisa di-override per camera
+DEFAULT_IDLE_DECODE_CONFIG = {
+    'mode': 'keyframes',   # 'keyframes' atau 'nonref' saat idle
+    'idle_after': 10.0,    # Detik tanpa gerakan / deteksi sebelum decode dikurangi
+}
+
 class HikvisionCamera:
     """
     Kelas untuk menangani streaming dari kamera Hikvision DS-2CD2120F-I
     """
     
-    def __init__(self, rtsp_url, camera_name="Hikvision Camera"):
+    def __init__(self, rtsp_url, camera_name="Hikvision Camera", threaded=False, decoder='opencv',
+                 decoder_options=None, output_size=None, history=0):
         """
         Inisialisasi koneksi kamera
         
         Args:
             rtsp_url (str): URL RTSP kamera
             camera_name (str): Nama kamera untuk logging
+            threaded (bool): Decode terus-menerus di thread sendiri, read_frame()
+                selalu mengembalikan frame terbaru (frame lama di-drop)
+            decoder (str): 'opencv' (cv2.VideoCapture) atau 'pyav' (butuh PyAV: RTSP over
+                TCP dengan timeout, decode multi-thread, PTS, set_decode_mode untuk camera idle),
+                atau 'replay' (rtsp_url = file video yang diputar seperti camera live, untuk benchmark)
+            decoder_options (dict): Override DEFAULT_PYAV_OPTIONS untuk decoder 'pyav'
+                (open_timeout / read_timeout dan decode_threads juga berlaku untuk decoder 'opencv'), atau
+                DEFAULT_REPLAY_OPTIONS untuk decoder 'replay' (fps, jitter, disconnect_every, ...)
+            output_size (int): Jika diisi, read_frame() mengembalikan frame yang sudah
+                di-downscale (sisi terpanjang = output_size, misalnya imgsz model);
+                frame resolusi penuh hanya dibuat lewat full_resolution_frame()
+            history (int): Mode threaded: simpan N frame hasil decode terakhir (belum
+                dikonversi) untuk frame_near(), misalnya mainstream di mode dual-stream
         """
         self.rtsp_url = rtsp_url
         self.camera_name = camera_name
+        self.threaded = threaded
+        self.decoder = decoder
+        defaults = DEFAULT_REPLAY_OPTIONS if decoder == 'replay' else DEFAULT_PYAV_OPTIONS
+        self.decoder_options = {**defaults, **(decoder_options or {})}
+        self.decode_threads = (decoder_options or {}).get('decode_threads')  # Decoder 'opencv'
+        self.decode_mode = 'all'
+        self.packet_sink = None  # Callable(av.Packet) untuk setiap packet hasil demux (decoder 'pyav')
+        self.output_size = output_size
+        self.output_scale = (1.0, 1.0)  # Faktor (x, y) frame output -> resolusi penuh
         self.cap = None
         self.is_connected = False
         
+        # Frame terakhir yang dikembalikan ke caller
+        self.frame_seq = 0          # Nomor urut frame hasil decode
+        self.frame_timestamp = None  # Waktu capture (time.time() saat frame selesai di-decode)
+        self.frame_pts = None       # Presentation timestamp stream (detik), None jika tidak ada
+        self.dropped_frames = 0     # Frame yang di-decode tapi tidak pernah dibaca caller
+        self.frame_source = None    # Hasil decode frame terakhir (untuk full_resolution_frame)
+        self.last_decode_time = None  # Waktu frame terakhir selesai di-decode (deteksi stream macet)
+        
+        # Threaded reader: slot frame terbaru
+        self._reader_thread = None
+        self._reader_running = False
+        self._slot_condition = threading.Condition()
+        self._latest = None  # (source, seq, timestamp, pts) - konversi BGR saat dibaca
+        self._history = deque(maxlen=history) if history else None  # Entry sama dengan _latest
+        self._reading = set()  # Capture yang sedang dipakai thread reader (release diserahkan ke reader)
+        self._decoded_count = 0
+        
         # Setup logging
         self.logger = logging.getLogger(__name__)
         
@@ -38,17 +90,32 @@ class HikvisionCamera:
         try:
             self.logger.info(f"Mencoba koneksi ke {self.camera_name}...")
             
-            # OPTIMIZATION: Set RTSP transport to TCP for stability, reduce buffer
-            self.cap = cv2.VideoCapture(self.rtsp_url, cv2.CAP_FFMPEG)
-            
-            # CRITICAL: Set buffer to 0 to get latest frame immediately (minimize latency)
-            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 0)
-            
-            # OPTIMIZATION: Enable fast decode
-            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'H264'))
+            if self.decoder == 'pyav':
+                self.cap = PyAVCapture(self.rtsp_url, **self.decoder_options)
+                self.cap.set_decode_mode(self.decode_mode)
+                self.cap.packet_sink = self.packet_sink
+            elif self.decoder == 'replay':
+                self.cap = ReplayCapture(self.rtsp_url, self.camera_name, **self.decoder_options)
+            else:
+                # Timeout open / read: IP yang tidak bisa dihubungi tidak menggantung puluhan detik
+                params = []
+                if isinstance(self.rtsp_url, str):
+                    params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(self.decoder_options['open_timeout'] * 1000),
+                              cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(self.decoder_options['read_timeout'] * 1000)]
+                # Thread decode FFmpeg hanya dibatasi jika decode_threads diset eksplisit (default: per core)
+                if self.decode_threads:
+                    params += [cv2.CAP_PROP_N_THREADS, int(self.decode_threads)]
+                self.cap = cv2.VideoCapture(self.rtsp_url, cv2.CAP_FFMPEG, params)
+                
+                # CRITICAL: Set buffer to 0 to get latest frame immediately (minimize latency)
+                self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 0)
+                
+                # OPTIMIZATION: Enable fast decode
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'H264'))
             
             if self.cap.isOpened():
                 self.is_connected = True
+                self.last_decode_time = time.time()
                 
                 # Dapatkan informasi stream
                 width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -58,6 +125,9 @@ class HikvisionCamera:
                 self.logger.info(f"Berhasil terkoneksi ke {self.camera_name}")
                 self.logger.info(f"Resolusi: {width}x{height}, FPS: {fps}")
                 self.logger.info(f"OPTIMIZATION: Low-latency mode enabled (buffer=0)")
+                
+                if self.threaded:
+                    self._start_reader()
                 return True
             else:
                 self.logger.error(f"Gagal membuka stream dari {self.camera_name}")
@@ -67,6 +137,216 @@ class HikvisionCamera:
             self.logger.error(f"Error saat koneksi ke kamera: {str(e)}")
             return False
     
+    def set_decode_mode(self, mode):
+        """
+        Kurangi decode saat camera idle (hanya decoder 'pyav')
+        
+        Args:
+            mode (str): 'all', 'nonref' (lewati frame non-reference), atau
+                'keyframes' (hanya keyframe, ~1 frame per GOP)
+        
+        Returns:
+            bool: True jika mode didukung decoder ini
+        """
+        if self.decoder != 'pyav':
+            return False
+        if mode != self.decode_mode:
+            self.logger.info(f"{self.camera_name}: decode mode {self.decode_mode} -> {mode}")
+            self.decode_mode = mode
+            if self.cap is not None:
+                self.cap.set_decode_mode(mode)
+        return True
+    
+    def set_packet_sink(self, sink):
+        """
+        Terima packet terkompresi hasil demux (hanya decoder 'pyav'), misalnya
+        ring buffer klip event; dipanggil di thread decode untuk semua packet,
+        juga yang dilewati decoder saat decode mode 'keyframes'
+        
+        Args:
+            sink: Callable(av.Packet) atau None untuk melepas
+        
+        Returns:
+            bool: True jika decoder ini mendukung packet sink
+        """
+        if self.decoder != 'pyav':
+            return False
+        self.packet_sink = sink
+        if self.cap is not None:
+            self.cap.packet_sink = sink
+        return True
+    
+    def _start_reader(self):
+        """Start thread yang terus membaca stream ke slot frame terbaru"""
+        self._latest = None
+        if self._history is not None:
+            self._history.clear()
+        self._reader_running = True
+        with self._slot_condition:
+            self._reading.add(self.cap)
+        self._reader_thread = threading.Thread(target=self._reader_loop, args=(self.cap,), daemon=True,
+                                               name=f"Reader-{self.camera_name}")
+        self._reader_thread.start()
+    
+    def _reader_loop(self, cap):
+        """Decode semua frame secepat stream mengirim, simpan hanya yang terbaru"""
+        try:
+            self._read_stream(cap)
+        finally:
+            # disconnect() yang timeout menunggu reader hanya melepas capture dari camera;
+            # release dilakukan di sini setelah read() yang tertahan selesai
+            with self._slot_condition:
+                self._reading.discard(cap)
+                detached = cap is not self.cap
+            if detached:
+                cap.release()
+    
+    def _read_stream(self, cap):
+        """Loop reader untuk satu capture (berhenti jika capture sudah dilepas disconnect())"""
+        while self._reader_running and cap is self.cap:
+            source = self._grab(cap)
+            timestamp = time.time()
+            
+            with self._slot_condition:
+                if cap is not self.cap:
+                    break  # Sudah disconnect / reconnect selama read() tertahan
+                if source is None:
+                    if self._reader_running:
+                        self.logger.warning(f"Gagal membaca frame dari {self.camera_name}")
+                    self.is_connected = False
+                    self._reader_running = False
+                    self._slot_condition.notify_all()
+                    break
+                
+                self._decoded_count += 1
+                self.last_decode_time = timestamp
+                if self._latest is not None and self._latest[1] > self.frame_seq:
+                    self.dropped_frames += 1  # Frame sebelumnya belum sempat dibaca
+                self._latest = (source, self._decoded_count, timestamp, self._stream_pts(cap))
+                if self._history is not None:
+                    self._history.append(self._latest)
+                self._slot_condition.notify_all()
+    
+    def _grab(self, cap):
+        """
+        Decode frame berikutnya
+        
+        Returns:
+            Frame hasil decode (av.VideoFrame untuk 'pyav' - konversi BGR ditunda sampai
+            frame benar-benar dibaca; numpy array BGR untuk 'opencv'), None jika gagal
+        """
+        if self.decoder == 'pyav':
+            return cap.current_frame if cap.grab() else None
+        ret, frame = cap.read()
+        return frame if ret else None
+    
+    def _output_dims(self, width, height):
+        """Ukuran frame output (lebar, tinggi genap) atau None jika tanpa downscale"""
+        if not self.output_size or max(width, height) <= self.output_size:
+            self.output_scale = (1.0, 1.0)
+            return None
+        scale = self.output_size / max(width, height)
+        out_width = max(2, int(round(width * scale / 2)) * 2)
+        out_height = max(2, int(round(height * scale / 2)) * 2)
+        self.output_scale = (width / out_width, height / out_height)
+        return out_width, out_height
+    
+    def _convert(self, source, full=False):
+        """
+        Frame hasil decode -> numpy array BGR
+        
+        Decoder 'pyav': scale + konversi warna dalam satu pass scaler FFmpeg,
+        frame resolusi penuh tidak pernah dibuat kecuali full=True.
+        """
+        if self.decoder == 'pyav':
+            size = None if full else self._output_dims(source.width, source.height)
+            if size is None:
+                return source.to_ndarray(format='bgr24')
+            return source.to_ndarray(format='bgr24', width=size[0], height=size[1], interpolation='AREA')
+        
+        size = None if full else self._output_dims(source.shape[1], source.shape[0])
+        if size is None:
+            return source
+        return cv2.resize(source, size, interpolation=cv2.INTER_AREA)
+    
+    def full_resolution_frame(self, source=None):
+        """
+        Frame resolusi penuh (untuk snapshot / evidence)
+        
+        Args:
+            source: frame_source yang disimpan caller (default: frame terakhir yang dibaca)
+        
+        Returns:
+            numpy.ndarray BGR atau None
+        """
+        source = self.frame_source if source is None else source
+        if source is None:
+            return None
+        return self._convert(source, full=True)
+    
+    def frame_near(self, timestamp):
+        """
+        Frame di history (mode threaded + history) yang waktu decode-nya paling dekat
+        dengan timestamp, dikonversi ke BGR resolusi penuh
+        
+        Args:
+            timestamp (float): time.time() yang dicari (misalnya frame_timestamp stream lain)
+        
+        Returns:
+            tuple: (frame, frame_timestamp) atau (None, None) jika history kosong
+        """
+        if self._history is None:
+            return None, None
+        with self._slot_condition:
+            if not self._history:
+                return None, None
+            source, _, frame_timestamp, _ = min(self._history, key=lambda entry: abs(entry[2] - timestamp))
+        return self._convert(source, full=True), frame_timestamp
+    
+    def _stream_pts(self, cap):
+        """PTS frame terakhir dari decoder (detik)"""
+        if self.decoder == 'pyav':
+            return cap.last_pts
+        pos_msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+        return pos_msec / 1000 if pos_msec > 0 else None
+    
+    def read_latest(self, timeout=None):
+        """
+        Baca frame terbaru beserta nomor urut dan waktu capture
+        
+        Args:
+            timeout (float): Maksimal tunggu frame baru (mode threaded, default 5 detik,
+                15 detik di mode keyframes karena jarak antar keyframe bisa beberapa detik)
+        
+        Returns:
+            tuple: (success, frame, seq, timestamp)
+        """
+        if not self.threaded:
+            ret, frame = self.read_frame()
+            return ret, frame, self.frame_seq, self.frame_timestamp
+        
+        if timeout is None:
+            timeout = 15.0 if self.decode_mode == 'keyframes' else 5.0
+        
+        with self._slot_condition:
+            # Tunggu frame yang belum pernah dikembalikan
+            ready = self._slot_condition.wait_for(
+                lambda: not self._reader_running or
+                (self._latest is not None and self._latest[1] > self.frame_seq),
+                timeout)
+            if not ready or self._latest is None or self._latest[1] <= self.frame_seq:
+                if ready:
+                    self.is_connected = False  # Reader berhenti
+                else:
+                    self.logger.warning(f"Tidak ada frame baru dari {self.camera_name} dalam {timeout} detik")
+                return False, None, self.frame_seq, self.frame_timestamp
+            
+            self.frame_source, self.frame_seq, self.frame_timestamp, self.frame_pts = self._latest
+            source = self.frame_source
+        
+        # Konversi di thread caller, hanya untuk frame yang benar-benar dipakai
+        return True, self._convert(source), self.frame_seq, self.frame_timestamp
+    
     def read_frame(self):
         """
         Membaca frame dari stream kamera
@@ -75,26 +355,84 @@ class HikvisionCamera:
         Returns:
             tuple: (success, frame) - success adalah boolean, frame adalah numpy array
         """
+        if self.threaded:
+            ret, frame, _, _ = self.read_latest()
+            return ret, frame
+        
         if not self.is_connected or self.cap is None:
             return False, None
         
         try:
-            # CRITICAL: Grab frame immediately without buffering
-            # This reduces latency by skipping old frames in buffer
-            self.cap.grab()
-            ret, frame = self.cap.retrieve()
+            source = self._grab(self.cap)
             
-            if not ret:
+            if source is None:
                 self.logger.warning(f"Gagal membaca frame dari {self.camera_name}")
                 self.is_connected = False
                 return False, None
             
-            return True, frame
+            self.frame_source = source
+            self.frame_seq += 1
+            self.frame_timestamp = time.time()
+            self.last_decode_time = self.frame_timestamp
+            self.frame_pts = self._stream_pts(self.cap)
+            return True, self._convert(source)
             
         except Exception as e:
             self.logger.error(f"Error saat membaca frame: {str(e)}")
             return False, None
     
+    def grab_frame(self):
+        """
+        Decode frame berikutnya tanpa konversi BGR (mode non-threaded)
+        
+        Untuk sampling: semua frame tetap di-decode (stream tidak tertinggal),
+        tapi hanya frame yang dipakai dikonversi lewat retrieve_frame().
+        
+        Returns:
+            bool: True jika ada frame
+        """
+        if not self.is_connected or self.cap is None:
+            return False
+        
+        try:
+            if self.decoder == 'pyav':
+                ok = self.cap.grab()
+                self.frame_source = self.cap.current_frame if ok else None
+            else:
+                ok = self.cap.grab()
+                self.frame_source = None  # cv2: konversi lewat cap.retrieve() di retrieve_frame()
+        except Exception as e:
+            self.logger.error(f"Error saat membaca frame: {str(e)}")
+            ok = False
+        
+        if not ok:
+            self.logger.warning(f"Gagal membaca frame dari {self.camera_name}")
+            self.is_connected = False
+            return False
+        
+        self.frame_seq += 1
+        self.frame_timestamp = time.time()
+        self.last_decode_time = self.frame_timestamp
+        self.frame_pts = self._stream_pts(self.cap)
+        return True
+    
+    def retrieve_frame(self):
+        """
+        Konversi frame hasil grab_frame() terakhir ke BGR (downscale ke output_size jika diisi)
+        
+        Returns:
+            tuple: (success, frame)
+        """
+        if self.cap is None:
+            return False, None
+        if self.decoder != 'pyav' and self.frame_source is None:
+            ret, self.frame_source = self.cap.retrieve()
+            if not ret:
+                self.frame_source = None
+        if self.frame_source is None:
+            return False, None
+        return True, self._convert(self.frame_source)
+    
     def reconnect(self):
         """
         Mencoba reconnect ke kamera
@@ -110,12 +448,35 @@ class HikvisionCamera:
         """
         Menutup koneksi kamera
         """
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = None
+        # Hentikan reader dulu sebelum capture di-release
+        if self._reader_thread is not None:
+            self._reader_running = False
+            if self._reader_thread is not threading.current_thread():
+                self._reader_thread.join(timeout=5)
+            self._reader_thread = None
+        
+        with self._slot_condition:
+            cap, self.cap = self.cap, None
+            # Reader masih tertahan di read() (RTSP menggantung): release saat reader keluar
+            handoff = cap in self._reading
+        if cap is not None and not handoff:
+            cap.release()
+        if handoff:
+            self.logger.warning(f"{self.camera_name}: reader masih membaca, capture di-release oleh reader")
         self.is_connected = False
         self.logger.info(f"Koneksi ke {self.camera_name} ditutup")
     
+    def seconds_since_frame(self):
+        """
+        Detik sejak frame terakhir di-decode (atau sejak connect jika belum ada frame)
+        
+        Returns:
+            float: 0 jika belum pernah terhubung
+        """
+        if self.last_decode_time is None:
+            return 0.0
+        return time.time() - self.last_decode_time
+    
     def get_frame_info(self):
         """
         Mendapatkan informasi frame
@@ -132,22 +493,47 @@ class HikvisionCamera:
             'fps': int(self.cap.get(cv2.CAP_PROP_FPS))
         }
     
-    def save_snapshot(self, frame, output_dir="outputs/frames"):
+    def get_stats(self):
+        """
+        Statistik reader
+        
+        Returns:
+            dict: frame terakhir (seq), jumlah frame di-decode / di-drop, umur frame terakhir (detik)
+        """
+        return {
+            'decoder': self.decoder,
+            'decode_mode': self.decode_mode,
+            'frame_seq': self.frame_seq,
+            'frame_pts': self.frame_pts,
+            'decoded_frames': self._decoded_count if self.threaded else self.frame_seq,
+            'dropped_frames': self.dropped_frames,
+            'output_size': self.output_size,
+            'frame_age': time.time() - self.frame_timestamp if self.frame_timestamp else None
+        }
+    
+    def save_snapshot(self, frame, output_dir="outputs/frames", writer=None):
         """
         Menyimpan snapshot frame
         
         Args:
             frame: Frame yang akan disimpan
             output_dir (str): Directory untuk menyimpan snapshot
+            writer (SnapshotWriter): Jika diisi, encode + tulis di background (tidak blocking)
             
         Returns:
             str: Path file yang disimpan
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{output_dir}/snapshot_{timestamp}.jpg"
+        if writer is not None:
+            return writer.submit(self.camera_name, frame, timestamp=self.frame_timestamp or None,
+                                 force=True, directory=output_dir)
+        
+        # Mikrodetik + nomor frame agar snapshot beruntun tidak saling menimpa
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        filename = f"{output_dir}/snapshot_{timestamp}_{self.frame_seq:06d}.jpg"
         
         try:
-            cv2.imwrite(filename, frame)
+            if not cv2.imwrite(filename, frame):
+                raise IOError(f"cv2.imwrite gagal: {filename}")
             self.logger.info(f"Snapshot disimpan: {filename}")
             return filename
         except Exception as e:
@@ -0,0 +1,286 @@
+"""
+Connection Manager Module
+Connect banyak camera secara paralel, reconnect di background dengan
+exponential backoff + jitter, dan deteksi stream macet dari umur frame
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Default, bisa di-override dari config
+DEFAULT_CONNECTION_CONFIG = {
+    'max_parallel': 16,        # Connect / reconnect yang berjalan bersamaan
+    'connect_timeout': 20.0,   # Detik - batas tunggu connect_all() (sisanya lanjut di background)
+    'initial_backoff': 1.0,    # Detik - jeda sebelum percobaan reconnect pertama
+    'max_backoff': 60.0,       # Detik - jeda maksimal antar percobaan
+    'jitter': 0.5,             # 0-1, jeda diacak ke [delay * (1 - jitter), delay]
+    'stall_timeout': 10.0,     # Detik tanpa frame baru -> stream dianggap macet, reconnect
+    'check_interval': 0.5,     # Detik antar pengecekan supervisor
+}
+
+
+def backoff_delay(attempt, initial=1.0, maximum=60.0, jitter=0.5):
+    """
+    Jeda sebelum percobaan reconnect berikutnya
+
+    Args:
+        attempt (int): Jumlah percobaan yang sudah gagal (1 = gagal pertama)
+        initial (float): Jeda awal (detik)
+        maximum (float): Jeda maksimal (detik)
+        jitter (float): Fraksi jeda yang diacak, agar banyak camera yang putus
+            bersamaan (misalnya switch restart) tidak reconnect serentak
+
+    Returns:
+        float: Detik
+    """
+    delay = min(maximum, initial * 2 ** max(attempt - 1, 0))
+    return delay * (1.0 - jitter * random.random())
+
+
+class ConnectionManager:
+    """
+    Supervisor koneksi untuk sekumpulan HikvisionCamera
+
+    Connect dan reconnect berjalan di thread pool terbatas, sehingga camera
+    yang tidak bisa dihubungi tidak menahan camera lain; waktu start sama
+    dengan camera paling lambat, bukan jumlah semuanya. Consumer (thread
+    processor) tidak pernah reconnect sendiri, cukup wait_ready().
+    """
+
+    def __init__(self, max_parallel=16, connect_timeout=20.0, initial_backoff=1.0, max_backoff=60.0,
+                 jitter=0.5, stall_timeout=10.0, check_interval=0.5):
+        """
+        Args:
+            max_parallel (int): Connect yang berjalan bersamaan
+            connect_timeout (float): Batas tunggu connect_all()
+            initial_backoff (float): Jeda reconnect awal (detik)
+            max_backoff (float): Jeda reconnect maksimal (detik)
+            jitter (float): Fraksi jeda yang diacak (0-1)
+            stall_timeout (float): Detik tanpa frame sebelum reconnect
+            check_interval (float): Interval pengecekan supervisor
+        """
+        self.max_parallel = max_parallel
+        self.connect_timeout = connect_timeout
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.stall_timeout = stall_timeout
+        self.check_interval = check_interval
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._cameras = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix='Connect')
+        self._supervisor = None
+        self._running = False
+        self._closed = False
+
+    @classmethod
+    def from_config(cls, config):
+        """Buat manager dari dict konfigurasi (override DEFAULT_CONNECTION_CONFIG)"""
+        options = dict(DEFAULT_CONNECTION_CONFIG)
+        options.update(config or {})
+        return cls(**options)
+
+    def add(self, camera):
+        """
+        Daftarkan camera; camera yang belum terhubung di-connect oleh
+        connect_all() atau oleh supervisor setelah start()
+
+        Args:
+            camera (HikvisionCamera): Camera, key = camera.camera_name
+        """
+        ready = threading.Event()
+        if camera.is_connected:
+            ready.set()
+        with self._lock:
+            self._cameras[camera.camera_name] = {
+                'camera': camera,
+                'state': 'connected' if camera.is_connected else 'disconnected',  # / 'connecting'
+                'ready': ready,
+                'failures': 0,             # Percobaan gagal berturut-turut
+                'next_attempt': 0.0,
+                'connects': 0,
+                'stalls': 0,
+            }
+
+    def remove(self, name):
+        """Lepas camera dari supervisor (tidak di-disconnect)"""
+        with self._lock:
+            state = self._cameras.pop(name, None)
+        if state is not None:
+            state['ready'].set()  # Bangunkan consumer yang sedang menunggu
+
+    def connect_all(self):
+        """
+        Connect semua camera yang belum terhubung secara paralel
+
+        Returns:
+            dict: {camera_name: bool} - camera yang belum selesai dalam
+            connect_timeout bernilai False dan tetap dicoba di background
+        """
+        with self._lock:
+            futures = {name: self._submit(state) for name, state in self._cameras.items()
+                       if state['state'] == 'disconnected'}
+
+        started = time.time()
+        wait([f for f in futures.values() if f is not None], timeout=self.connect_timeout)
+        results = {name: self.is_ready(name) for name in futures}
+
+        self.logger.info(f"Connected {sum(results.values())}/{len(results)} cameras "
+                         f"in {time.time() - started:.1f}s")
+        return results
+
+    def start(self):
+        """Start supervisor di background (reconnect + deteksi stream macet)"""
+        if self._running:
+            return
+        self._running = True
+        self._supervisor = threading.Thread(target=self._supervise, daemon=True,
+                                            name='ConnectionSupervisor')
+        self._supervisor.start()
+
+    def stop(self):
+        """Stop supervisor (camera tidak di-disconnect)"""
+        self._running = False
+        if self._supervisor is not None:
+            self._supervisor.join(timeout=self.check_interval * 4)
+            self._supervisor = None
+        with self._lock:
+            self._closed = True
+            for state in self._cameras.values():
+                state['ready'].set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def is_ready(self, name):
+        """True jika camera terhubung"""
+        state = self._cameras.get(name)
+        return state is not None and state['state'] == 'connected'
+
+    def wait_ready(self, name, timeout=None):
+        """
+        Tunggu sampai camera terhubung (dipanggil thread consumer setelah read gagal)
+
+        Returns:
+            bool: True jika camera terhubung
+        """
+        state = self._cameras.get(name)
+        if state is None:
+            return False
+        # Stream putus sebelum tick supervisor berikutnya: tanpa ini ready masih
+        # set dan consumer berputar tanpa jeda sampai check_interval lewat
+        self.report_lost(name)
+        state['ready'].wait(timeout)
+        return self.is_ready(name)
+
+    def report_lost(self, name):
+        """
+        Tandai camera terputus segera jika stream-nya sudah tidak terhubung
+        (reconnect dijadwalkan supervisor tanpa jeda)
+
+        Returns:
+            bool: True jika status camera berubah menjadi terputus
+        """
+        with self._lock:
+            state = self._cameras.get(name)
+            if state is None or state['state'] != 'connected' or state['camera'].is_connected:
+                return False
+            self.logger.warning(f"{name}: stream lost, reconnecting")
+            self._mark_lost(state, time.time())
+            return True
+
+    def _mark_lost(self, state, now):
+        """Camera terputus / macet, percobaan reconnect pertama langsung (harus dipanggil dengan _lock)"""
+        state['state'] = 'disconnected'
+        state['ready'].clear()
+        state['next_attempt'] = now
+
+    def _submit(self, state):
+        """Jadwalkan connect di thread pool (harus dipanggil dengan _lock)"""
+        if self._closed:
+            return None
+        state['state'] = 'connecting'
+        state['ready'].clear()
+        return self._executor.submit(self._connect, state)
+
+    def _connect(self, state):
+        """Disconnect + connect satu camera (di thread pool)"""
+        camera = state['camera']
+        try:
+            camera.disconnect()
+            ok = camera.connect()
+        except Exception as e:
+            self.logger.error(f"{camera.camera_name}: connect error: {str(e)}")
+            ok = False
+
+        with self._lock:
+            if ok:
+                state['state'] = 'connected'
+                state['failures'] = 0
+                state['connects'] += 1
+                state['ready'].set()
+            else:
+                state['state'] = 'disconnected'
+                state['failures'] += 1
+                delay = backoff_delay(state['failures'], self.initial_backoff, self.max_backoff, self.jitter)
+                state['next_attempt'] = time.time() + delay
+                self.logger.warning(f"{camera.camera_name}: connect failed "
+                                    f"(attempt {state['failures']}), retry in {delay:.1f}s")
+        return ok
+
+    def _stalled(self, camera):
+        """Stream terhubung tapi tidak ada frame baru selama stall_timeout"""
+        timeout = self.stall_timeout
+        if camera.decode_mode == 'keyframes':
+            timeout = max(timeout, 15.0)  # Jarak antar keyframe bisa beberapa detik
+        return camera.seconds_since_frame() > timeout
+
+    def _supervise(self):
+        """Loop supervisor: jadwalkan reconnect tanpa memblokir camera lain"""
+        while self._running:
+            now = time.time()
+            with self._lock:
+                for name, state in self._cameras.items():
+                    camera = state['camera']
+
+                    if state['state'] == 'connected':
+                        if not camera.is_connected:
+                            self.logger.warning(f"{name}: stream lost, reconnecting")
+                        elif camera.threaded and self._stalled(camera):
+                            # Non-threaded: read_frame() gagal sendiri setelah read timeout
+                            self.logger.warning(f"{name}: no frame for "
+                                                f"{camera.seconds_since_frame():.1f}s, reconnecting")
+                            state['stalls'] += 1
+                        else:
+                            continue
+                        self._mark_lost(state, now)
+
+                    if state['state'] == 'disconnected' and now >= state['next_attempt']:
+                        self._submit(state)
+
+            time.sleep(self.check_interval)
+
+    def get_stats(self):
+        """
+        Status koneksi per camera
+
+        Returns:
+            dict: {camera_name: {'state', 'failures', 'connects', 'stalls',
+            'retry_in', 'frame_age'}}
+        """
+        now = time.time()
+        with self._lock:
+            return {
+                name: {
+                    'state': state['state'],
+                    'failures': state['failures'],
+                    'connects': state['connects'],
+                    'stalls': state['stalls'],
+                    'retry_in': max(0.0, state['next_attempt'] - now) if state['state'] == 'disconnected' else None,
+                    'frame_age': state['camera'].seconds_since_frame() if state['state'] == 'connected' else None,
+                }
+                for name, state in self._cameras.items()
+            }
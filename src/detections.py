@@ -0,0 +1,310 @@
+"""
+Detections Module
+Hasil deteksi yang compact: satu array float32 N x 6 (x1, y1, x2, y2, conf, cls)
+"""
+
+import numpy as np
+
+# Nama class COCO yang dipakai sistem ini
+CLASS_NAMES = {0: 'person'}
+
+
+class Detections:
+    """
+    Container hasil deteksi berbasis NumPy array
+
+    Kolom data: x1, y1, x2, y2, confidence, class_id (float32).
+    Iterasi / indexing menghasilkan dict (view lazy) agar kompatibel dengan
+    format lama {'bbox': [...], 'confidence': ..., 'class': ...}.
+    Jika hasil dari tracker, track_ids berisi ID per deteksi dan dict
+    mendapat key tambahan 'track_id'.
+    """
+
+    __slots__ = ('data', 'track_ids')
+
+    def __init__(self, data=None, track_ids=None):
+        """
+        Args:
+            data: Array N x 6 (x1, y1, x2, y2, conf, cls), None untuk kosong
+            track_ids: Array N track ID (int), None jika tidak di-track
+        """
+        if data is None:
+            data = np.zeros((0, 6), dtype=np.float32)
+        self.data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+        self.track_ids = None if track_ids is None else np.asarray(track_ids, dtype=np.int64).reshape(-1)
+
+    @classmethod
+    def empty(cls):
+        """Detections tanpa isi"""
+        return cls()
+
+    @classmethod
+    def from_boxes(cls, boxes, class_id=None):
+        """
+        Buat Detections dari ultralytics Boxes dengan satu kali transfer ke NumPy
+
+        Args:
+            boxes: result.boxes dari ultralytics
+            class_id (int): Jika diisi, hanya simpan class ini
+
+        Returns:
+            Detections
+        """
+        data = boxes.data
+        if hasattr(data, 'cpu'):
+            data = data.cpu().numpy()
+        data = np.asarray(data, dtype=np.float32)
+
+        # Boxes dengan tracking punya kolom track id (x1, y1, x2, y2, id, conf, cls)
+        if data.shape[1] == 7:
+            data = data[:, [0, 1, 2, 3, 5, 6]]
+
+        if class_id is not None:
+            data = data[data[:, 5] == class_id]
+
+        return cls(data)
+
+    @classmethod
+    def concatenate(cls, parts):
+        """
+        Gabungkan beberapa Detections
+
+        Args:
+            parts: List of Detections
+
+        Returns:
+            Detections
+        """
+        parts = [p for p in parts if len(p) > 0]
+        if not parts:
+            return cls()
+
+        track_ids = None
+        if all(p.track_ids is not None for p in parts):
+            track_ids = np.concatenate([p.track_ids for p in parts])
+        return cls(np.concatenate([p.data for p in parts]), track_ids)
+
+    @classmethod
+    def from_list(cls, detections):
+        """
+        Buat Detections dari list of dict format lama
+
+        Args:
+            detections: List {'bbox': [x1, y1, x2, y2], 'confidence': float, ...}
+
+        Returns:
+            Detections
+        """
+        if isinstance(detections, cls):
+            return detections
+        if not detections:
+            return cls()
+
+        names_to_id = {name: class_id for class_id, name in CLASS_NAMES.items()}
+        rows = [list(d['bbox']) + [d['confidence'], names_to_id.get(d.get('class'), 0)]
+                for d in detections]
+        return cls(rows)
+
+    @property
+    def xyxy(self):
+        """Array N x 4 koordinat bounding box"""
+        return self.data[:, :4]
+
+    @property
+    def confidence(self):
+        """Array N confidence score"""
+        return self.data[:, 4]
+
+    @property
+    def class_id(self):
+        """Array N class id"""
+        return self.data[:, 5].astype(np.int32)
+
+    def scale(self, sx, sy):
+        """
+        Skalakan koordinat box (misalnya saat frame di-resize)
+
+        Args:
+            sx (float): Faktor skala horizontal
+            sy (float): Faktor skala vertikal
+
+        Returns:
+            Detections: Objek baru dengan koordinat terskala
+        """
+        data = self.data.copy()
+        data[:, [0, 2]] *= sx
+        data[:, [1, 3]] *= sy
+        return Detections(data, self.track_ids)
+
+    def translate(self, dx, dy):
+        """
+        Geser koordinat box (misalnya dari koordinat crop ke frame penuh)
+
+        Args:
+            dx (float): Offset horizontal
+            dy (float): Offset vertikal
+
+        Returns:
+            Detections: Objek baru dengan koordinat tergeser
+        """
+        if dx == 0 and dy == 0:
+            return self
+        data = self.data.copy()
+        data[:, [0, 2]] += dx
+        data[:, [1, 3]] += dy
+        return Detections(data, self.track_ids)
+
+    def select(self, mask):
+        """
+        Ambil sebagian deteksi
+
+        Args:
+            mask: Boolean mask atau array index
+
+        Returns:
+            Detections: Deteksi terpilih
+        """
+        track_ids = None if self.track_ids is None else self.track_ids[mask]
+        return Detections(self.data[mask], track_ids)
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        """Dict view untuk satu deteksi"""
+        row = self.data[index]
+        item = {
+            'bbox': [int(v) for v in row[:4]],
+            'confidence': float(row[4]),
+            'class': CLASS_NAMES.get(int(row[5]), str(int(row[5])))
+        }
+        if self.track_ids is not None:
+            item['track_id'] = int(self.track_ids[index])
+        return item
+
+    def __repr__(self):
+        return f"Detections(n={len(self)})"
+
+    def to_list(self):
+        """
+        Konversi ke list of dict (JSON serializable) untuk API / event payload
+
+        Returns:
+            list: [{'bbox': [x1, y1, x2, y2], 'confidence': float, 'class': str}, ...]
+                (+ 'track_id' jika hasil tracker)
+        """
+        if len(self) == 0:
+            return []
+
+        bboxes = self.data[:, :4].astype(np.int32).tolist()
+        confidences = self.data[:, 4].tolist()
+        classes = [CLASS_NAMES.get(c, str(c)) for c in self.data[:, 5].astype(np.int32).tolist()]
+
+        items = [{'bbox': bbox, 'confidence': conf, 'class': name}
+                 for bbox, conf, name in zip(bboxes, confidences, classes)]
+        if self.track_ids is not None:
+            for item, track_id in zip(items, self.track_ids.tolist()):
+                item['track_id'] = track_id
+        return items
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    IoU antar semua pasangan box (vectorized)
+
+    Args:
+        boxes_a: Array N x 4 (x1, y1, x2, y2)
+        boxes_b: Array M x 4 (x1, y1, x2, y2)
+
+    Returns:
+        numpy.ndarray: Matriks IoU N x M
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    inter = wh[..., 0] * wh[..., 1]
+
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+def count_matches(predicted, reference, iou_threshold=0.5):
+    """
+    Hitung jumlah deteksi yang cocok one-to-one (greedy, urut confidence)
+
+    Args:
+        predicted (Detections): Deteksi yang dievaluasi
+        reference (Detections): Deteksi acuan (ground truth / model referensi)
+        iou_threshold (float): IoU minimal agar dianggap cocok
+
+    Returns:
+        int: Jumlah pasangan yang cocok (true positive)
+    """
+    if len(predicted) == 0 or len(reference) == 0:
+        return 0
+
+    order = np.argsort(-predicted.confidence)
+    iou = box_iou(predicted.xyxy[order], reference.xyxy)
+
+    matched = np.zeros(len(reference), dtype=bool)
+    matches = 0
+    for row in iou:
+        row = np.where(matched, -1.0, row)
+        best = int(np.argmax(row))
+        if row[best] >= iou_threshold:
+            matched[best] = True
+            matches += 1
+
+    return matches
+
+
+def nms(detections, iou_threshold=0.5, metric='iou'):
+    """
+    Class-agnostic non-maximum suppression (vectorized per iterasi)
+
+    Args:
+        detections (Detections): Deteksi yang akan di-merge
+        iou_threshold (float): Overlap minimal agar box dengan score lebih rendah dibuang
+        metric (str): 'iou' (intersection over union) atau 'ios' (intersection over
+            smaller box, cocok untuk potongan orang di perbatasan tile)
+
+    Returns:
+        Detections: Deteksi setelah NMS (urut confidence menurun)
+    """
+    if len(detections) <= 1:
+        return detections
+
+    boxes = detections.xyxy
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = np.argsort(-detections.confidence)
+
+    keep = []
+    while order.size > 0:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+
+        top_left = np.maximum(boxes[best, :2], boxes[rest, :2])
+        bottom_right = np.minimum(boxes[best, 2:], boxes[rest, 2:])
+        wh = np.clip(bottom_right - top_left, 0, None)
+        inter = wh[:, 0] * wh[:, 1]
+
+        if metric == 'ios':
+            denom = np.minimum(areas[best], areas[rest])
+        else:
+            denom = areas[best] + areas[rest] - inter
+        overlap = inter / np.maximum(denom, 1e-6)
+
+        order = rest[overlap < iou_threshold]
+
+    return detections.select(np.array(keep))
@@ -6,24 +6,34 @@ Menggunakan YOLOv8 untuk mendeteksi manusia dalam frame video
 import cv2
 import numpy as np
 import logging
+import threading
+import time
 from ultralytics import YOLO
 from datetime import datetime
 
+from detections import Detections, nms
+from model_backend import resolve_model_path, detect_backend
+from tracker import ObjectTracker
+
 class HumanDetector:
     """
     Kelas untuk mendeteksi manusia menggunakan YOLOv8
     """
     
-    def __init__(self, model_path="models/yolov8n.pt", conf_threshold=0.40):
+    def __init__(self, model_path="models/yolov8n.pt", conf_threshold=0.40, backend=None, imgsz=640):
         """
         Initialize Human Detector
         
         Args:
-            model_path: Path to YOLOv8 model
+            model_path: Path to YOLOv8 model (.pt, .onnx, atau folder *_openvino_model)
             conf_threshold: Confidence threshold (default 0.40 to reduce false positives)
+            backend: 'pytorch', 'onnx', 'openvino', 'openvino-int8' (None = tebak dari model_path)
+            imgsz: Ukuran input inference
         """
         self.model_path = model_path
         self.conf_threshold = conf_threshold
+        self.backend = backend or detect_backend(model_path)
+        self.imgsz = imgsz
         self.model = None
         
         # Class ID untuk 'person' dalam COCO dataset
@@ -32,85 +42,405 @@ class HumanDetector:
         # Setup logging
         self.logger = logging.getLogger(__name__)
         
+        # Lock untuk model - detector di-share oleh banyak thread camera
+        self._model_lock = threading.Lock()
+        
+        # Controller imgsz per camera (optional, lihat set_resolution_controller)
+        self.resolution_controller = None
+        
+        # Tracker per camera (optional, lihat enable_tracking)
+        self.tracker_config = None
+        self.trackers = {}
+        
+        # Histogram latency per stage (optional, lihat set_latency_recorder)
+        self.latency_recorder = None
+        
         # Statistik
         self.total_detections = 0
         self.frame_count = 0
         
-    def load_model(self):
+    def load_model(self, warmup=False):
         """
         Load model YOLOv8
         
+        Model hasil export (ONNX/OpenVINO) diambil dari cache di disk jika
+        file .pt tidak berubah, jadi restart tidak perlu export ulang.
+        
+        Args:
+            warmup (bool): Jalankan inference dummy pada imgsz agar frame
+                pertama langsung dengan kecepatan steady-state
+        
         Returns:
             bool: True jika berhasil load model
         """
         try:
-            self.logger.info(f"Loading model dari {self.model_path}...")
-            self.model = YOLO(self.model_path)
-            self.logger.info("Model berhasil di-load")
+            start = time.time()
+            model_path = resolve_model_path(self.model_path, self.backend, self.imgsz)
+            self.logger.info(f"Loading model dari {model_path} (backend: {self.backend})...")
+            self.model = YOLO(model_path, task='detect')
+            if warmup:
+                self.warmup()
+            self.logger.info(f"Model berhasil di-load ({time.time() - start:.1f} detik)")
             return True
         except Exception as e:
             self.logger.error(f"Error saat loading model: {str(e)}")
             return False
     
-    def detect_humans(self, frame):
+    def warmup(self, sizes=None, batch_size=1, runs=2):
+        """
+        Inference dummy untuk inisialisasi backend (alokasi, fuse layer,
+        kompilasi graph OpenVINO) sebelum frame camera pertama
+        
+        Args:
+            sizes: List imgsz yang akan dipakai (default: [self.imgsz])
+            batch_size (int): Ukuran batch yang akan dipakai scheduler
+            runs (int): Jumlah inference per ukuran
+        """
+        if self.model is None:
+            return
+        
+        start = time.time()
+        for imgsz in sizes or [self.imgsz]:
+            frame = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+            source = frame if batch_size <= 1 else [frame] * batch_size
+            for _ in range(runs):
+                self._predict(source, imgsz)
+        self.logger.info(f"Warm-up selesai ({time.time() - start:.1f} detik)")
+    
+    def set_resolution_controller(self, controller):
         """
-        Deteksi manusia dalam frame
+        Aktifkan pemilihan imgsz adaptif per camera
+        
+        Args:
+            controller (ResolutionController): Controller latency budget (None = imgsz tetap)
+        """
+        self.resolution_controller = controller
+        if controller is not None:
+            self.logger.info(f"Adaptive imgsz aktif: {controller.sizes}, "
+                             f"budget {controller.target_latency_ms:.1f} ms/frame")
+    
+    def set_latency_recorder(self, recorder):
+        """
+        Catat latency stage inference (antrian lock, preprocess, inference, postprocess)
+        
+        Args:
+            recorder (LatencyRecorder): Recorder bersama pipeline (None = nonaktif)
+        """
+        self.latency_recorder = recorder
+    
+    def enable_tracking(self, config):
+        """
+        Aktifkan detect-every-N-frames + tracker (satu tracker per camera)
+        
+        Args:
+            config (dict): Override untuk DEFAULT_TRACKER_CONFIG (None/enabled False = nonaktif)
+        """
+        self.tracker_config = config if ObjectTracker.from_config(config) is not None else None
+        self.trackers = {}
+        if self.tracker_config is not None:
+            self.logger.info(f"Tracking aktif: inference setiap "
+                             f"{self.tracker_config.get('detect_interval', 3)} frame")
+    
+    def track(self, frame, roi=None, camera_id=None, detect=None):
+        """
+        Deteksi dengan tracker: inference penuh hanya setiap N frame (atau saat
+        prediksi track sudah tidak pasti), frame lain memakai box prediksi
         
         Args:
             frame: Frame dari video (numpy array)
+            roi (RegionOfInterest): ROI camera (optional)
+            camera_id: ID camera (tracker terpisah per camera)
+            detect: Fungsi detect(frame) alternatif, misalnya lewat scheduler / tiled
             
         Returns:
-            tuple: (annotated_frame, detections, human_count)
-                - annotated_frame: Frame dengan bounding box
-                - detections: List of detection dictionaries
-                - human_count: Jumlah manusia terdeteksi
+            Detections: Hasil deteksi dengan track_ids (tanpa tracker = detect biasa)
+        """
+        if detect is None:
+            detect = lambda f: self.detect(f, roi, camera_id)
+        if self.tracker_config is None:
+            return detect(frame)
+        
+        tracker = self.trackers.get(camera_id)
+        if tracker is None:
+            tracker = self.trackers[camera_id] = ObjectTracker.from_config(self.tracker_config)
+        
+        if tracker.needs_detection():
+            return tracker.update(detect(frame))
+        return tracker.predict()
+    
+    def detect(self, frame, roi=None, camera_id=None):
+        """
+        Deteksi manusia tanpa menyentuh pixel frame (detect-only)
+        
+        Args:
+            frame: Frame dari video (numpy array)
+            roi (RegionOfInterest): Jika diisi, inference hanya pada area crop ROI
+                dan deteksi di luar polygon dibuang
+            camera_id: ID camera untuk adaptive imgsz (optional)
+            
+        Returns:
+            Detections: Hasil deteksi (array N x 6)
         """
         if self.model is None:
             self.logger.error("Model belum di-load!")
-            return frame, [], 0
+            return Detections.empty()
         
         try:
             # Jalankan inference - HANYA DETECT PERSON (class 0)
-            results = self.model(frame, conf=self.conf_threshold, classes=[0], verbose=False)
+            source, offset = self._crop_roi(frame, roi)
+            results = self._predict(source, self._imgsz_for(camera_id))
+            detections = self._postprocess(results[0], frame, roi, offset)
+            self._record_latency(camera_id, results[0], detections, source.shape)
             
-            # Dapatkan hasil deteksi
-            detections = []
-            human_count = 0
+            # Update statistik
+            self.frame_count += 1
+            self.total_detections += len(detections)
             
-            # Process hasil
-            for result in results:
-                boxes = result.boxes
-                
-                for box in boxes:
-                    # Ambil class ID
-                    class_id = int(box.cls[0])
-                    
-                    # Filter hanya class 'person' (class_id = 0)
-                    if class_id == self.person_class_id:
-                        # Dapatkan koordinat bounding box
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        conf = float(box.conf[0])
-                        
-                        detection = {
-                            'bbox': [int(x1), int(y1), int(x2), int(y2)],
-                            'confidence': conf,
-                            'class': 'person'
-                        }
-                        detections.append(detection)
-                        human_count += 1
-            
-            # Gambar bounding boxes
-            annotated_frame = self.draw_detections(frame.copy(), detections)
+            return detections
+            
+        except Exception as e:
+            self.logger.error(f"Error saat deteksi: {str(e)}")
+            return Detections.empty()
+    
+    def detect_batch(self, frames, rois=None, camera_ids=None):
+        """
+        Deteksi manusia pada beberapa frame sekaligus (satu forward pass), detect-only
+        
+        Args:
+            frames: List frame (numpy array), boleh dari kamera berbeda
+            rois: List RegionOfInterest (atau None) per frame (optional)
+            camera_ids: List ID camera per frame untuk adaptive imgsz (optional);
+                frame dengan imgsz berbeda dijalankan sebagai batch terpisah
+            
+        Returns:
+            list: List of Detections, urutannya sama dengan frames
+        """
+        if not frames:
+            return []
+        
+        if self.model is None:
+            self.logger.error("Model belum di-load!")
+            return [Detections.empty() for _ in frames]
+        
+        try:
+            rois = rois or [None] * len(frames)
+            camera_ids = camera_ids or [None] * len(frames)
+            crops = [self._crop_roi(frame, roi) for frame, roi in zip(frames, rois)]
+            
+            # Satu forward pass per imgsz
+            groups = {}
+            for idx, camera_id in enumerate(camera_ids):
+                groups.setdefault(self._imgsz_for(camera_id), []).append(idx)
+            
+            outputs = [None] * len(frames)
+            for imgsz, indices in groups.items():
+                results = self._predict([crops[i][0] for i in indices], imgsz)
+                for i, result in zip(indices, results):
+                    outputs[i] = self._postprocess(result, frames[i], rois[i], crops[i][1])
+                    self._record_latency(camera_ids[i], result, outputs[i], crops[i][0].shape)
+            
+            # Update statistik
+            self.frame_count += len(frames)
+            self.total_detections += sum(len(d) for d in outputs)
+            
+            return outputs
+            
+        except Exception as e:
+            self.logger.error(f"Error saat batch deteksi: {str(e)}")
+            return [Detections.empty() for _ in frames]
+    
+    def detect_tiled(self, frame, layout, roi=None, motion_mask=None, previous=None, camera_id=None):
+        """
+        Tiled (sliced) inference untuk orang kecil / jarak jauh, detect-only
+        
+        Frame dipotong menjadi tile yang overlap, semua tile dijalankan sebagai satu
+        batch, lalu box antar tile di-merge dengan NMS.
+        
+        Args:
+            frame: Frame dari video (numpy array)
+            layout (TileLayout): Layout tile camera
+            roi (RegionOfInterest): ROI camera (tile dihitung di dalam area crop ROI)
+            motion_mask: Mask gerakan dari MotionGate (untuk layout.motion_only)
+            previous (Detections): Hasil sebelumnya, dipertahankan di tile tanpa gerakan
+            camera_id: ID camera untuk adaptive imgsz (optional)
+            
+        Returns:
+            Detections: Hasil deteksi dalam koordinat frame penuh
+        """
+        if self.model is None:
+            self.logger.error("Model belum di-load!")
+            return Detections.empty()
+        
+        try:
+            source, (offset_x, offset_y) = self._crop_roi(frame, roi)
+            tiles = layout.tiles(source.shape)
+            
+            active = np.ones(len(tiles), dtype=bool)
+            if layout.motion_only:
+                active = layout.active_tiles(tiles, motion_mask, source.shape)
+            selected = tiles[active]
+            
+            # Semua tile (+ full frame) dalam satu batch
+            crops = [source[y1:y2, x1:x2] for x1, y1, x2, y2 in selected]
+            if layout.include_full_frame:
+                crops.append(source)
+            results = self._predict(crops, self._imgsz_for(camera_id))
+            
+            parts = [self._extract_detections(result).translate(x1, y1)
+                     for result, (x1, y1, _, _) in zip(results, selected)]
+            if layout.include_full_frame:
+                parts.append(self._extract_detections(results[-1]))
+            
+            # Tile tanpa gerakan: pertahankan deteksi sebelumnya di area tersebut
+            if previous is not None and len(previous) > 0 and not active.all():
+                previous = previous.translate(-offset_x, -offset_y)
+                centers = (previous.xyxy[:, :2] + previous.xyxy[:, 2:]) / 2
+                inside = ((centers[:, None, 0] >= selected[None, :, 0]) &
+                          (centers[:, None, 0] < selected[None, :, 2]) &
+                          (centers[:, None, 1] >= selected[None, :, 1]) &
+                          (centers[:, None, 1] < selected[None, :, 3])).any(axis=1)
+                parts.append(previous.select(~inside))
+            
+            detections = nms(Detections.concatenate(parts), layout.nms_threshold, layout.nms_metric)
+            detections = detections.translate(offset_x, offset_y)
+            if roi is not None:
+                detections = roi.filter(detections, frame.shape)
+            # Setiap tile di-resize ke imgsz: ukuran box relatif terhadap tile, waktu = semua tile
+            self._record_latency(camera_id, results, detections, crops[0].shape)
             
             # Update statistik
             self.frame_count += 1
-            self.total_detections += human_count
+            self.total_detections += len(detections)
             
-            return annotated_frame, detections, human_count
+            return detections
             
         except Exception as e:
-            self.logger.error(f"Error saat deteksi: {str(e)}")
-            return frame, [], 0
+            self.logger.error(f"Error saat tiled deteksi: {str(e)}")
+            return Detections.empty()
+    
+    def detect_humans(self, frame):
+        """
+        Deteksi manusia dalam frame dan gambar hasilnya
+        
+        Args:
+            frame: Frame dari video (numpy array)
+            
+        Returns:
+            tuple: (annotated_frame, detections, human_count)
+                - annotated_frame: Frame dengan bounding box
+                - detections: Detections (array N x 6, iterasi menghasilkan dict)
+                - human_count: Jumlah manusia terdeteksi
+        """
+        detections = self.detect(frame)
+        return self.annotate(frame, detections), detections, len(detections)
+    
+    def detect_humans_batch(self, frames):
+        """
+        Deteksi manusia pada beberapa frame sekaligus dan gambar hasilnya
+        
+        Args:
+            frames: List frame (numpy array), boleh dari kamera berbeda
+            
+        Returns:
+            list: List of tuple (annotated_frame, detections, human_count),
+                  urutannya sama dengan frames
+        """
+        return [(self.annotate(frame, detections), detections, len(detections))
+                for frame, detections in zip(frames, self.detect_batch(frames))]
+    
+    def annotate(self, frame, detections):
+        """
+        Render deteksi ke salinan frame (dipanggil hanya saat ada yang butuh gambar)
+        
+        Args:
+            frame: Frame asli (tidak diubah)
+            detections: Detections hasil detect()
+            
+        Returns:
+            Frame baru dengan bounding boxes
+        """
+        return self.draw_detections(frame.copy(), detections)
+    
+    def _predict(self, source, imgsz=None):
+        """
+        Jalankan model pada satu frame atau list frame
+        
+        Args:
+            source: Frame (numpy array) atau list of frames
+            imgsz: Ukuran input (None = self.imgsz)
+            
+        Returns:
+            list: Hasil inference ultralytics, satu per frame
+        """
+        wait_start = time.time()
+        with self._model_lock:
+            # Satu frame = dipanggil langsung dari thread camera, tunggu lock = antrian inference
+            # (batch dari scheduler / tile mencatat antriannya sendiri)
+            if self.latency_recorder is not None and not isinstance(source, list):
+                self.latency_recorder.record_since('queue_wait', wait_start)
+            return self.model(source, conf=self.conf_threshold, imgsz=imgsz or self.imgsz,
+                              classes=[self.person_class_id], verbose=False)
+    
+    def _imgsz_for(self, camera_id):
+        """imgsz untuk camera (dari controller jika aktif)"""
+        if self.resolution_controller is None or camera_id is None:
+            return self.imgsz
+        return self.resolution_controller.imgsz_for(camera_id)
+    
+    def _record_latency(self, camera_id, results, detections, shape):
+        """
+        Laporkan waktu inference (per frame, tanpa waktu tunggu lock) ke controller / recorder
+
+        Args:
+            results: Hasil ultralytics untuk frame ini, atau list hasil per tile
+                (waktu inference frame = jumlah semua tile)
+        """
+        if not isinstance(results, list):
+            results = [results]
+        if self.latency_recorder is not None:
+            for result in results:
+                for stage in ('preprocess', 'inference', 'postprocess'):
+                    self.latency_recorder.record(stage, result.speed.get(stage))
+        if self.resolution_controller is None or camera_id is None:
+            return
+        inference_ms = sum(v for result in results for v in result.speed.values() if v is not None)
+        self.resolution_controller.record(camera_id, inference_ms, detections, shape)
+    
+    def _crop_roi(self, frame, roi):
+        """
+        Crop frame ke area ROI (view, tanpa copy)
+        
+        Returns:
+            tuple: (source untuk inference, (offset_x, offset_y))
+        """
+        if roi is None:
+            return frame, (0, 0)
+        return roi.crop(frame)
+    
+    def _postprocess(self, result, frame, roi, offset):
+        """
+        Ambil deteksi, kembalikan ke koordinat frame penuh, lalu filter ROI
+        
+        Returns:
+            Detections
+        """
+        detections = self._extract_detections(result).translate(*offset)
+        if roi is not None:
+            detections = roi.filter(detections, frame.shape)
+        return detections
+    
+    def _extract_detections(self, result):
+        """
+        Ambil deteksi person dari satu hasil inference
+        (satu kali transfer tensor ke NumPy, tanpa loop per box)
+        
+        Args:
+            result: Hasil inference ultralytics untuk satu frame
+            
+        Returns:
+            Detections: Deteksi class 'person' saja
+        """
+        return Detections.from_boxes(result.boxes, class_id=self.person_class_id)
     
     def draw_detections(self, frame, detections):
         """
@@ -118,24 +448,27 @@ class HumanDetector:
         
         Args:
             frame: Frame video
-            detections: List deteksi
+            detections: Detections (atau list deteksi format dict)
             
         Returns:
             Frame dengan bounding boxes
         """
-        for det in detections:
-            x1, y1, x2, y2 = det['bbox']
-            conf = det['confidence']
-            
-            # Warna untuk bounding box (BGR format) - Hijau
-            color = (0, 255, 0)
-            thickness = 2
-            
+        detections = Detections.from_list(detections)
+        
+        # Warna untuk bounding box (BGR format) - Hijau
+        color = (0, 255, 0)
+        thickness = 2
+        
+        boxes = detections.xyxy.astype(np.int32).tolist()
+        confidences = detections.confidence.tolist()
+        track_ids = detections.track_ids.tolist() if detections.track_ids is not None else [None] * len(boxes)
+        
+        for (x1, y1, x2, y2), conf, track_id in zip(boxes, confidences, track_ids):
             # Gambar rectangle
             cv2.rectangle(frame, (x1, y1), (x2, y2), color, thickness)
             
             # Tambahkan label
-            label = f"Person {conf:.2f}"
+            label = f"Person {conf:.2f}" if track_id is None else f"#{track_id} {conf:.2f}"
             label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)
             
             # Background untuk text
@@ -154,22 +487,19 @@ class HumanDetector:
     
     def add_info_overlay(self, frame, human_count, fps=0):
         """
-        Tambahkan overlay informasi pada frame
+        Tambahkan overlay informasi pada frame (langsung di frame, tanpa copy)
         
         Args:
-            frame: Frame video
+            frame: Frame video (sudah hasil annotate, akan dimodifikasi)
             human_count: Jumlah manusia terdeteksi
             fps: Frame per second
             
         Returns:
             Frame dengan overlay
         """
-        height, width = frame.shape[:2]
-        
-        # Background semi-transparan untuk info
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (10, 10), (300, 120), (0, 0, 0), -1)
-        frame = cv2.addWeighted(frame, 0.7, overlay, 0.3, 0)
+        # Background semi-transparan untuk info - hanya area panel yang digelapkan
+        panel = frame[10:121, 10:301]
+        cv2.addWeighted(panel, 0.7, panel, 0, 0, dst=panel)
         
         # Informasi
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -197,11 +527,23 @@ class HumanDetector:
         """
         avg_detections = self.total_detections / self.frame_count if self.frame_count > 0 else 0
         
-        return {
+        stats = {
             'total_frames': self.frame_count,
             'total_detections': self.total_detections,
-            'average_detections_per_frame': avg_detections
+            'average_detections_per_frame': avg_detections,
+            'imgsz': self.imgsz
         }
+        
+        # imgsz yang dipilih controller per camera
+        if self.resolution_controller is not None:
+            stats['camera_imgsz'] = self.resolution_controller.snapshot()
+        
+        # Track aktif dan rasio frame yang cukup diprediksi, per camera
+        if self.tracker_config is not None:
+            stats['tracking'] = {camera_id: tracker.get_stats()
+                                 for camera_id, tracker in list(self.trackers.items())}
+        
+        return stats
     
     def reset_statistics(self):
         """
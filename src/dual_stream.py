@@ -0,0 +1,211 @@
+"""
+Dual Stream Module
+Deteksi di substream (murah), crop orang dari frame mainstream resolusi penuh
+yang waktunya paling dekat - hanya saat ada deteksi (untuk snapshot / event)
+"""
+
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from camera_stream import HikvisionCamera
+
+try:
+    import av
+except ImportError:  # PyAV optional, tanpa PyAV mainstream di-decode dengan OpenCV
+    av = None
+
+# Default, bisa di-override per camera lewat 'dual_stream'
+DEFAULT_DUAL_STREAM_CONFIG = {
+    'decoder': 'pyav',          # 'pyav' agar mainstream bisa decode keyframe saja saat idle (fallback 'opencv')
+    'decoder_options': None,
+    'history': 12,              # Frame mainstream terakhir yang disimpan (~0.5 detik @ 25 FPS)
+    'max_time_delta': 0.5,      # Detik - selisih waktu maksimal frame sub vs main
+    'idle_mode': 'keyframes',   # Decode mainstream saat tidak ada orang ('all' = selalu semua frame)
+    'idle_after': 5.0,          # Detik tanpa deteksi sebelum mainstream kembali ke idle_mode
+    'crop_padding': 0.1,        # Padding crop (rasio ukuran box)
+    'interval': 1.0,            # Detik - ambil evidence maksimal sekali per interval
+    'save_dir': None,           # Simpan crop ke <save_dir>/<camera>/ (None = hanya di memory / API)
+}
+
+
+def mainstream_url(substream_url):
+    """
+    URL mainstream Hikvision dari URL substream (.../Channels/102 -> .../Channels/101)
+
+    Returns:
+        str atau None jika URL bukan format Streaming/Channels Hikvision
+    """
+    prefix, sep, channel = str(substream_url).rpartition('/Streaming/Channels/')
+    if not sep or not channel.isdigit():
+        return None
+    return f"{prefix}{sep}{int(channel) // 100 * 100 + 1}"
+
+
+class MainstreamEvidence:
+    """
+    Stream kedua (mainstream) untuk evidence resolusi tinggi
+
+    Mainstream di-decode di thread sendiri ke history pendek. Tanpa orang,
+    hanya keyframe yang di-decode (decoder 'pyav'); begitu ada deteksi di
+    substream semua frame di-decode lagi. Inference tidak pernah menyentuh
+    mainstream: box substream di-scale ke resolusi mainstream lalu di-crop.
+    """
+
+    def __init__(self, url, camera_name, decoder='pyav', decoder_options=None, history=12,
+                 max_time_delta=0.5, idle_mode='keyframes', idle_after=5.0, crop_padding=0.1,
+                 interval=1.0, save_dir=None):
+        """
+        Args:
+            url (str): RTSP URL mainstream (channel 101)
+            camera_name (str): Nama camera (mainstream = '<nama> (main)')
+            decoder (str): 'pyav' atau 'opencv'
+            decoder_options (dict): Override DEFAULT_PYAV_OPTIONS
+            history (int): Jumlah frame mainstream yang disimpan
+            max_time_delta (float): Selisih waktu maksimal (detik) frame sub vs main
+            idle_mode (str): Mode decode mainstream saat idle
+            idle_after (float): Detik tanpa deteksi sebelum idle_mode
+            crop_padding (float): Padding crop (rasio ukuran box)
+            interval (float): Jarak minimal antar evidence (detik)
+            save_dir (str): Directory untuk crop JPEG (None = tidak disimpan)
+        """
+        self.logger = logging.getLogger(__name__)
+        if decoder == 'pyav' and av is None:
+            self.logger.warning(f"{camera_name}: PyAV belum ter-install, mainstream di-decode dengan OpenCV "
+                                f"(semua frame, tanpa idle_mode)")
+            decoder = 'opencv'
+        self.camera = HikvisionCamera(url, f"{camera_name} (main)", threaded=True, decoder=decoder,
+                                      decoder_options=decoder_options, history=history)
+        self.max_time_delta = max_time_delta
+        self.idle_mode = idle_mode
+        self.idle_after = idle_after
+        self.crop_padding = crop_padding
+        self.interval = interval
+        self.save_dir = Path(save_dir) / camera_name if save_dir else None
+
+        self.last_activity = 0.0
+        self.last_evidence_time = 0.0
+        self.fetched = 0
+        self.missed = 0  # Tidak ada frame mainstream dalam max_time_delta
+        self.total_time_delta = 0.0
+
+    @classmethod
+    def from_config(cls, url, camera_name, config):
+        """
+        Buat MainstreamEvidence dari konfigurasi camera
+
+        Args:
+            url (str): RTSP URL mainstream
+            camera_name (str): Nama camera
+            config: dict override DEFAULT_DUAL_STREAM_CONFIG (True = default)
+
+        Returns:
+            MainstreamEvidence atau None jika url / config kosong
+        """
+        if not url or not config:
+            return None
+        options = dict(DEFAULT_DUAL_STREAM_CONFIG)
+        if isinstance(config, dict):
+            options.update(config)
+        return cls(url, camera_name, **options)
+
+    def update_activity(self, human_count):
+        """Decode semua frame mainstream selama ada orang, idle_mode setelah idle_after detik"""
+        now = time.time()
+        if human_count > 0:
+            self.last_activity = now
+            self.camera.set_decode_mode('all')
+        elif now - self.last_activity >= self.idle_after:
+            self.camera.set_decode_mode(self.idle_mode)
+
+    def due(self):
+        """True jika interval sejak evidence terakhir sudah lewat"""
+        return time.time() - self.last_evidence_time >= self.interval
+
+    def extract(self, detections, frame_shape, timestamp):
+        """
+        Crop orang dari frame mainstream yang paling dekat dengan frame substream
+
+        Args:
+            detections (Detections): Deteksi di frame substream
+            frame_shape: Shape frame substream (koordinat detections)
+            timestamp (float): frame_timestamp frame substream
+
+        Returns:
+            dict: {'frame': frame mainstream, 'detections': Detections resolusi mainstream,
+            'crops': list crop BGR, 'timestamp': waktu frame mainstream,
+            'time_delta': selisih detik} atau None jika tidak ada frame yang cukup dekat
+        """
+        self.last_evidence_time = time.time()
+        frame, frame_timestamp = self.camera.frame_near(timestamp)
+        if frame is None or abs(frame_timestamp - timestamp) > self.max_time_delta:
+            self.missed += 1
+            return None
+
+        height, width = frame.shape[:2]
+        boxes = detections.scale(width / frame_shape[1], height / frame_shape[0])
+
+        # Padding + clip, crop di-copy agar frame mainstream bisa dilepas
+        xyxy = boxes.xyxy
+        pad = (xyxy[:, 2:] - xyxy[:, :2]) * self.crop_padding
+        regions = np.concatenate([xyxy[:, :2] - pad, xyxy[:, 2:] + pad], axis=1)
+        regions = np.clip(np.round(regions), 0, [width, height, width, height]).astype(int)
+        crops = [frame[y1:y2, x1:x2].copy() for x1, y1, x2, y2 in regions if x2 > x1 and y2 > y1]
+
+        time_delta = frame_timestamp - timestamp
+        self.fetched += 1
+        self.total_time_delta += abs(time_delta)
+        return {
+            'frame': frame,
+            'detections': boxes,
+            'crops': crops,
+            'timestamp': frame_timestamp,
+            'time_delta': time_delta,
+        }
+
+    def save(self, evidence, writer=None):
+        """
+        Simpan crop evidence sebagai JPEG (jika save_dir diisi)
+
+        Args:
+            evidence (dict): Hasil extract()
+            writer (SnapshotWriter): Jika diisi, encode + tulis di background (tidak blocking)
+
+        Returns:
+            list: Path file yang disimpan (atau diantrikan)
+        """
+        if self.save_dir is None:
+            return []
+        if writer is not None:
+            return [writer.submit(self.camera.camera_name, crop, prefix=f"evidence_{index}",
+                                  timestamp=evidence['timestamp'], force=True, directory=self.save_dir,
+                                  quality=95, copy=False)
+                    for index, crop in enumerate(evidence['crops'])]
+
+        self.save_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.fromtimestamp(evidence['timestamp']).strftime("%Y%m%d_%H%M%S_%f")
+        paths = []
+        for index, crop in enumerate(evidence['crops']):
+            path = self.save_dir / f"{stamp}_{index}.jpg"
+            if cv2.imwrite(str(path), crop, [cv2.IMWRITE_JPEG_QUALITY, 95]):
+                paths.append(str(path))
+        return paths
+
+    def get_stats(self):
+        """
+        Statistik evidence
+
+        Returns:
+            dict: fetched, missed, rata-rata |time_delta| (detik), decode_mode mainstream
+        """
+        return {
+            'fetched': self.fetched,
+            'missed': self.missed,
+            'average_time_delta': self.total_time_delta / self.fetched if self.fetched else None,
+            'decode_mode': self.camera.decode_mode,
+            'connected': self.camera.is_connected,
+        }
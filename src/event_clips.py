@@ -0,0 +1,334 @@
+"""
+Event Clips Module
+Ring buffer packet H.264 terkompresi per camera; saat deteksi dimulai, klip
+pre-roll + post-roll di-remux ke MP4 tanpa decode / encode, box deteksi
+disimpan di file JSON pendamping
+"""
+
+import io
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import av
+except ImportError:  # PyAV optional, klip hanya untuk decoder='pyav'
+    av = None
+
+# Default, bisa di-override per camera lewat 'clips'
+DEFAULT_CLIP_CONFIG = {
+    'buffer_seconds': 10.0,   # Packet terkompresi yang disimpan (pre-roll maksimal)
+    'pre_roll': 5.0,          # Detik sebelum deteksi pertama
+    'post_roll': 5.0,         # Klip selesai setelah N detik tanpa deteksi
+    'max_duration': 60.0,     # Klip dipotong setelah N detik walau deteksi terus ada
+    'output_dir': 'outputs/clips',  # <output_dir>/<camera>/<waktu>.mp4 + .json
+}
+
+
+class PacketRingBuffer:
+    """
+    Packet terkompresi N detik terakhir, disimpan per GOP sehingga isi buffer
+    selalu dimulai dari keyframe (bisa di-remux / di-decode tanpa frame rusak)
+    """
+
+    def __init__(self, seconds=10.0):
+        """
+        Args:
+            seconds (float): Durasi minimal yang disimpan (dibulatkan ke atas per GOP)
+        """
+        self.seconds = seconds
+        self._gops = deque()  # [[(wallclock, data, pts, dts, is_keyframe), ...], ...]
+        self.bytes = 0
+
+    def push(self, entry):
+        """Tambah packet; packet sebelum keyframe pertama dibuang (tidak bisa di-decode)"""
+        wallclock, data, _, _, is_keyframe = entry
+        if is_keyframe:
+            self._gops.append([entry])
+        elif self._gops:
+            self._gops[-1].append(entry)
+        else:
+            return
+        self.bytes += len(data)
+
+        # Buang GOP paling lama selama GOP berikutnya masih menutupi window
+        cutoff = wallclock - self.seconds
+        while len(self._gops) > 1 and self._gops[1][0][0] <= cutoff:
+            self.bytes -= sum(len(e[1]) for e in self._gops.popleft())
+
+    def since(self, start):
+        """
+        Packet mulai dari keyframe terakhir sebelum waktu start
+
+        Returns:
+            list: Entry packet (kosong jika belum ada keyframe)
+        """
+        gops = list(self._gops)
+        first = 0
+        for index, gop in enumerate(gops):
+            if gop[0][0] <= start:
+                first = index
+        return [entry for gop in gops[first:] for entry in gop]
+
+    def clear(self):
+        self._gops.clear()
+        self.bytes = 0
+
+    @property
+    def duration(self):
+        """Detik yang sedang tersimpan"""
+        if not self._gops:
+            return 0.0
+        return self._gops[-1][-1][0] - self._gops[0][0][0]
+
+
+class EventClipRecorder:
+    """
+    Perekam klip event untuk satu camera (decoder 'pyav')
+
+    Packet hasil demux masuk ring buffer di thread decode (hanya copy bytes
+    terkompresi, tanpa decode tambahan - juga saat camera idle decode keyframe
+    saja). update() dipanggil thread processing per frame: deteksi pertama
+    membuka klip dari ring buffer (pre-roll), packet berikutnya ditambahkan
+    sampai post_roll detik tanpa deteksi, lalu klip di-remux ke MP4 di thread
+    terpisah.
+    """
+
+    def __init__(self, camera_name, buffer_seconds=10.0, pre_roll=5.0, post_roll=5.0, max_duration=60.0,
+                 output_dir='outputs/clips'):
+        """
+        Args:
+            camera_name (str): Nama camera (sub-directory output)
+            buffer_seconds (float): Durasi ring buffer (>= pre_roll)
+            pre_roll (float): Detik sebelum deteksi pertama
+            post_roll (float): Detik tanpa deteksi sebelum klip ditutup
+            max_duration (float): Durasi maksimal satu klip
+            output_dir (str): Directory utama klip
+        """
+        if av is None:
+            raise ImportError("PyAV belum ter-install: pip install av")
+
+        self.camera_name = camera_name
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.max_duration = max_duration
+        self.output_dir = Path(output_dir) / re.sub(r'[^\w.-]+', '_', camera_name)
+        self.logger = logging.getLogger(__name__)
+
+        self.buffer = PacketRingBuffer(max(buffer_seconds, pre_roll))
+        self._lock = threading.Lock()
+        self._source = None      # Stream input yang sedang di-buffer
+        self._template = None    # (container dummy, stream, nama codec) salinan parameter codec stream input
+        self._time_base = None
+        self._active = None      # Klip yang sedang direkam
+        self._writers = []
+
+        # Statistik
+        self.clips_written = 0
+        self.clips_failed = 0
+        self.last_clip = None
+
+    @classmethod
+    def from_config(cls, camera_name, config):
+        """
+        Buat recorder dari konfigurasi camera
+
+        Args:
+            camera_name (str): Nama camera
+            config: dict override DEFAULT_CLIP_CONFIG (True = default)
+
+        Returns:
+            EventClipRecorder atau None jika config kosong
+        """
+        if not config:
+            return None
+        options = dict(DEFAULT_CLIP_CONFIG)
+        if isinstance(config, dict):
+            options.update(config)
+        return cls(camera_name, **options)
+
+    def attach(self, camera):
+        """
+        Pasang recorder ke HikvisionCamera (packet sink)
+
+        Returns:
+            bool: False jika decoder camera tidak mendukung (bukan 'pyav')
+        """
+        if not camera.set_packet_sink(self.on_packet):
+            self.logger.warning(f"{self.camera_name}: klip event butuh decoder 'pyav', dinonaktifkan")
+            return False
+        return True
+
+    def on_packet(self, packet):
+        """Packet sink (thread decode): simpan bytes terkompresi ke ring buffer"""
+        entry = (time.time(), bytes(packet), packet.pts, packet.dts, packet.is_keyframe)
+        with self._lock:
+            if packet.stream is not self._source:
+                self._new_source(packet)
+            self.buffer.push(entry)
+            if self._active is not None:
+                self._active['packets'].append(entry)
+
+    def _new_source(self, packet):
+        """Stream baru (connect / reconnect): timestamp tidak bersambung, buffer dimulai ulang"""
+        if self._active is not None:
+            self._finish(self._active['last_timestamp'])
+
+        # Parameter codec disalin selagi container input masih hidup: writer tidak
+        # pernah menyentuh stream input yang bisa ditutup saat reconnect
+        holder = av.open(io.BytesIO(), 'w', format='mp4')
+        self._template = (holder, holder.add_stream_from_template(packet.stream),
+                          packet.stream.codec_context.name)
+        self._source = packet.stream
+        self._time_base = packet.time_base
+        self.buffer.clear()
+
+    def update(self, detections, timestamp, pts=None, scale=(1.0, 1.0)):
+        """
+        Catat hasil deteksi satu frame (thread processing)
+
+        Args:
+            detections (Detections): Deteksi frame ini
+            timestamp (float): frame_timestamp camera (waktu decode)
+            pts (float): frame_pts camera (detik), untuk offset box di klip
+            scale: camera.output_scale - box di JSON selalu di resolusi stream (klip)
+        """
+        with self._lock:
+            if self._active is None:
+                if len(detections) == 0 or self._template is None:
+                    return
+                self._active = {
+                    'trigger': timestamp,
+                    'last_detection': timestamp,
+                    'last_timestamp': timestamp,
+                    'packets': self.buffer.since(timestamp - self.pre_roll),
+                    'template': self._template,
+                    'time_base': self._time_base,
+                    'detections': [],
+                }
+
+            clip = self._active
+            clip['last_timestamp'] = timestamp
+            if len(detections):
+                if tuple(scale) != (1.0, 1.0):
+                    detections = detections.scale(*scale)
+                clip['last_detection'] = timestamp
+                clip['detections'].append({'timestamp': timestamp, 'pts': pts,
+                                           'detections': detections.to_list()})
+
+            if (timestamp - clip['last_detection'] >= self.post_roll
+                    or timestamp - clip['trigger'] >= self.max_duration):
+                self._finish(timestamp)
+
+    def _finish(self, timestamp):
+        """Tutup klip aktif dan remux di background (harus dipanggil dengan _lock)"""
+        clip, self._active = self._active, None
+        clip['end'] = timestamp
+        writer = threading.Thread(target=self._write, args=(clip,), daemon=True,
+                                  name=f"Clip-{self.camera_name}")
+        self._writers = [w for w in self._writers if w.is_alive()] + [writer]
+        writer.start()
+
+    def _write(self, clip):
+        """Remux packet klip ke MP4 + JSON pendamping (thread writer)"""
+        packets = clip['packets']
+        while packets and not packets[0][4]:
+            packets = packets[1:]  # Klip harus dimulai dari keyframe
+        if not packets:
+            self.logger.warning(f"{self.camera_name}: klip dibuang, belum ada keyframe di buffer")
+            self.clips_failed += 1
+            return
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = datetime.fromtimestamp(clip['trigger']).strftime("%Y%m%d_%H%M%S_%f")
+        video_path = self.output_dir / f"{stem}.mp4"
+        time_base = clip['time_base']
+        first = packets[0]
+        base = first[3] if first[3] is not None else first[2]
+
+        try:
+            output = av.open(str(video_path), 'w')
+            try:
+                stream = output.add_stream_from_template(clip['template'][1])
+                for _, data, pts, dts, is_keyframe in packets:
+                    packet = av.Packet(data)
+                    packet.pts = pts - base if pts is not None else None
+                    packet.dts = dts - base if dts is not None else None
+                    packet.time_base = time_base
+                    packet.is_keyframe = is_keyframe
+                    packet.stream = stream
+                    output.mux(packet)
+            finally:
+                output.close()
+        except (av.error.FFmpegError, OSError, ValueError) as e:
+            self.logger.error(f"{self.camera_name}: gagal menulis klip {video_path}: {str(e)}")
+            self.clips_failed += 1
+            return
+
+        # Offset box di klip: dari PTS frame jika ada, selain itu dari waktu decode
+        start_pts = first[2] * time_base if first[2] is not None else None
+        start_time = first[0]
+        detections = []
+        for record in clip['detections']:
+            if record['pts'] is not None and start_pts is not None:
+                offset = record['pts'] - float(start_pts)
+            else:
+                offset = record['timestamp'] - start_time
+            detections.append({
+                'offset': round(offset, 3),
+                'timestamp': datetime.fromtimestamp(record['timestamp']).isoformat(),
+                'detections': record['detections'],
+            })
+
+        _, template, codec_name = clip['template']
+        sidecar = {
+            'camera': self.camera_name,
+            'video': video_path.name,
+            'codec': codec_name,
+            'resolution': [template.codec_context.width, template.codec_context.height],
+            'start_time': datetime.fromtimestamp(start_time).isoformat(),
+            'trigger_time': datetime.fromtimestamp(clip['trigger']).isoformat(),
+            'end_time': datetime.fromtimestamp(packets[-1][0]).isoformat(),
+            'pre_roll': round(clip['trigger'] - start_time, 3),
+            'post_roll': round(packets[-1][0] - clip['last_detection'], 3),
+            'packets': len(packets),
+            'bytes': sum(len(p[1]) for p in packets),
+            'detections': detections,
+        }
+        video_path.with_suffix('.json').write_text(json.dumps(sidecar, indent=2))
+
+        self.clips_written += 1
+        self.last_clip = str(video_path)
+        self.logger.info(f"{self.camera_name}: klip disimpan {video_path} "
+                         f"({len(packets)} packets, {len(detections)} frame dengan deteksi)")
+
+    def close(self, timeout=10.0):
+        """Tutup klip aktif (post-roll dipotong) dan tunggu writer selesai"""
+        with self._lock:
+            if self._active is not None:
+                self._finish(self._active['last_timestamp'])
+            writers = list(self._writers)
+        for writer in writers:
+            writer.join(timeout=timeout)
+
+    def get_stats(self):
+        """
+        Statistik recorder
+
+        Returns:
+            dict: buffer (detik, bytes), recording, clips_written, clips_failed, last_clip
+        """
+        with self._lock:
+            return {
+                'buffer_seconds': self.buffer.duration,
+                'buffer_bytes': self.buffer.bytes,
+                'recording': self._active is not None,
+                'clips_written': self.clips_written,
+                'clips_failed': self.clips_failed,
+                'last_clip': self.last_clip,
+            }
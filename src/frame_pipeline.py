@@ -0,0 +1,287 @@
+"""
+Frame Pipeline Module
+Pipeline bertahap (capture -> inference -> render -> write) dengan thread per
+stage dan antrian terbatas drop-oldest, sehingga decode, inference dan encode
+berjalan bersamaan dan stage lambat tidak menahan deteksi
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+from latency_trace import LatencyHistogram
+
+# Default, bisa di-override dari argumen command line
+DEFAULT_PIPELINE_CONFIG = {
+    'inference_queue': 1,   # Frame menunggu inference (1 = inference selalu di frame terbaru)
+    'render_queue': 2,      # Hasil deteksi menunggu render / display
+    'write_queue': 32,      # Frame ter-annotate menunggu video writer
+}
+
+
+class StageQueue:
+    """
+    Antrian terbatas antar stage (thread-safe)
+
+    Penuh -> item terlama dibuang (drop-oldest), atau put() menunggu jika
+    block=True (backpressure, misalnya file video yang semua frame-nya harus
+    diproses). Waktu tunggu setiap item di antrian dicatat.
+    """
+
+    def __init__(self, name, maxsize=1, block=False):
+        """
+        Args:
+            name (str): Nama antrian (statistik)
+            maxsize (int): Maksimal item di antrian
+            block (bool): put() menunggu ruang alih-alih membuang item terlama
+        """
+        self.name = name
+        self.maxsize = max(1, int(maxsize))
+        self.block = block
+        self.closed = False
+        self._items = deque()  # (waktu masuk, item)
+        self._condition = threading.Condition()
+        self.wait = LatencyHistogram()
+
+        # Statistik
+        self.put_count = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def put(self, item):
+        """
+        Masukkan item (drop-oldest jika penuh, atau tunggu jika block=True)
+
+        Returns:
+            bool: False jika antrian sudah ditutup (item dibuang)
+        """
+        with self._condition:
+            if self.block:
+                self._condition.wait_for(lambda: self.closed or len(self._items) < self.maxsize)
+            if self.closed:
+                return False
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append((time.time(), item))
+            self.put_count += 1
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._condition.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """
+        Ambil item terlama
+
+        Returns:
+            Item, atau None jika timeout / antrian ditutup dan kosong
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._items or self.closed, timeout):
+                return None
+            if not self._items:
+                return None
+            queued_at, item = self._items.popleft()
+            self._condition.notify_all()
+        self.wait.record((time.time() - queued_at) * 1000)
+        return item
+
+    def close(self):
+        """Tutup antrian: put() berikutnya dibuang, get() mengembalikan sisa item lalu None"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: depth, maxsize, max_depth, put, dropped, wait_p50_ms, wait_p99_ms
+        """
+        return {
+            'depth': len(self._items),
+            'maxsize': self.maxsize,
+            'max_depth': self.max_depth,
+            'put': self.put_count,
+            'dropped': self.dropped,
+            'wait_p50_ms': self.wait.percentile(50),
+            'wait_p99_ms': self.wait.percentile(99),
+        }
+
+
+class PipelineStage:
+    """
+    Satu stage pipeline: ambil item dari antrian input, jalankan fungsi,
+    hasil (bukan None) ke antrian output
+
+    Stage tanpa input adalah sumber (fungsi dipanggil terus tanpa argumen,
+    waktu prosesnya termasuk menunggu frame dari camera). Stage berjalan di
+    thread sendiri, atau dipanggil dari thread pemanggil lewat step() jika
+    threaded=False (misalnya render + cv2.imshow yang harus di main thread).
+    """
+
+    def __init__(self, pipeline, name, func, input_queue=None, output_queue=None, drain=False, threaded=True):
+        """
+        Args:
+            pipeline (FramePipeline): Pipeline pemilik (stop event)
+            name (str): Nama stage
+            func: Callable(item) -> hasil atau None (stage sumber: Callable() -> item atau None)
+            input_queue (StageQueue): Antrian input (None = stage sumber)
+            output_queue (StageQueue): Antrian output (None = stage akhir)
+            drain (bool): Saat stop, proses sisa antrian input dulu (misalnya video writer)
+            threaded (bool): False = tidak punya thread, step() dipanggil pemanggil
+        """
+        self.pipeline = pipeline
+        self.name = name
+        self.func = func
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.drain = drain
+        self.threaded = threaded
+        self.logger = logging.getLogger(__name__)
+        self._thread = None
+
+        # Statistik
+        self.timing = LatencyHistogram()
+        self.items = 0
+        self.busy_time = 0.0
+        self.started_at = time.time()
+
+    def step(self, timeout=0.1):
+        """
+        Proses satu item
+
+        Returns:
+            Hasil fungsi, atau None jika tidak ada item dalam timeout
+        """
+        if self.input_queue is None:
+            start = time.time()
+            result = self.func()
+            if result is None:
+                return None  # Gagal baca / reconnect, tidak dihitung sebagai item
+        else:
+            item = self.input_queue.get(timeout)
+            if item is None:
+                return None
+            start = time.time()
+            result = self.func(item)
+        elapsed = time.time() - start
+        self.timing.record(elapsed * 1000)
+        self.busy_time += elapsed
+        self.items += 1
+
+        if result is not None and self.output_queue is not None:
+            self.output_queue.put(result)
+        return result
+
+    def _run(self):
+        """Loop thread stage sampai pipeline berhenti (stage drain: sampai antrian input habis)"""
+        try:
+            while True:
+                if self.pipeline.stopping:
+                    if not self.drain or self.input_queue is None:
+                        break
+                    if self.input_queue.closed and not len(self.input_queue):
+                        break
+                self.step()
+        except Exception as e:
+            self.logger.error(f"Stage {self.name} error: {str(e)}", exc_info=True)
+            self.pipeline.stop()
+
+    def start(self):
+        """Start thread stage (stage threaded=False hanya reset waktu mulai statistik)"""
+        self.started_at = time.time()
+        if self.threaded:
+            self._thread = threading.Thread(target=self._run, daemon=True, name=f"Pipeline-{self.name}")
+            self._thread.start()
+
+    def join(self, timeout=None):
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: items, fps, p50_ms, p99_ms (waktu proses per item), utilization (0-1)
+        """
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        return {
+            'items': self.items,
+            'fps': self.items / elapsed,
+            'p50_ms': self.timing.percentile(50),
+            'p99_ms': self.timing.percentile(99),
+            'utilization': min(1.0, self.busy_time / elapsed),
+        }
+
+
+class FramePipeline:
+    """
+    Kumpulan stage + antrian dengan satu stop event
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.queues = []
+        self._stop_event = threading.Event()
+        self.logger = logging.getLogger(__name__)
+
+    def add_queue(self, name, maxsize=1, block=False):
+        """Buat antrian antar stage (lihat StageQueue)"""
+        queue = StageQueue(name, maxsize, block)
+        self.queues.append(queue)
+        return queue
+
+    def add_stage(self, name, func, input_queue=None, output_queue=None, drain=False, threaded=True):
+        """Buat stage (lihat PipelineStage), thread berjalan setelah start()"""
+        stage = PipelineStage(self, name, func, input_queue, output_queue, drain, threaded)
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        """Start semua stage"""
+        for stage in self.stages:
+            stage.start()
+
+    @property
+    def stopping(self):
+        return self._stop_event.is_set()
+
+    def wait(self, timeout=None):
+        """Tunggu sampai pipeline berhenti"""
+        return self._stop_event.wait(timeout)
+
+    def stop(self, timeout=5.0):
+        """
+        Hentikan semua stage: antrian ditutup (put / get yang menunggu langsung
+        kembali), stage drain memproses sisa antrian, lalu thread di-join
+        """
+        self._stop_event.set()
+        for queue in self.queues:
+            queue.close()
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: {'stages': {nama: PipelineStage.get_stats()}, 'queues': {nama: StageQueue.get_stats()}}
+        """
+        return {
+            'stages': {stage.name: stage.get_stats() for stage in self.stages},
+            'queues': {queue.name: queue.get_stats() for queue in self.queues},
+        }
+
+    def format_stats(self):
+        """Ringkasan satu baris: FPS + waktu proses per stage, kedalaman + drop per antrian"""
+        stats = self.get_stats()
+        parts = []
+        for name, stage in stats['stages'].items():
+            parts.append(f"{name} {stage['fps']:.1f}/s {stage['p50_ms'] or 0:.1f}ms "
+                         f"({stage['utilization']:.0%} busy)")
+        for name, queue in stats['queues'].items():
+            parts.append(f"{name} queue {queue['depth']}/{queue['maxsize']} "
+                         f"(wait {queue['wait_p50_ms'] or 0:.1f}ms, {queue['dropped']} dropped)")
+        return " | ".join(parts)
@@ -0,0 +1,499 @@
+"""
+Inference Pool Module
+Pool proses inference (satu model per proses) dengan transport frame lewat
+shared memory, sehingga throughput tidak dibatasi GIL / satu instance model
+"""
+
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+from queue import Queue, Empty
+
+import numpy as np
+
+from detections import Detections
+from inference_scheduler import PendingDetection
+
+# Ukuran frame maksimal per slot (tinggi, lebar, channel) - cukup untuk main stream 1080p
+DEFAULT_MAX_FRAME_SHAPE = (1080, 1920, 3)
+
+# Detik maksimal menunggu slot / hasil worker sebelum inference di proses utama
+DEFAULT_TASK_TIMEOUT = 10.0
+
+
+def _pin_worker(worker_index, threads, pin_cores):
+    """Batasi thread BLAS/torch dan (opsional) pin proses ke blok core sendiri"""
+    for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[name] = str(threads)
+
+    if pin_cores and hasattr(os, 'sched_setaffinity'):
+        cores = sorted(os.sched_getaffinity(0))
+        first = worker_index * threads
+        if first + threads <= len(cores):
+            os.sched_setaffinity(0, cores[first:first + threads])
+
+
+def _infer_slots(detector, shm, slot_bytes, tasks, imgsz):
+    """
+    Inference satu batch frame langsung dari slot shared memory (tanpa copy)
+
+    Semua view ke shared memory (termasuk yang disimpan di Results ultralytics)
+    hanya hidup di dalam fungsi ini, jadi slot aman dipakai ulang setelah return.
+
+    Returns:
+        list: [(request_id, data N x 6, inference_ms), ...]
+    """
+    frames = [np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+              for _, slot, shape, _ in tasks]
+    results = detector._predict(frames, imgsz)
+
+    outputs = []
+    for (request_id, _, _, _), result in zip(tasks, results):
+        detections = detector._extract_detections(result)
+        inference_ms = sum(v for v in result.speed.values() if v is not None)
+        outputs.append((request_id, detections.data, inference_ms))
+    return outputs
+
+
+def _worker_main(worker_index, options, shm_name, slot_bytes, task_queue, result_queue, claims):
+    """
+    Loop proses worker: ambil task dari antrian bersama, baca frame dari slot
+    shared memory, jalankan batch inference, kirim hasil (array kecil) balik
+
+    Args:
+        worker_index (int): Index worker
+        options (dict): model_path, backend, conf_threshold, imgsz, threads, pin_cores, max_batch_size
+        shm_name (str): Nama blok shared memory ring slot
+        slot_bytes (int): Ukuran satu slot
+        task_queue: multiprocessing.Queue berisi (request_id, slot, shape, imgsz) atau None untuk stop
+        result_queue: multiprocessing.Queue untuk (worker_index, batch_ms, [(request_id, data, ms), ...])
+        claims: multiprocessing.Array request_id yang sedang dikerjakan (-1 = kosong), dibaca
+            proses utama untuk menggagalkan task jika worker mati
+    """
+    # Proses spawn sudah meng-import torch lewat modul __main__ sebelum baris ini,
+    # jadi env thread hanya berlaku untuk library yang di-load belakangan; jumlah
+    # thread torch diatur lewat torch.set_num_threads() di bawah
+    _pin_worker(worker_index, options['threads'], options['pin_cores'])
+
+    import torch
+    from detector import HumanDetector
+
+    torch.set_num_threads(options['threads'])
+    logger = logging.getLogger(f"{__name__}.worker{worker_index}")
+
+    detector = HumanDetector(options['model_path'], options['conf_threshold'],
+                             options['backend'], options['imgsz'])
+    if not detector.load_model(warmup=True):
+        logger.error("Worker gagal load model")
+        result_queue.put((worker_index, None, None))
+        return
+    result_queue.put((worker_index, 0.0, []))  # Siap
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    stopping = False
+    try:
+        while not stopping:
+            task = task_queue.get()
+            if task is None:
+                break
+
+            # Ambil task lain yang sudah menunggu (micro-batch di dalam worker)
+            batch = [task]
+            while len(batch) < options['max_batch_size']:
+                try:
+                    task = task_queue.get_nowait()
+                except Empty:
+                    break
+                if task is None:
+                    stopping = True
+                    break
+                batch.append(task)
+
+            for index in range(len(claims)):
+                claims[index] = batch[index][0] if index < len(batch) else -1
+
+            start = time.time()
+            groups = {}
+            for task in batch:
+                groups.setdefault(task[3], []).append(task)
+
+            outputs = []
+            for imgsz, tasks in groups.items():
+                try:
+                    outputs.extend(_infer_slots(detector, shm, slot_bytes, tasks, imgsz))
+                except Exception as e:
+                    logger.error(f"Inference error: {str(e)}")
+                    outputs.extend((request_id, None, 0.0) for request_id, _, _, _ in tasks)
+
+            result_queue.put((worker_index, (time.time() - start) * 1000, outputs))
+            for index in range(len(claims)):
+                claims[index] = -1
+    finally:
+        shm.close()
+
+
+class InferenceWorkerPool:
+    """
+    Pool N proses inference, drop-in pengganti BatchInferenceScheduler
+
+    Thread camera memanggil detect()/submit(): frame (atau crop ROI-nya) disalin
+    ke slot ring di shared memory, task kecil (index slot + shape) masuk antrian
+    bersama, worker bebas mengambil task. Thread hasil di proses utama
+    mengembalikan slot ke ring dan membangunkan thread camera.
+
+    Worker yang mati di tengah task di-spawn ulang, task-nya digagalkan dan
+    slot-nya dikembalikan. Slot / hasil yang tidak datang dalam task_timeout
+    detik dideteksi langsung di proses utama, jadi thread camera tidak pernah
+    menunggu selamanya.
+    """
+
+    def __init__(self, detector, workers=2, threads_per_worker=None, max_batch_size=4,
+                 slots=None, max_frame_shape=DEFAULT_MAX_FRAME_SHAPE, pin_cores=True,
+                 task_timeout=DEFAULT_TASK_TIMEOUT):
+        """
+        Args:
+            detector (HumanDetector): Detector di proses utama (config model, tracker,
+                controller imgsz, statistik); model worker di-load dari path yang sama
+            workers (int): Jumlah proses worker
+            threads_per_worker (int): Thread torch per worker (None = jumlah core / workers)
+            max_batch_size (int): Batch maksimal per worker
+            slots (int): Jumlah slot ring (None = 2 x workers x max_batch_size)
+            max_frame_shape: Shape frame terbesar yang muat di satu slot
+            pin_cores (bool): Pin setiap worker ke blok core sendiri (Linux)
+            task_timeout (float): Detik maksimal menunggu slot / hasil worker, setelah itu
+                frame dideteksi di proses utama
+        """
+        self.detector = detector
+        self.workers = max(1, int(workers))
+        cpu_count = os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.workers)
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.slot_count = slots or 2 * self.workers * self.max_batch_size
+        self.slot_bytes = int(np.prod(max_frame_shape))
+        self.pin_cores = pin_cores
+        self.task_timeout = task_timeout
+
+        self.logger = logging.getLogger(__name__)
+
+        self._context = mp.get_context('spawn')  # Aman untuk proses dengan banyak thread
+        self._shm = None
+        self._processes = []
+        self._claims = []
+        self._options = None
+        self._task_queue = None
+        self._result_queue = None
+        self._result_thread = None
+        self._free_slots = Queue()
+        self._pending = {}  # request_id -> (PendingDetection, slot, offset, roi, shape)
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()  # Cek is_running + tulis slot + enqueue atomik terhadap stop()
+        self.is_running = False
+
+        # Statistik
+        self.batch_count = 0
+        self.frame_count = 0
+        self.total_inference_time = 0.0
+        self.dropped_count = 0
+        self.worker_frames = [0] * self.workers
+        self.restart_count = 0
+        self.failed_tasks = 0
+        self.fallback_count = 0
+        self._failed_workers = set()  # Worker yang gagal load model (tidak di-spawn ulang)
+        self._last_check = 0.0
+
+    def start(self, timeout=120):
+        """
+        Start semua worker dan tunggu sampai model ter-load
+
+        Args:
+            timeout (float): Waktu tunggu maksimal load model per worker (detik)
+        """
+        if self.is_running:
+            return
+
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slot_count * self.slot_bytes)
+        for slot in range(self.slot_count):
+            self._free_slots.put(slot)
+
+        self._task_queue = self._context.Queue()
+        self._result_queue = self._context.Queue()
+
+        self._options = {
+            'model_path': self.detector.model_path,
+            'backend': self.detector.backend,
+            'conf_threshold': self.detector.conf_threshold,
+            'imgsz': self.detector.imgsz,
+            'threads': self.threads_per_worker,
+            'pin_cores': self.pin_cores,
+            'max_batch_size': self.max_batch_size,
+        }
+        self._processes = [None] * self.workers
+        self._claims = [None] * self.workers
+        for index in range(self.workers):
+            self._spawn_worker(index)
+
+        # Tunggu sinyal siap dari semua worker
+        ready = 0
+        reported = 0
+        deadline = time.time() + timeout
+        while reported < self.workers and time.time() < deadline:
+            try:
+                index, status, _ = self._result_queue.get(timeout=1.0)
+            except Empty:
+                continue
+            reported += 1
+            if status is None:
+                self.logger.error(f"Inference worker {index} gagal load model")
+                self._failed_workers.add(index)
+            else:
+                ready += 1
+
+        if ready == 0:
+            self._shutdown()
+            raise RuntimeError("Tidak ada inference worker yang siap (model gagal di-load / timeout)")
+
+        self.is_running = True
+        self._result_thread = threading.Thread(target=self._collect_results, name="InferencePoolResults",
+                                               daemon=True)
+        self._result_thread.start()
+        self.logger.info(f"Inference pool started: {ready}/{self.workers} workers x {self.threads_per_worker} "
+                         f"threads, {self.slot_count} shared-memory slots of {self.slot_bytes / 1e6:.1f} MB")
+
+    def _spawn_worker(self, index):
+        """Start (ulang) proses worker dengan index tertentu"""
+        claims = self._context.Array('q', [-1] * self.max_batch_size, lock=False)
+        process = self._context.Process(
+            target=_worker_main, name=f"InferenceWorker-{index}", daemon=True,
+            args=(index, self._options, self._shm.name, self.slot_bytes, self._task_queue, self._result_queue,
+                  claims))
+        process.start()
+        self._processes[index] = process
+        self._claims[index] = claims
+
+    def stop(self):
+        """Stop worker, frame yang masih pending dikembalikan tanpa deteksi"""
+        with self._lock:
+            if not self.is_running:
+                return
+            self.is_running = False
+
+        if self._result_thread is not None:
+            self._result_thread.join(timeout=5)
+            self._result_thread = None
+        self._shutdown()
+
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for request in pending.values():
+            request[0].set_result(Detections.empty())
+        self.logger.info("Inference pool stopped")
+
+    def _shutdown(self):
+        """Hentikan proses worker dan lepas shared memory"""
+        processes = [process for process in self._processes if process is not None]
+        for _ in processes:
+            self._task_queue.put(None)
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        self._claims = []
+
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def submit(self, frame, roi=None, camera_id=None):
+        """
+        Salin frame ke slot shared memory dan masukkan ke antrian worker
+
+        Args:
+            frame: Frame dari camera
+            roi (RegionOfInterest): ROI camera - hanya area crop yang disalin
+            camera_id: ID camera (untuk adaptive imgsz)
+
+        Returns:
+            PendingDetection: Handle untuk menunggu hasil (hasil None = worker gagal / mati,
+                detect() lalu mendeteksi di proses utama)
+        """
+        pending = PendingDetection(frame, roi, camera_id)
+        if not self.is_running:
+            pending.set_result(Detections.empty())
+            return pending
+        if len(self._failed_workers) >= self.workers:
+            pending.set_result(None)  # Tidak ada worker yang bisa load model
+            return pending
+
+        source, offset = roi.crop(frame) if roi is not None else (frame, (0, 0))
+        if source.nbytes > self.slot_bytes or source.dtype != np.uint8:
+            self.logger.error(f"Frame {source.shape} tidak muat di slot shared memory, naikkan max_frame_shape")
+            self.dropped_count += 1
+            pending.set_result(Detections.empty())
+            return pending
+
+        # Slot bebas dari ring (blok jika semua slot sedang dipakai = backpressure)
+        try:
+            slot = self._free_slots.get(timeout=self.task_timeout)
+        except Empty:
+            if not self.is_running:  # stop() selama menunggu slot
+                pending.set_result(Detections.empty())
+                return pending
+            self.logger.warning(f"Tidak ada slot shared memory bebas dalam {self.task_timeout:.0f}s")
+            pending.set_result(None)
+            return pending
+
+        # stop() bisa terjadi selama menunggu slot; setelah is_running False di bawah lock,
+        # shared memory dan task queue tidak disentuh lagi sehingga _shutdown() aman
+        with self._lock:
+            if self.is_running:
+                view = np.ndarray(source.shape, dtype=np.uint8, buffer=self._shm.buf,
+                                  offset=slot * self.slot_bytes)
+                view[...] = source
+                del view
+
+                request_id = next(self._ids)
+                with self._pending_lock:
+                    self._pending[request_id] = (pending, slot, offset, roi, frame.shape)
+                pending.request_id = request_id
+                self._task_queue.put((request_id, slot, source.shape, self.detector._imgsz_for(camera_id)))
+                return pending
+
+        self._free_slots.put(slot)
+        pending.set_result(Detections.empty())
+        return pending
+
+    def detect(self, frame, roi=None, camera_id=None, timeout=None):
+        """
+        Drop-in pengganti HumanDetector.detect() lewat worker pool
+
+        Args:
+            timeout (float): Detik maksimal menunggu worker (None = task_timeout)
+
+        Returns:
+            Detections: Hasil deteksi; jika worker gagal / timeout, dideteksi di proses utama
+        """
+        pending = self.submit(frame, roi, camera_id)
+        result = pending.wait(self.task_timeout if timeout is None else timeout)
+        if result is None:
+            if self._fail_request(pending.request_id, None):
+                self.logger.warning(f"Inference worker tidak menjawab dalam {self.task_timeout:.0f}s, "
+                                    f"deteksi di proses utama")
+            result = pending.result  # Hasil bisa datang tepat setelah timeout
+        if result is not None:
+            return result
+
+        self.fallback_count += 1
+        return self.detector.detect(frame, roi, camera_id)
+
+    def _fail_request(self, request_id, result):
+        """Lepas request dari pending, kembalikan slot-nya, dan bangunkan thread camera"""
+        with self._pending_lock:
+            request = self._pending.pop(request_id, None)
+        if request is None:
+            return False
+        # Task lama yang masih di antrian boleh membaca slot yang sudah dipakai ulang,
+        # hasilnya dibuang karena request_id-nya tidak pending lagi
+        self._free_slots.put(request[1])
+        request[0].set_result(result)
+        return True
+
+    def _collect_results(self):
+        """Thread penerima hasil dari worker"""
+        while self.is_running:
+            if time.time() - self._last_check >= 1.0:
+                self._check_workers()
+            try:
+                worker_index, batch_ms, outputs = self._result_queue.get(timeout=1.0)
+            except Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+            if outputs is None:
+                self.logger.error(f"Inference worker {worker_index} gagal load model")
+                self._failed_workers.add(worker_index)
+                continue
+
+            if outputs:
+                self.batch_count += 1
+                self.frame_count += len(outputs)
+                self.total_inference_time += batch_ms / 1000
+                self.worker_frames[worker_index] += len(outputs)
+
+            for request_id, data, inference_ms in outputs:
+                with self._pending_lock:
+                    request = self._pending.pop(request_id, None)
+                if request is None:
+                    continue
+                pending, slot, (offset_x, offset_y), roi, shape = request
+                self._free_slots.put(slot)
+                pending.set_result(self._finish(pending, data, inference_ms, offset_x, offset_y, roi, shape))
+
+    def _finish(self, pending, data, inference_ms, offset_x, offset_y, roi, shape):
+        """Post-process di proses utama: koordinat frame penuh, filter ROI, statistik"""
+        if data is None:
+            return Detections.empty()
+
+        detections = Detections(data).translate(offset_x, offset_y)
+        if roi is not None:
+            detections = roi.filter(detections, shape)
+
+        recorder = self.detector.latency_recorder
+        if recorder is not None:
+            # Antrian = round trip worker dikurangi inference (termasuk transfer shared memory)
+            recorder.record('inference', inference_ms)
+            recorder.record('queue_wait', (time.time() - pending.submitted_at) * 1000 - inference_ms)
+
+        controller = self.detector.resolution_controller
+        if controller is not None and pending.camera_id is not None:
+            controller.record(pending.camera_id, inference_ms, detections, shape)
+
+        self.detector.frame_count += 1
+        self.detector.total_detections += len(detections)
+        return detections
+
+    def _check_workers(self):
+        """Worker yang mati: gagalkan task yang sedang dikerjakan, kembalikan slot, spawn ulang"""
+        self._last_check = time.time()
+        for index, process in enumerate(self._processes):
+            if process is None or process.is_alive():
+                continue
+
+            failed = sum(self._fail_request(request_id, None)
+                         for request_id in self._claims[index] if request_id >= 0)
+            self.failed_tasks += failed
+            if index in self._failed_workers:
+                self._processes[index] = None  # Gagal load model, spawn ulang tidak akan membantu
+                continue
+
+            self.logger.error(f"Inference worker {index} berhenti (exit code {process.exitcode}), "
+                              f"{failed} task digagalkan, spawn ulang")
+            self.restart_count += 1
+            self._spawn_worker(index)
+
+    def get_stats(self):
+        """Get statistics"""
+        avg_batch = self.frame_count / self.batch_count if self.batch_count > 0 else 0
+        avg_time = self.total_inference_time / self.batch_count if self.batch_count > 0 else 0
+
+        return {
+            'workers': self.workers,
+            'threads_per_worker': self.threads_per_worker,
+            'batches': self.batch_count,
+            'frames': self.frame_count,
+            'average_batch_size': avg_batch,
+            'average_batch_time_ms': avg_time * 1000,
+            'pending': len(self._pending),
+            'free_slots': self._free_slots.qsize(),
+            'dropped': self.dropped_count,
+            'restarts': self.restart_count,
+            'failed_tasks': self.failed_tasks,
+            'fallbacks': self.fallback_count,
+            'frames_per_worker': list(self.worker_frames)
+        }
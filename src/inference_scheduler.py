@@ -0,0 +1,209 @@
+"""
+Inference Scheduler Module
+Micro-batching: kumpulkan frame dari semua camera lalu jalankan satu batch inference
+"""
+
+import logging
+import threading
+import time
+from queue import Queue, Empty
+
+from detections import Detections
+
+
+class PendingDetection:
+    """
+    Hasil deteksi yang belum selesai (ditunggu oleh thread camera)
+    """
+
+    def __init__(self, frame, roi=None, camera_id=None):
+        """
+        Args:
+            frame: Frame yang akan dideteksi
+            roi (RegionOfInterest): ROI camera (optional)
+            camera_id: ID camera (untuk adaptive imgsz)
+        """
+        self.frame = frame
+        self.roi = roi
+        self.camera_id = camera_id
+        self.submitted_at = time.time()
+        self.request_id = None  # ID task di InferenceWorkerPool
+        self.result = None
+        self._done = threading.Event()
+
+    def set_result(self, result):
+        """Simpan hasil dan bangunkan thread yang menunggu"""
+        self.result = result
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """
+        Tunggu hasil deteksi
+
+        Args:
+            timeout (float): Maksimal waktu tunggu dalam detik (None = tunggu terus)
+
+        Returns:
+            Detections: Hasil deteksi, atau None jika timeout
+        """
+        if not self._done.wait(timeout):
+            return None
+        return self.result
+
+
+class BatchInferenceScheduler:
+    """
+    Scheduler pusat untuk batch inference
+
+    Thread camera memanggil submit()/detect(), scheduler mengumpulkan
+    frame yang pending dan flush satu batch ke HumanDetector.detect_batch()
+    saat batch penuh (max_batch_size) atau deadline max_wait tercapai.
+    """
+
+    def __init__(self, detector, max_batch_size=8, max_wait=0.02):
+        """
+        Args:
+            detector (HumanDetector): Detector yang sudah di-load
+            max_batch_size (int): Jumlah frame maksimal per batch
+            max_wait (float): Waktu tunggu maksimal (detik) sejak frame pertama masuk batch
+        """
+        self.detector = detector
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max_wait
+
+        self._queue = Queue()
+        self._thread = None
+        self._lock = threading.Lock()  # Cek is_running + enqueue atomik terhadap stop()
+        self.is_running = False
+
+        self.logger = logging.getLogger(__name__)
+
+        # Statistik
+        self.batch_count = 0
+        self.frame_count = 0
+        self.total_inference_time = 0.0
+
+    def start(self):
+        """Start scheduler thread"""
+        if self.is_running:
+            return
+
+        self.is_running = True
+        self._thread = threading.Thread(target=self._run, name="InferenceScheduler", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Inference scheduler started (max_batch_size={self.max_batch_size}, "
+                         f"max_wait={self.max_wait * 1000:.0f}ms)")
+
+    def stop(self):
+        """Stop scheduler, frame yang masih pending dikembalikan tanpa deteksi"""
+        with self._lock:
+            self.is_running = False
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+        while True:
+            try:
+                pending = self._queue.get_nowait()
+            except Empty:
+                break
+            pending.set_result(Detections.empty())
+
+        self.logger.info("Inference scheduler stopped")
+
+    def submit(self, frame, roi=None, camera_id=None):
+        """
+        Masukkan frame ke antrian inference
+
+        Args:
+            frame: Frame dari camera
+            roi (RegionOfInterest): ROI camera (optional)
+            camera_id: ID camera (optional)
+
+        Returns:
+            PendingDetection: Handle untuk menunggu hasil
+        """
+        pending = PendingDetection(frame, roi, camera_id)
+
+        # Setelah stop() tidak ada lagi yang masuk antrian, jadi drain di stop() menyelesaikan semuanya
+        with self._lock:
+            if self.is_running:
+                self._queue.put(pending)
+                return pending
+        pending.set_result(Detections.empty())
+        return pending
+
+    def detect(self, frame, roi=None, camera_id=None, timeout=None):
+        """
+        Drop-in pengganti HumanDetector.detect() lewat scheduler
+
+        Returns:
+            Detections: Hasil deteksi (kosong jika timeout)
+        """
+        result = self.submit(frame, roi, camera_id).wait(timeout)
+        if result is None:
+            return Detections.empty()
+        return result
+
+    def _collect_batch(self):
+        """Ambil frame pending sampai batch penuh atau deadline tercapai"""
+        try:
+            first = self._queue.get(timeout=0.1)
+        except Empty:
+            return []
+
+        batch = [first]
+        deadline = first.submitted_at + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining <= 0:
+                    # Deadline lewat, tetap ambil yang sudah ada di antrian
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        """Main loop scheduler"""
+        while self.is_running:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            start = time.time()
+            recorder = self.detector.latency_recorder
+            if recorder is not None:
+                for pending in batch:
+                    recorder.record('queue_wait', (start - pending.submitted_at) * 1000)
+            try:
+                results = self.detector.detect_batch([p.frame for p in batch],
+                                                     [p.roi for p in batch],
+                                                     [p.camera_id for p in batch])
+            except Exception as e:
+                self.logger.error(f"Batch inference error: {str(e)}")
+                results = [Detections.empty() for _ in batch]
+            self.total_inference_time += time.time() - start
+
+            for pending, result in zip(batch, results):
+                pending.set_result(result)
+
+            self.batch_count += 1
+            self.frame_count += len(batch)
+
+    def get_stats(self):
+        """Get statistics"""
+        avg_batch = self.frame_count / self.batch_count if self.batch_count > 0 else 0
+        avg_time = self.total_inference_time / self.batch_count if self.batch_count > 0 else 0
+
+        return {
+            'batches': self.batch_count,
+            'frames': self.frame_count,
+            'average_batch_size': avg_batch,
+            'average_batch_time_ms': avg_time * 1000,
+            'pending': self._queue.qsize()
+        }
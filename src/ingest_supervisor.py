@@ -0,0 +1,602 @@
+"""
+Ingest Supervisor Module
+Ratusan camera dalam satu event loop asyncio: lifecycle, health check dan
+reconnect di proses utama, decode di pool proses decoder terbatas, frame
+sampel lewat shared memory ke satu antrian inference bersama
+"""
+
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from queue import Empty
+
+import numpy as np
+
+from connection_manager import backoff_delay
+from inference_pool import DEFAULT_MAX_FRAME_SHAPE
+from roi import RegionOfInterest
+
+# Default, bisa di-override dari config
+DEFAULT_INGEST_CONFIG = {
+    'decoder_processes': 4,       # Proses decoder (camera dibagi rata)
+    'cameras_per_process': 64,    # Camera maksimal per proses decoder (2 thread per camera)
+    'sample_fps': 5.0,            # Frame per detik per camera yang dikirim ke inference (decode tetap semua frame)
+    'max_frame_shape': DEFAULT_MAX_FRAME_SHAPE,
+    'slots': 64,                  # Slot shared memory (frame yang sedang antri / di-inference)
+    'queue_size': 32,             # Antrian inference bersama (penuh -> frame terlama di-drop)
+    'batch_size': 8,
+    'max_batch_wait': 0.02,       # Detik - tunggu maksimal sampai batch penuh
+    'health_interval': 1.0,       # Detik antar health check
+    'stall_timeout': 10.0,        # Detik tanpa frame -> camera di-restart
+    'initial_backoff': 1.0,
+    'max_backoff': 60.0,
+}
+
+# Decoder camera ingest: satu thread decode per camera (di atas thread reader), tanpa frame tertahan
+INGEST_DECODER_OPTIONS = {
+    'decode_threads': 1,
+    'thread_type': 'SLICE',
+}
+
+
+def _read_camera(camera, shm, slot_bytes, free_slots, owners, events, sample_interval, stop):
+    """
+    Reader satu camera di proses decoder: decode semua frame, hanya frame sampel
+    yang dikonversi dan disalin ke slot shared memory
+
+    Slot diambil tanpa menunggu; jika ring penuh (inference tertinggal) frame
+    di-drop di sini sehingga decode tidak pernah tertahan. Slot yang dipegang
+    ditandai dengan PID proses di owners sampai supervisor menerima frame-nya,
+    sehingga slot proses decoder yang mati bisa diambil kembali.
+    """
+    name = camera.camera_name
+    pid = os.getpid()
+    if not camera.connect():
+        events.put(('failed', name, None))
+        return
+    events.put(('connected', name, None))
+
+    dropped = 0
+    last_sent = 0.0
+    while not stop.is_set():
+        if not camera.grab_frame():
+            break
+        if camera.frame_timestamp - last_sent < sample_interval:
+            continue
+
+        try:
+            slot = free_slots.get_nowait()
+        except Empty:
+            dropped += 1
+            continue
+        owners[slot] = pid
+
+        ok, frame = camera.retrieve_frame()
+        if not ok or frame.nbytes > slot_bytes:
+            owners[slot] = 0
+            free_slots.put(slot)
+            if ok:
+                events.put(('error', name, f"Frame {frame.shape} tidak muat di slot, naikkan max_frame_shape"))
+                break
+            continue
+
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+        view[...] = frame
+        del view
+        last_sent = camera.frame_timestamp
+        events.put(('frame', name, (slot, frame.shape, camera.frame_timestamp, camera.frame_pts,
+                                    camera.frame_seq, dropped, pid)))
+
+    camera.disconnect()
+    if not stop.is_set():
+        events.put(('lost', name, None))
+
+
+def _decoder_main(worker_index, shm_name, slot_bytes, commands, events, free_slots, owners):
+    """
+    Loop proses decoder: buka / tutup camera sesuai perintah dari supervisor
+
+    Args:
+        worker_index (int): Index proses decoder
+        shm_name (str): Nama blok shared memory ring slot
+        slot_bytes (int): Ukuran satu slot
+        commands: multiprocessing.Queue berisi ('open', name, options), ('close', name, None) atau None
+        events: multiprocessing.Queue ke supervisor: (jenis, name, data)
+        free_slots: multiprocessing.Queue index slot yang bebas
+        owners: multiprocessing.Array PID pemegang setiap slot (0 = bukan proses decoder)
+    """
+    from camera_stream import HikvisionCamera
+
+    logger = logging.getLogger(f"{__name__}.decoder{worker_index}")
+    shm = shared_memory.SharedMemory(name=shm_name)
+    readers = {}
+    try:
+        while True:
+            command = commands.get()
+            if command is None:
+                break
+
+            action, name, options = command
+            reader = readers.pop(name, None)
+            if reader is not None:
+                reader[1].set()
+                reader[0].join(timeout=10)
+
+            if action == 'open':
+                camera = HikvisionCamera(options['url'], name, decoder=options['decoder'],
+                                         decoder_options=options['decoder_options'],
+                                         output_size=options['output_size'])
+                stop = threading.Event()
+                thread = threading.Thread(
+                    target=_read_camera, daemon=True, name=f"Decode-{name}",
+                    args=(camera, shm, slot_bytes, free_slots, owners, events, options['sample_interval'], stop))
+                readers[name] = (thread, stop)
+                thread.start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for thread, stop in readers.values():
+            stop.set()
+        for thread, _ in readers.values():
+            thread.join(timeout=10)
+        logger.info(f"Decoder {worker_index} stopped")
+        shm.close()
+
+
+class IngestSupervisor:
+    """
+    Supervisor ingest untuk ratusan camera
+
+    Proses utama hanya punya thread tetap (event loop, penerima event,
+    inference) berapa pun jumlah camera: lifecycle, health check dan
+    reconnect dengan backoff dijalankan sebagai callback di satu event loop
+    asyncio. Decode yang blocking dijalankan di decoder_processes proses
+    decoder. Frame sampel lewat ring slot shared memory ke satu antrian
+    inference bersama (penuh -> frame terlama di-drop), lalu di-batch ke
+    HumanDetector.detect_batch().
+
+    Di proses decoder setiap camera memakai satu thread reader (read OpenCV /
+    PyAV blocking) ditambah satu thread decode FFmpeg, jadi jumlah camera per
+    proses dibatasi cameras_per_process; naikkan decoder_processes untuk
+    camera lebih banyak.
+    """
+
+    def __init__(self, detector, decoder_processes=4, cameras_per_process=64, sample_fps=5.0,
+                 max_frame_shape=DEFAULT_MAX_FRAME_SHAPE,
+                 slots=64, queue_size=32, batch_size=8, max_batch_wait=0.02, health_interval=1.0,
+                 stall_timeout=10.0, initial_backoff=1.0, max_backoff=60.0, on_detections=None):
+        """
+        Args:
+            detector (HumanDetector): Detector yang sudah di-load (inference di proses utama)
+            decoder_processes (int): Jumlah proses decoder
+            cameras_per_process (int): Camera maksimal per proses decoder (camera berikutnya ditolak)
+            sample_fps (float): Frame per detik per camera untuk inference
+            max_frame_shape: Shape frame terbesar per slot (pakai 'decode_size' untuk slot kecil)
+            slots (int): Jumlah slot shared memory
+            queue_size (int): Ukuran antrian inference bersama
+            batch_size (int): Frame maksimal per batch inference
+            max_batch_wait (float): Tunggu maksimal batch penuh (detik)
+            health_interval (float): Interval health check (detik)
+            stall_timeout (float): Detik tanpa frame sebelum camera di-restart
+            initial_backoff (float): Jeda reconnect awal (detik)
+            max_backoff (float): Jeda reconnect maksimal (detik)
+            on_detections: Callback (camera_name, frame, detections, meta) di thread event loop
+                (harus cepat); meta = {'capture_time', 'pts', 'seq'}
+        """
+        self.detector = detector
+        self.decoder_processes = max(1, int(decoder_processes))
+        self.cameras_per_process = max(1, int(cameras_per_process))
+        self.sample_interval = 1.0 / sample_fps if sample_fps else 0.0
+        self.slot_count = max(1, int(slots))
+        self.slot_bytes = int(np.prod(max_frame_shape))
+        self.queue_size = max(1, int(queue_size))
+        self.batch_size = max(1, int(batch_size))
+        self.max_batch_wait = max_batch_wait
+        self.health_interval = health_interval
+        self.stall_timeout = stall_timeout
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.on_detections = on_detections
+
+        self.logger = logging.getLogger(__name__)
+
+        self._context = mp.get_context('spawn')
+        self._shm = None
+        self._processes = []
+        self._commands = []
+        self._events = None
+        self._free_slots = None
+        self._owners = None
+
+        self._loop = None
+        self._loop_thread = None
+        self._stopping = None
+        self._queue = None
+        self._receiver = ThreadPoolExecutor(max_workers=1, thread_name_prefix='IngestEvents')
+        self._inference = ThreadPoolExecutor(max_workers=1, thread_name_prefix='IngestInference')
+        self._cameras = {}  # Hanya diubah di thread event loop
+        self.is_running = False
+
+        # Statistik
+        self.inferred_frames = 0
+        self.queue_dropped = 0
+        self.batch_count = 0
+
+    @classmethod
+    def from_config(cls, detector, config, on_detections=None):
+        """Buat supervisor dari dict konfigurasi (override DEFAULT_INGEST_CONFIG)"""
+        options = dict(DEFAULT_INGEST_CONFIG)
+        options.update(config or {})
+        return cls(detector, on_detections=on_detections, **options)
+
+    # ------------------------------------------------------------------
+    # API publik (thread-safe)
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start proses decoder dan event loop"""
+        if self.is_running:
+            return
+
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slot_count * self.slot_bytes)
+        self._events = self._context.Queue()
+        self._free_slots = self._context.Queue()
+        for slot in range(self.slot_count):
+            self._free_slots.put(slot)
+        self._owners = self._context.Array('q', self.slot_count, lock=False)
+        for index in range(self.decoder_processes):
+            self._commands.append(self._context.Queue())
+            self._processes.append(self._start_decoder(index))
+
+        ready = threading.Event()
+        self._loop_thread = threading.Thread(target=self._run_loop, args=(ready,), name='IngestLoop', daemon=True)
+        self._loop_thread.start()
+        ready.wait()
+        self.is_running = True
+        self.logger.info(f"Ingest supervisor started: {self.decoder_processes} decoder processes, "
+                         f"{self.slot_count} slots of {self.slot_bytes / 1e6:.1f} MB, "
+                         f"sample {1 / self.sample_interval if self.sample_interval else 0:.1f} FPS per camera")
+
+    def stop(self):
+        """Stop semua camera, proses decoder dan event loop"""
+        if not self.is_running:
+            return
+        self.is_running = False
+
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self._loop_thread.join(timeout=10)
+
+        for commands in self._commands:
+            commands.put(None)
+        for process in self._processes:
+            process.join(timeout=15)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        self._commands = []
+        self._receiver.shutdown(wait=True)
+        self._inference.shutdown(wait=True)
+
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+        self.logger.info("Ingest supervisor stopped")
+
+    def add_camera(self, camera_config):
+        """
+        Tambah camera (boleh dipanggil dari thread mana pun)
+
+        Args:
+            camera_config (dict): 'name', 'rtsp_url', optional 'decoder', 'decoder_options',
+                'decode_size' (downscale di decoder, True = imgsz model), 'roi'
+        """
+        self._loop.call_soon_threadsafe(self._add_camera, dict(camera_config))
+
+    def remove_camera(self, name):
+        """Stop dan hapus camera (boleh dipanggil dari thread mana pun)"""
+        self._loop.call_soon_threadsafe(self._remove_camera, name)
+
+    def get_stats(self):
+        """
+        Statistik ingest
+
+        Returns:
+            dict: total camera / terhubung, frame di-inference, drop (decoder + antrian),
+            isi antrian, jumlah thread proses utama, dan status per camera
+        """
+        now = time.time()
+        cameras = {
+            name: {
+                'state': state['state'],
+                'worker': state['worker'],
+                'failures': state['failures'],
+                'frames': state['frames'],
+                'inferred': state['inferred'],
+                'decoder_dropped': state['decoder_dropped'],
+                'human_count': state['human_count'],
+                'frame_age': now - state['last_frame'] if state['last_frame'] else None,
+            }
+            for name, state in list(self._cameras.items())
+        }
+        return {
+            'cameras': len(cameras),
+            'connected': sum(1 for c in cameras.values() if c['state'] == 'connected'),
+            'inferred_frames': self.inferred_frames,
+            'batches': self.batch_count,
+            'queue_dropped': self.queue_dropped,
+            'decoder_dropped': sum(c['decoder_dropped'] for c in cameras.values()),
+            'inference_queue': self._queue.qsize() if self._queue is not None else 0,
+            'threads': threading.active_count(),
+            'per_camera': cameras,
+        }
+
+    # ------------------------------------------------------------------
+    # Proses decoder
+    # ------------------------------------------------------------------
+
+    def _start_decoder(self, index):
+        process = self._context.Process(
+            target=_decoder_main, name=f"Decoder-{index}", daemon=True,
+            args=(index, self._shm.name, self.slot_bytes, self._commands[index], self._events, self._free_slots,
+                  self._owners))
+        process.start()
+        return process
+
+    def _check_decoders(self):
+        """Restart proses decoder yang mati, slot yang dipegangnya dikembalikan, camera-nya dibuka ulang"""
+        for index, process in enumerate(self._processes):
+            if process.is_alive():
+                continue
+            # Frame event yang masih di antrian untuk slot ini diabaikan di _on_frame (owner berubah)
+            reclaimed = 0
+            for slot in range(self.slot_count):
+                if self._owners[slot] == process.pid:
+                    self._owners[slot] = 0
+                    self._free_slots.put(slot)
+                    reclaimed += 1
+            self.logger.error(f"Decoder {index} berhenti (exit code {process.exitcode}), "
+                              f"{reclaimed} slot dikembalikan, restart")
+            self._commands[index] = self._context.Queue()
+            self._processes[index] = self._start_decoder(index)
+            for name, state in self._cameras.items():
+                if state['worker'] == index:
+                    self._open(name)
+
+    # ------------------------------------------------------------------
+    # Event loop (semua method di bawah berjalan di thread event loop)
+    # ------------------------------------------------------------------
+
+    def _run_loop(self, ready):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._stopping = asyncio.Event()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        ready.set()
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    async def _main(self):
+        tasks = [asyncio.ensure_future(coro) for coro in
+                 (self._receive_events(), self._inference_loop(), self._health_loop())]
+        await self._stopping.wait()
+
+        for name in list(self._cameras):
+            self._remove_camera(name)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _add_camera(self, camera_config):
+        name = camera_config['name']
+        if name in self._cameras:
+            self.logger.warning(f"{name}: camera sudah terdaftar")
+            return
+
+        # Camera baru ke proses decoder dengan camera paling sedikit
+        load = [0] * self.decoder_processes
+        for state in self._cameras.values():
+            load[state['worker']] += 1
+        worker = load.index(min(load))
+        if load[worker] >= self.cameras_per_process:
+            self.logger.error(f"{name}: semua proses decoder penuh ({self.cameras_per_process} camera per proses), "
+                              f"naikkan decoder_processes")
+            return
+
+        decode_size = camera_config.get('decode_size')
+        if decode_size is True:
+            decode_size = self.detector.imgsz
+        decoder = camera_config.get('decoder', 'opencv')
+        decoder_options = camera_config.get('decoder_options') or {}
+        if decoder != 'replay':
+            decoder_options = {**INGEST_DECODER_OPTIONS, **decoder_options}
+        self._cameras[name] = {
+            'options': {
+                'url': camera_config['rtsp_url'],
+                'decoder': decoder,
+                'decoder_options': decoder_options,
+                'output_size': decode_size or None,
+                'sample_interval': self.sample_interval,
+            },
+            'roi': RegionOfInterest.from_config(camera_config.get('roi')),
+            'worker': worker,
+            'state': 'connecting',
+            'failures': 0,
+            'retry': None,
+            'opened_at': 0.0,
+            'last_frame': None,
+            'frames': 0,
+            'inferred': 0,
+            'decoder_dropped': 0,
+            'human_count': 0,
+        }
+        self._open(name)
+
+    def _remove_camera(self, name):
+        state = self._cameras.pop(name, None)
+        if state is None:
+            return
+        if state['retry'] is not None:
+            state['retry'].cancel()
+        self._commands[state['worker']].put(('close', name, None))
+
+    def _open(self, name):
+        state = self._cameras.get(name)
+        if state is None:
+            return
+        state['retry'] = None
+        state['state'] = 'connecting'
+        state['opened_at'] = time.time()
+        self._commands[state['worker']].put(('open', name, state['options']))
+
+    def _schedule_retry(self, name, reason):
+        """Camera putus / gagal connect: buka ulang setelah backoff + jitter"""
+        state = self._cameras.get(name)
+        if state is None or state['retry'] is not None:
+            return
+        state['state'] = 'disconnected'
+        state['failures'] += 1
+        delay = backoff_delay(state['failures'], self.initial_backoff, self.max_backoff)
+        state['retry'] = self._loop.call_later(delay, self._open, name)
+        self.logger.warning(f"{name}: {reason}, retry in {delay:.1f}s (attempt {state['failures']})")
+
+    def _get_event(self):
+        """Blocking get di thread penerima (timeout agar stop tidak tertahan)"""
+        try:
+            return self._events.get(timeout=0.5)
+        except Empty:
+            return None
+
+    async def _receive_events(self):
+        """Terima event dari semua proses decoder"""
+        loop = asyncio.get_running_loop()
+        while True:
+            event = await loop.run_in_executor(self._receiver, self._get_event)
+            if event is None:
+                continue
+
+            kind, name, data = event
+            state = self._cameras.get(name)
+            if kind == 'frame':
+                self._on_frame(name, state, data)
+            elif state is None:
+                continue
+            elif kind == 'connected':
+                state['state'] = 'connected'
+                state['failures'] = 0
+                state['last_frame'] = time.time()
+                self.logger.info(f"{name}: connected (decoder {state['worker']})")
+            elif kind in ('failed', 'lost'):
+                self._schedule_retry(name, 'connect failed' if kind == 'failed' else 'stream lost')
+            elif kind == 'error':
+                self.logger.error(f"{name}: {data}")
+
+    def _on_frame(self, name, state, data):
+        """Frame sampel masuk antrian inference (penuh -> drop frame terlama)"""
+        slot, shape, capture_time, pts, seq, decoder_dropped, owner = data
+        if self._owners[slot] != owner:
+            return  # Slot sudah dikembalikan karena proses decoder mati
+        self._owners[slot] = 0
+        if state is None:
+            self._free_slots.put(slot)  # Camera sudah dihapus
+            return
+
+        state['last_frame'] = time.time()
+        state['frames'] += 1
+        state['decoder_dropped'] = decoder_dropped
+
+        if self._queue.full():
+            oldest = self._queue.get_nowait()
+            self._free_slots.put(oldest['slot'])
+            self.queue_dropped += 1
+        self._queue.put_nowait({'name': name, 'slot': slot, 'shape': shape, 'capture_time': capture_time,
+                                'pts': pts, 'seq': seq, 'received': time.time()})
+
+    async def _next_batch(self):
+        """Ambil item antrian sampai batch penuh atau max_batch_wait lewat"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _infer(self, batch, rois):
+        """
+        Batch inference langsung dari slot shared memory (thread inference)
+
+        Returns:
+            list: [(detections, frame copy atau None), ...]
+        """
+        recorder = self.detector.latency_recorder
+        start = time.time()
+        frames = [np.ndarray(item['shape'], dtype=np.uint8, buffer=self._shm.buf,
+                             offset=item['slot'] * self.slot_bytes) for item in batch]
+        try:
+            results = self.detector.detect_batch(frames, rois, [item['name'] for item in batch])
+            copies = [frame.copy() if self.on_detections is not None else None for frame in frames]
+        finally:
+            del frames
+            for item in batch:
+                self._free_slots.put(item['slot'])
+
+        if recorder is not None:
+            for item in batch:
+                recorder.record('decode_wait', (item['received'] - item['capture_time']) * 1000)
+                recorder.record('queue_wait', (start - item['received']) * 1000)
+                recorder.record_since('capture_to_detection', item['capture_time'])
+        return list(zip(results, copies))
+
+    async def _inference_loop(self):
+        """Konsumen antrian inference bersama"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            rois = [self._cameras[item['name']]['roi'] if item['name'] in self._cameras else None
+                    for item in batch]
+            outputs = await loop.run_in_executor(self._inference, self._infer, batch, rois)
+
+            self.batch_count += 1
+            self.inferred_frames += len(batch)
+            for item, (detections, frame) in zip(batch, outputs):
+                state = self._cameras.get(item['name'])
+                if state is None:
+                    continue
+                state['inferred'] += 1
+                state['human_count'] = len(detections)
+                if self.on_detections is not None:
+                    try:
+                        self.on_detections(item['name'], frame, detections,
+                                           {'capture_time': item['capture_time'], 'pts': item['pts'],
+                                            'seq': item['seq']})
+                    except Exception as e:
+                        self.logger.error(f"{item['name']}: on_detections error: {str(e)}")
+
+    async def _health_loop(self):
+        """Health check: stream macet, connect yang menggantung, proses decoder mati"""
+        while True:
+            await asyncio.sleep(self.health_interval)
+            self._check_decoders()
+
+            now = time.time()
+            for name, state in list(self._cameras.items()):
+                if state['state'] == 'connected' and now - state['last_frame'] > self.stall_timeout:
+                    self._commands[state['worker']].put(('close', name, None))
+                    self._schedule_retry(name, f"no frame for {now - state['last_frame']:.1f}s")
+                elif state['state'] == 'connecting' and now - state['opened_at'] > self.stall_timeout * 3:
+                    self._commands[state['worker']].put(('close', name, None))
+                    self._schedule_retry(name, 'connect timed out')
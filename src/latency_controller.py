@@ -0,0 +1,155 @@
+"""
+Latency Controller Module
+Pilih ukuran input inference (imgsz) per camera berdasarkan budget latency
+"""
+
+import threading
+
+# Default, bisa di-override dari config
+DEFAULT_LATENCY_CONFIG = {
+    'enabled': False,
+    'sizes': [320, 480, 640],    # Kandidat imgsz (kelipatan 32)
+    'target_latency_ms': None,   # Budget latency inference per frame
+    'node_fps_target': None,     # ATAU: total FPS inference seluruh node (budget = 1000 / fps)
+    'min_box_height': 24,        # Tinggi box minimal (pixel input model) agar resolusi tidak diturunkan
+    'smoothing': 0.2,            # EWMA factor untuk latency & ukuran box
+    'cooldown_frames': 30,       # Jumlah frame minimal antar perubahan imgsz
+}
+
+
+class ResolutionController:
+    """
+    Controller imgsz per camera
+
+    Latency inference (EWMA) dibandingkan dengan budget: jika lewat budget imgsz
+    diturunkan, jika jauh di bawah budget imgsz dinaikkan lagi. Camera yang
+    mendeteksi orang kecil tidak diturunkan resolusinya selama box masih
+    di bawah min_box_height pada ukuran berikutnya.
+    """
+
+    def __init__(self, sizes=(320, 480, 640), target_latency_ms=None, node_fps_target=None,
+                 min_box_height=24, smoothing=0.2, cooldown_frames=30):
+        """
+        Args:
+            sizes: Kandidat imgsz
+            target_latency_ms (float): Budget latency per frame
+            node_fps_target (float): Budget FPS inference untuk seluruh node
+            min_box_height (float): Tinggi box minimal (pixel input model)
+            smoothing (float): EWMA factor
+            cooldown_frames (int): Frame minimal antar perubahan imgsz
+        """
+        self.sizes = sorted(int(s) for s in sizes)
+        if target_latency_ms is None:
+            if not node_fps_target:
+                raise ValueError("Isi target_latency_ms atau node_fps_target")
+            target_latency_ms = 1000.0 / node_fps_target
+        self.target_latency_ms = float(target_latency_ms)
+        self.min_box_height = min_box_height
+        self.smoothing = smoothing
+        self.cooldown_frames = cooldown_frames
+
+        self._lock = threading.Lock()
+        self._cameras = {}
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Buat controller dari dict konfigurasi
+
+        Returns:
+            ResolutionController atau None jika dinonaktifkan
+        """
+        options = dict(DEFAULT_LATENCY_CONFIG)
+        options.update(config or {})
+        if not options.pop('enabled'):
+            return None
+        return cls(**options)
+
+    def _state(self, camera_id):
+        state = self._cameras.get(camera_id)
+        if state is None:
+            state = {
+                'index': len(self.sizes) - 1,  # Mulai dari resolusi tertinggi
+                'latency_ms': None,
+                'min_box_ratio': None,         # Tinggi box terkecil / sisi panjang frame
+                'frames_since_change': 0,
+            }
+            self._cameras[camera_id] = state
+        return state
+
+    def imgsz_for(self, camera_id):
+        """
+        Ukuran input yang dipakai untuk frame berikutnya dari camera ini
+
+        Returns:
+            int: imgsz
+        """
+        with self._lock:
+            return self.sizes[self._state(camera_id)['index']]
+
+    def record(self, camera_id, inference_ms, detections, frame_shape):
+        """
+        Catat hasil inference dan sesuaikan imgsz jika perlu
+
+        Args:
+            camera_id: ID / nama camera
+            inference_ms (float): Waktu inference per frame
+            detections (Detections): Hasil deteksi
+            frame_shape: Shape frame yang di-inference
+        """
+        alpha = self.smoothing
+        with self._lock:
+            state = self._state(camera_id)
+
+            if state['latency_ms'] is None:
+                state['latency_ms'] = inference_ms
+            else:
+                state['latency_ms'] += alpha * (inference_ms - state['latency_ms'])
+
+            if len(detections) > 0:
+                heights = detections.xyxy[:, 3] - detections.xyxy[:, 1]
+                ratio = float(heights.min()) / max(frame_shape[:2])
+                if state['min_box_ratio'] is None:
+                    state['min_box_ratio'] = ratio
+                else:
+                    state['min_box_ratio'] += alpha * (ratio - state['min_box_ratio'])
+
+            state['frames_since_change'] += 1
+            if state['frames_since_change'] < self.cooldown_frames:
+                return
+
+            index = state['index']
+            size = self.sizes[index]
+            latency = state['latency_ms']
+
+            if latency > self.target_latency_ms and index > 0:
+                # Overload: turunkan resolusi, kecuali orang kecil akan hilang
+                lower = self.sizes[index - 1]
+                if state['min_box_ratio'] is None or state['min_box_ratio'] * lower >= self.min_box_height:
+                    state['index'] -= 1
+                    state['latency_ms'] = latency * (lower / size) ** 2
+                    state['frames_since_change'] = 0
+            elif index < len(self.sizes) - 1:
+                # Cost inference kira-kira sebanding dengan luas input
+                higher = self.sizes[index + 1]
+                predicted = latency * (higher / size) ** 2
+                if predicted < self.target_latency_ms * 0.9:
+                    state['index'] += 1
+                    state['latency_ms'] = predicted
+                    state['frames_since_change'] = 0
+
+    def snapshot(self):
+        """
+        Status imgsz per camera untuk statistik / API
+
+        Returns:
+            dict: {camera_id: {'imgsz': int, 'latency_ms': float}}
+        """
+        with self._lock:
+            return {
+                camera_id: {
+                    'imgsz': self.sizes[state['index']],
+                    'latency_ms': state['latency_ms']
+                }
+                for camera_id, state in self._cameras.items()
+            }
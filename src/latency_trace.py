@@ -0,0 +1,162 @@
+"""
+Latency Trace Module
+Histogram latency per stage pipeline (decode -> antrian -> inference -> event ->
+webhook / SSE) untuk mengukur umur event terhadap waktu capture frame
+"""
+
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Batas atas bucket histogram (ms), bucket terakhir = overflow
+DEFAULT_BUCKETS_MS = (1, 2, 3, 5, 7.5, 10, 15, 20, 30, 50, 75, 100, 150, 200, 300, 500,
+                      750, 1000, 1500, 2000, 3000, 5000, 10000)
+
+# Stage yang dicatat pipeline (urutan untuk tampilan)
+STAGES = (
+    'decode_wait',          # Frame selesai di-decode -> diambil thread processing
+    'queue_wait',           # Menunggu giliran inference (scheduler / worker pool / lock model)
+    'preprocess',           # Letterbox + normalisasi (ultralytics)
+    'inference',            # Forward pass model
+    'postprocess',          # NMS (ultralytics)
+    'detect',               # Total waktu deteksi dilihat thread camera
+    'encode',               # JPEG encode (stream / snapshot)
+    'delivery',             # Durasi POST webhook
+    'capture_to_detection', # Frame di-decode -> hasil deteksi tersedia (hanya frame yang di-inference)
+    'capture_to_event',     # Frame di-decode -> event masuk antrian
+    'capture_to_webhook',   # Frame di-decode -> webhook selesai terkirim
+    'capture_to_sse',       # Frame di-decode -> event dikirim ke client SSE
+)
+
+
+class LatencyHistogram:
+    """
+    Histogram bucket tetap (thread-safe), percentile diestimasi dari bucket
+    """
+
+    def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS):
+        """
+        Args:
+            buckets_ms: Batas atas bucket (ms), urut naik
+        """
+        self.bounds = np.asarray(buckets_ms, dtype=np.float64)
+        self.counts = np.zeros(len(self.bounds) + 1, dtype=np.int64)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, value_ms):
+        """Catat satu nilai latency (ms)"""
+        index = int(np.searchsorted(self.bounds, value_ms, side='left'))
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += value_ms
+            self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, q):
+        """
+        Estimasi percentile (interpolasi linear di dalam bucket)
+
+        Args:
+            q (float): 0-100
+
+        Returns:
+            float: ms, None jika histogram kosong
+        """
+        with self._lock:
+            if self.count == 0:
+                return None
+            counts = self.counts.copy()
+            max_ms = self.max_ms
+
+        target = q / 100.0 * counts.sum()
+        cumulative = np.cumsum(counts)
+        index = int(np.searchsorted(cumulative, target, side='left'))
+        lower = self.bounds[index - 1] if index > 0 else 0.0
+        upper = self.bounds[index] if index < len(self.bounds) else max_ms
+        before = cumulative[index - 1] if index > 0 else 0
+        fraction = (target - before) / counts[index] if counts[index] else 0.0
+        return float(min(lower + (upper - lower) * fraction, max_ms))
+
+    def snapshot(self):
+        """
+        Ringkasan histogram
+
+        Returns:
+            dict: count, mean_ms, p50_ms, p90_ms, p99_ms, max_ms, buckets {batas_atas: jumlah}
+        """
+        with self._lock:
+            count = self.count
+            mean = self.total_ms / count if count else None
+            max_ms = self.max_ms
+            counts = self.counts.tolist()
+
+        labels = [f"{b:g}" for b in self.bounds] + ['inf']
+        return {
+            'count': count,
+            'mean_ms': mean,
+            'p50_ms': self.percentile(50),
+            'p90_ms': self.percentile(90),
+            'p99_ms': self.percentile(99),
+            'max_ms': max_ms if count else None,
+            'buckets': {label: n for label, n in zip(labels, counts) if n},
+        }
+
+
+class LatencyRecorder:
+    """
+    Kumpulan histogram per stage (dibagi semua camera dalam satu proses)
+    """
+
+    def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.started_at = time.time()
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, value_ms):
+        """
+        Catat latency satu stage
+
+        Args:
+            stage (str): Nama stage (lihat STAGES)
+            value_ms (float): Latency (ms), nilai None / negatif diabaikan
+        """
+        if value_ms is None or value_ms < 0:
+            return
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, LatencyHistogram(self.buckets_ms))
+        histogram.record(value_ms)
+
+    def record_since(self, stage, start):
+        """Catat (sekarang - start) untuk stage, start = time.time() (None diabaikan)"""
+        if start is not None:
+            self.record(stage, (time.time() - start) * 1000)
+
+    def snapshot(self):
+        """
+        Ringkasan semua stage
+
+        Returns:
+            dict: {'since': ISO timestamp, 'stages': {stage: LatencyHistogram.snapshot()}}
+        """
+        with self._lock:
+            histograms = dict(self._histograms)
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        stages = sorted(histograms, key=lambda s: (order.get(s, len(order)), s))
+        return {
+            'since': datetime.fromtimestamp(self.started_at).isoformat(),
+            'stages': {stage: histograms[stage].snapshot() for stage in stages},
+        }
+
+    def reset(self):
+        """Hapus semua histogram"""
+        with self._lock:
+            self._histograms = {}
+            self.started_at = time.time()
@@ -8,11 +8,17 @@ import logging
 import time
 import argparse
 import sys
+from collections import deque
 from pathlib import Path
 
 # Import modul lokal
 from camera_stream import HikvisionCamera
+from connection_manager import backoff_delay
 from detector import HumanDetector
+from event_clips import EventClipRecorder
+from frame_pipeline import FramePipeline, DEFAULT_PIPELINE_CONFIG
+from latency_trace import LatencyRecorder
+from snapshot_writer import SnapshotWriter
 
 # Setup logging
 logging.basicConfig(
@@ -37,7 +43,12 @@ def parse_arguments():
                        help='RTSP URL dari kamera Hikvision (format: rtsp://username:password@ip:port/Streaming/Channels/101)')
     
     parser.add_argument('--model', type=str, default='models/yolov8n.pt',
-                       help='Path ke model YOLOv8 (default: models/yolov8n.pt)')
+                       help='Path ke model YOLOv8 .pt / .onnx / *_openvino_model (default: models/yolov8n.pt)')
+    
+    parser.add_argument('--backend', type=str, choices=['pytorch', 'onnx', 'openvino', 'openvino-int8'],
+                       help='Backend inference CPU (default: tebak dari --model). '
+                            'onnx/openvino di-export otomatis dari .pt saat pertama kali, '
+                            'openvino-int8 dibuat dengan quantize_model.py')
     
     parser.add_argument('--conf', type=float, default=0.5,
                        help='Confidence threshold untuk deteksi (0-1, default: 0.5)')
@@ -48,12 +59,32 @@ def parse_arguments():
     parser.add_argument('--output', type=str, default='outputs/detection_output.avi',
                        help='Path output video (default: outputs/detection_output.avi)')
     
+    parser.add_argument('--clips', action='store_true',
+                       help='Simpan klip event ke outputs/clips: 5 detik sebelum deteksi sampai 5 detik '
+                            'setelah deteksi terakhir, remux packet H.264 tanpa encode ulang + JSON box '
+                            '(butuh --decoder pyav)')
+    
     parser.add_argument('--webcam', action='store_true',
                        help='Gunakan webcam default (untuk testing tanpa kamera Hikvision)')
     
     parser.add_argument('--video', type=str,
                        help='Path ke file video untuk testing')
     
+    parser.add_argument('--decoder', type=str, choices=['opencv', 'pyav'], default='opencv',
+                       help='Decoder stream untuk --rtsp / --video (pyav: RTSP over TCP dengan timeout, '
+                            'decode multi-thread; butuh pip install av)')
+    
+    parser.add_argument('--max-reconnect', type=int, default=0,
+                       help='Maksimal reconnect berturut-turut sebelum berhenti (default: 0 = tanpa batas, '
+                            'jeda exponential backoff 1-60 detik)')
+    
+    parser.add_argument('--headless', action='store_true',
+                       help='Tanpa window display, frame hanya di-render jika --save-video aktif')
+    
+    parser.add_argument('--stats-interval', type=float, default=10.0,
+                       help='Log FPS + waktu per stage dan kedalaman antrian pipeline setiap N detik '
+                            '(default: 10, 0 = hanya di akhir)')
+    
     return parser.parse_args()
 
 
@@ -69,12 +100,16 @@ def main():
     logger.info("="*50)
     
     # Inisialisasi detector
-    detector = HumanDetector(model_path=args.model, conf_threshold=args.conf)
+    detector = HumanDetector(model_path=args.model, conf_threshold=args.conf, backend=args.backend)
     
-    if not detector.load_model():
+    if not detector.load_model(warmup=True):
         logger.error("Gagal load model. Program dihentikan.")
         return
     
+    # Histogram latency per stage (ditampilkan di statistik akhir)
+    latency = LatencyRecorder()
+    detector.set_latency_recorder(latency)
+    
     # Inisialisasi camera/video source
     camera = None
     
@@ -82,7 +117,7 @@ def main():
         # Gunakan file video
         logger.info(f"Menggunakan video file: {args.video}")
         rtsp_url = args.video
-        camera = HikvisionCamera(rtsp_url, camera_name="Video File")
+        camera = HikvisionCamera(rtsp_url, camera_name="Video File", decoder=args.decoder)
     elif args.webcam:
         # Gunakan webcam
         logger.info("Menggunakan webcam default")
@@ -91,7 +126,9 @@ def main():
     elif args.rtsp:
         # Gunakan RTSP stream dari Hikvision
         logger.info(f"Menggunakan RTSP stream dari kamera Hikvision")
-        camera = HikvisionCamera(args.rtsp, camera_name="Hikvision DS-2CD2120F-I")
+        # Threaded reader: frame lama di-drop jika deteksi lebih lambat dari FPS camera
+        camera = HikvisionCamera(args.rtsp, camera_name="Hikvision DS-2CD2120F-I", threaded=True,
+                                 decoder=args.decoder)
     else:
         # Default: gunakan contoh RTSP URL
         logger.warning("Tidak ada video source yang dipilih!")
@@ -104,6 +141,13 @@ def main():
         logger.info("     python src/main.py --video path/to/video.mp4")
         return
     
+    # Klip event: ring buffer packet terkompresi, dipasang sebelum connect
+    clip_recorder = None
+    if args.clips:
+        clip_recorder = EventClipRecorder.from_config(camera.camera_name, True)
+        if not clip_recorder.attach(camera):
+            clip_recorder = None
+    
     # Koneksi ke camera
     if not camera.connect():
         logger.error("Gagal terkoneksi ke camera. Program dihentikan.")
@@ -123,77 +167,143 @@ def main():
             )
             logger.info(f"Video akan disimpan ke: {args.output}")
     
-    # Main loop
-    logger.info("Memulai detection loop. Tekan 'q' untuk keluar, 's' untuk screenshot")
+    # Snapshot (tombol 's') di-encode + ditulis di background, loop deteksi tidak tertahan disk
+    snapshot_writer = SnapshotWriter(output_dir='outputs/frames')
+    
+    # Pipeline: capture -> inference -> render/display -> write, masing-masing di thread sendiri.
+    # Live stream: antrian drop-oldest (inference selalu di frame terbaru, render / write tidak
+    # pernah menahan deteksi). File video: antrian menunggu (backpressure) agar semua frame diproses.
+    lossless = bool(args.video)
+    display = not args.headless
+    pipeline = FramePipeline()
+    inference_queue = pipeline.add_queue('inference', DEFAULT_PIPELINE_CONFIG['inference_queue'], lossless)
+    render_queue = None
+    if display or video_writer is not None:
+        render_queue = pipeline.add_queue('render', DEFAULT_PIPELINE_CONFIG['render_queue'], lossless)
+    write_queue = None
+    if video_writer is not None:
+        write_queue = pipeline.add_queue('write', DEFAULT_PIPELINE_CONFIG['write_queue'], lossless)
     
     fps = 0
-    frame_time = time.time()
+    frame_times = deque(maxlen=30)  # FPS rata-rata 30 frame terakhir (bukan 1/dt satu frame)
     reconnect_attempts = 0
-    max_reconnect_attempts = 5
+    max_reconnect_attempts = args.max_reconnect
     
-    try:
-        while True:
-            # Baca frame
-            ret, frame = camera.read_frame()
+    def capture():
+        """Stage capture: baca frame (+ reconnect dengan exponential backoff + jitter)"""
+        nonlocal reconnect_attempts
+        ret, frame = camera.read_frame()
+        
+        if not ret:
+            logger.warning("Gagal membaca frame dari kamera")
             
-            if not ret:
-                logger.warning("Gagal membaca frame dari kamera")
+            reconnect_attempts += 1
+            if not max_reconnect_attempts or reconnect_attempts <= max_reconnect_attempts:
+                logger.info(f"Mencoba reconnect ({reconnect_attempts}/{max_reconnect_attempts or '-'})...")
+                if camera.reconnect():
+                    reconnect_attempts = 0
+                    return None
+                delay = backoff_delay(reconnect_attempts)
+                logger.info(f"Reconnect gagal, coba lagi dalam {delay:.1f} detik")
+                time.sleep(delay)
+            else:
+                logger.error("Maksimal reconnect attempts tercapai. Program dihentikan.")
+                pipeline.stop()
+            return None
+        
+        # Reset reconnect counter jika berhasil baca frame
+        reconnect_attempts = 0
+        return frame, camera.frame_timestamp, camera.frame_pts
+    
+    def infer(item):
+        """Stage inference: deteksi manusia (detect-only, tanpa menyentuh pixel)"""
+        nonlocal fps
+        frame, capture_time, frame_pts = item
+        latency.record_since('decode_wait', capture_time)
+        
+        detect_start = time.time()
+        detections = detector.detect(frame)
+        latency.record_since('detect', detect_start)
+        latency.record_since('capture_to_detection', capture_time)
+        human_count = len(detections)
+        
+        if clip_recorder is not None:
+            clip_recorder.update(detections, capture_time, frame_pts)
+        
+        # Hitung FPS deteksi
+        frame_times.append(time.time())
+        if len(frame_times) > 1:
+            fps = (len(frame_times) - 1) / (frame_times[-1] - frame_times[0])
+        
+        # Log deteksi jika ada manusia terdeteksi
+        if human_count > 0:
+            logger.info(f"Terdeteksi {human_count} orang dengan confidence: " +
+                       ", ".join([f"{conf:.2f}" for conf in detections.confidence.tolist()]))
+        
+        # Render hanya jika ada consumer (window display / video writer)
+        if render_queue is None:
+            return None
+        return frame, detections, fps
+    
+    def render(item):
+        """Stage render: gambar box + overlay, tampilkan (main thread) jika tidak headless"""
+        frame, detections, frame_fps = item
+        annotated_frame = detector.annotate(frame, detections)
+        annotated_frame = detector.add_info_overlay(annotated_frame, len(detections), frame_fps)
+        if display:
+            cv2.imshow('Human Detection - Hikvision Camera', annotated_frame)
+        return annotated_frame
+    
+    def write(annotated_frame):
+        """Stage write: encode frame ke video output"""
+        video_writer.write(annotated_frame)
+    
+    pipeline.add_stage('capture', capture, output_queue=inference_queue)
+    pipeline.add_stage('inference', infer, inference_queue, render_queue)
+    render_stage = None
+    if render_queue is not None:
+        # HighGUI (imshow / waitKey) harus di main thread
+        render_stage = pipeline.add_stage('render', render, render_queue, write_queue, threaded=not display)
+    if write_queue is not None:
+        pipeline.add_stage('write', write, write_queue, drain=True)
+    
+    # Main loop
+    logger.info("Memulai detection pipeline. Tekan 'q' untuk keluar, 's' untuk screenshot")
+    
+    last_frame = None
+    last_stats = time.time()
+    
+    try:
+        pipeline.start()
+        while not pipeline.stopping:
+            if not display:
+                pipeline.wait(1.0)
+            else:
+                annotated_frame = render_stage.step(timeout=0.01)
+                if annotated_frame is not None:
+                    last_frame = annotated_frame
                 
-                # Coba reconnect
-                reconnect_attempts += 1
-                if reconnect_attempts <= max_reconnect_attempts:
-                    logger.info(f"Mencoba reconnect ({reconnect_attempts}/{max_reconnect_attempts})...")
-                    if camera.reconnect():
-                        reconnect_attempts = 0
-                        continue
-                    time.sleep(2)
-                else:
-                    logger.error("Maksimal reconnect attempts tercapai. Program dihentikan.")
+                # Handle keyboard input
+                key = cv2.waitKey(1) & 0xFF
+                
+                if key == ord('q'):
+                    # Quit
+                    logger.info("Program dihentikan oleh user")
                     break
-                continue
-            
-            # Reset reconnect counter jika berhasil baca frame
-            reconnect_attempts = 0
+                elif key == ord('s') and last_frame is not None:
+                    # Save snapshot
+                    snapshot_path = camera.save_snapshot(last_frame, 'outputs/frames', snapshot_writer)
+                    if snapshot_path:
+                        logger.info(f"Snapshot diantrikan: {snapshot_path}")
+                elif key == ord('r'):
+                    # Reset statistics
+                    detector.reset_statistics()
+                    logger.info("Statistik di-reset")
             
-            # Deteksi manusia
-            annotated_frame, detections, human_count = detector.detect_humans(frame)
-            
-            # Tambahkan info overlay
-            annotated_frame = detector.add_info_overlay(annotated_frame, human_count, fps)
-            
-            # Hitung FPS
-            current_time = time.time()
-            fps = 1 / (current_time - frame_time)
-            frame_time = current_time
-            
-            # Tampilkan frame
-            cv2.imshow('Human Detection - Hikvision Camera', annotated_frame)
-            
-            # Simpan video jika diaktifkan
-            if video_writer is not None:
-                video_writer.write(annotated_frame)
-            
-            # Log deteksi jika ada manusia terdeteksi
-            if human_count > 0:
-                logger.info(f"Terdeteksi {human_count} orang dengan confidence: " + 
-                           ", ".join([f"{d['confidence']:.2f}" for d in detections]))
-            
-            # Handle keyboard input
-            key = cv2.waitKey(1) & 0xFF
-            
-            if key == ord('q'):
-                # Quit
-                logger.info("Program dihentikan oleh user")
-                break
-            elif key == ord('s'):
-                # Save snapshot
-                snapshot_path = camera.save_snapshot(annotated_frame)
-                if snapshot_path:
-                    logger.info(f"Snapshot disimpan: {snapshot_path}")
-            elif key == ord('r'):
-                # Reset statistics
-                detector.reset_statistics()
-                logger.info("Statistik di-reset")
+            # Kedalaman antrian + waktu per stage
+            if args.stats_interval and time.time() - last_stats >= args.stats_interval:
+                logger.info(f"Pipeline: {pipeline.format_stats()}")
+                last_stats = time.time()
     
     except KeyboardInterrupt:
         logger.info("Program dihentikan dengan Ctrl+C")
@@ -202,8 +312,9 @@ def main():
         logger.error(f"Error tidak terduga: {str(e)}", exc_info=True)
     
     finally:
-        # Cleanup
+        # Cleanup (sisa antrian write tetap ditulis ke video)
         logger.info("Membersihkan resources...")
+        pipeline.stop()
         
         # Tampilkan statistik akhir
         stats = detector.get_statistics()
@@ -212,18 +323,31 @@ def main():
         logger.info(f"  Total Frames: {stats['total_frames']}")
         logger.info(f"  Total Deteksi: {stats['total_detections']}")
         logger.info(f"  Rata-rata deteksi per frame: {stats['average_detections_per_frame']:.2f}")
+        for stage, histogram in latency.snapshot()['stages'].items():
+            logger.info(f"  Latency {stage}: p50 {histogram['p50_ms']:.1f} ms, p99 {histogram['p99_ms']:.1f} ms")
+        pipeline_stats = pipeline.get_stats()
+        for name, stage in pipeline_stats['stages'].items():
+            logger.info(f"  Stage {name}: {stage['items']} frames, {stage['fps']:.1f} FPS, "
+                        f"p50 {stage['p50_ms'] or 0:.1f} ms, p99 {stage['p99_ms'] or 0:.1f} ms, "
+                        f"{stage['utilization']:.0%} busy")
+        for name, queue in pipeline_stats['queues'].items():
+            logger.info(f"  Antrian {name}: {queue['dropped']}/{queue['put']} frame di-drop, "
+                        f"max {queue['max_depth']}/{queue['maxsize']}, wait p99 {queue['wait_p99_ms'] or 0:.1f} ms")
         logger.info("="*50)
         
         # Release resources
+        snapshot_writer.stop()
+        if clip_recorder is not None:
+            clip_recorder.close()
         if video_writer is not None:
             video_writer.release()
             logger.info("Video output disimpan")
         
         camera.disconnect()
-        cv2.destroyAllWindows()
+        if display:
+            cv2.destroyAllWindows()
         
         logger.info("Program selesai")
 
-
 if __name__ == "__main__":
     main()
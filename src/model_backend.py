@@ -0,0 +1,176 @@
+"""
+Model Backend Module
+Pilih backend inference CPU (PyTorch / ONNX Runtime / OpenVINO) untuk HumanDetector
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+import time
+from pathlib import Path
+
+from ultralytics import YOLO
+
+logger = logging.getLogger(__name__)
+
+# Backend yang didukung. Model hasil export di-cache di folder 'cache' di sebelah
+# file .pt, dengan key hash isi file .pt + backend + imgsz export
+# (contoh: models/cache/yolov8n-1a2b3c4d5e6f7a8b-onnx-640/yolov8n.onnx).
+# imgsz ikut di key walaupun export dynamic: kalibrasi INT8 (dan export statis)
+# hanya valid untuk ukuran input saat export.
+# Backend dengan 'calibration' butuh data kalibrasi -> buat dengan quantize_model.py
+BACKENDS = {
+    'pytorch': None,
+    'onnx': {
+        'format': 'onnx',
+        'suffix': '.onnx',
+        'export_args': {'dynamic': True, 'simplify': True},
+    },
+    'openvino': {
+        'format': 'openvino',
+        'suffix': '_openvino_model',
+        'export_args': {'dynamic': True},
+    },
+    'openvino-int8': {
+        'format': 'openvino',
+        'suffix': '_int8_openvino_model',
+        'export_args': {'dynamic': True, 'int8': True},
+        'calibration': True,
+    },
+}
+
+
+def detect_backend(model_path):
+    """
+    Tebak backend dari nama file model
+
+    Args:
+        model_path (str): Path model (.pt, .onnx, atau folder *_openvino_model)
+
+    Returns:
+        str: Nama backend
+    """
+    path = str(model_path).rstrip('/')
+    if path.endswith('.onnx'):
+        return 'onnx'
+    if path.endswith('_int8_openvino_model'):
+        return 'openvino-int8'
+    if path.endswith('_openvino_model'):
+        return 'openvino'
+    return 'pytorch'
+
+
+# Hash per (path, mtime, size) agar file besar tidak di-hash ulang dalam satu proses
+_hash_cache = {}
+
+
+def model_hash(model_path):
+    """
+    Hash isi file model (sha256, 16 karakter pertama)
+
+    Args:
+        model_path (str): Path file model
+
+    Returns:
+        str: Hash hex
+    """
+    path = Path(model_path)
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    if key not in _hash_cache:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        _hash_cache[key] = digest.hexdigest()[:16]
+    return _hash_cache[key]
+
+
+def exported_model_path(model_path, backend, imgsz=640, cache_dir=None):
+    """
+    Path model hasil export untuk backend tertentu di cache
+
+    Args:
+        model_path (str): Path model PyTorch (.pt)
+        backend (str): Nama backend
+        imgsz (int): Ukuran input saat export
+        cache_dir (str): Folder cache (default: folder 'cache' di sebelah .pt)
+
+    Returns:
+        Path: Lokasi model hasil export
+    """
+    spec = BACKENDS[backend]
+    path = Path(model_path)
+    cache_dir = Path(cache_dir) if cache_dir else path.parent / 'cache'
+    return cache_dir / f"{path.stem}-{model_hash(path)}-{backend}-{imgsz}" / (path.stem + spec['suffix'])
+
+
+def resolve_model_path(model_path, backend='pytorch', imgsz=640, data=None, force=False, cache_dir=None):
+    """
+    Dapatkan path model yang siap di-load untuk backend yang dipilih.
+    Jika belum ada, model .pt di-export sekali lalu disimpan di cache
+    (key: hash file .pt + backend + imgsz), sehingga restart tidak export ulang.
+
+    Args:
+        model_path (str): Path model (.pt atau model yang sudah di-export)
+        backend (str): 'pytorch', 'onnx', 'openvino', atau 'openvino-int8'
+        imgsz (int): Ukuran input saat export
+        data (str): Dataset YAML kalibrasi (wajib untuk export INT8)
+        force (bool): Export ulang walaupun cache sudah ada
+        cache_dir (str): Folder cache (default: folder 'cache' di sebelah .pt)
+
+    Returns:
+        str: Path model untuk YOLO()
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend tidak dikenal: {backend} (pilihan: {', '.join(BACKENDS)})")
+
+    # Model sudah dalam format backend (atau backend pytorch), langsung pakai
+    if BACKENDS[backend] is None or detect_backend(model_path) == backend:
+        return str(model_path)
+
+    if not str(model_path).endswith('.pt'):
+        raise ValueError(f"Export ke {backend} membutuhkan model .pt, bukan {model_path}")
+
+    target = exported_model_path(model_path, backend, imgsz, cache_dir)
+
+    # Cache valid selama isi file .pt dan imgsz sama (keduanya ada di nama folder)
+    if not force and target.exists():
+        logger.info(f"Menggunakan model {backend} dari cache: {target}")
+        return str(target)
+
+    spec = BACKENDS[backend]
+    export_args = dict(spec['export_args'])
+    if spec.get('calibration'):
+        if data is None:
+            raise ValueError(f"Model {target} belum ada. Buat dulu dengan kalibrasi dari rekaman sendiri: "
+                             f"python quantize_model.py --model {model_path} --imgsz {imgsz} --clips <video...>")
+        export_args['data'] = data
+
+    logger.info(f"Export model {model_path} ke {backend} (sekali saja, hasil di-cache)...")
+    start = time.time()
+    exported = YOLO(str(model_path)).export(format=spec['format'], imgsz=imgsz, **export_args)
+
+    # ultralytics menulis hasil export di sebelah .pt -> pindahkan ke folder cache
+    if target.is_dir():
+        shutil.rmtree(target)
+    elif target.exists():
+        target.unlink()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(str(exported), str(target))
+
+    manifest = {
+        'source': str(model_path),
+        'sha256': model_hash(model_path),
+        'backend': backend,
+        'imgsz': imgsz,
+        'export_args': {k: v for k, v in export_args.items() if k != 'data'},
+        'export_seconds': round(time.time() - start, 1),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    with open(target.parent / 'manifest.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    logger.info(f"Model {backend} disimpan: {target} ({manifest['export_seconds']} detik)")
+    return str(target)
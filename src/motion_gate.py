@@ -0,0 +1,135 @@
+"""
+Motion Gate Module
+Deteksi perubahan frame yang murah (frame differencing pada frame kecil)
+untuk melewati inference YOLO saat scene statis
+"""
+
+import time
+
+import cv2
+
+from detections import Detections
+
+# Default, bisa di-override per camera
+DEFAULT_MOTION_CONFIG = {
+    'enabled': True,
+    'width': 160,                # Lebar frame kecil untuk differencing
+    'pixel_threshold': 25,       # Selisih intensitas minimal agar pixel dianggap berubah
+    'min_changed_ratio': 0.002,  # Rasio pixel berubah minimal agar dianggap ada gerakan
+    'max_staleness': 5.0,        # Detik - inference penuh tetap dijalankan minimal setiap interval ini
+}
+
+
+class MotionGate:
+    """
+    Gate per camera di depan HumanDetector
+
+    Frame dibandingkan dengan frame referensi (frame saat inference terakhir).
+    Jika tidak ada perubahan, hasil deteksi terakhir dipakai ulang.
+    """
+
+    def __init__(self, width=160, pixel_threshold=25, min_changed_ratio=0.002, max_staleness=5.0):
+        """
+        Args:
+            width (int): Lebar frame kecil untuk differencing
+            pixel_threshold (int): Selisih intensitas minimal (0-255)
+            min_changed_ratio (float): Rasio pixel berubah minimal (0-1)
+            max_staleness (float): Maksimal umur hasil deteksi (detik) sebelum inference dipaksa
+        """
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_ratio = min_changed_ratio
+        self.max_staleness = max_staleness
+
+        self.reference = None
+        self.motion_mask = None  # Mask perubahan (ukuran frame kecil) dari check terakhir
+        self.has_motion = True   # Check terakhir menemukan gerakan (bukan sekadar staleness)
+        self.last_detections = Detections.empty()
+        self.last_inference_time = 0.0
+        self._current = None
+
+        # Statistik
+        self.inference_count = 0
+        self.skipped_count = 0
+
+    @classmethod
+    def from_config(cls, config=None):
+        """
+        Buat MotionGate dari dict konfigurasi
+
+        Args:
+            config (dict): Override untuk DEFAULT_MOTION_CONFIG (False = nonaktif)
+
+        Returns:
+            MotionGate atau None jika dinonaktifkan
+        """
+        if config is False:
+            return None
+
+        options = dict(DEFAULT_MOTION_CONFIG)
+        options.update(config or {})
+        if not options.pop('enabled'):
+            return None
+
+        return cls(**options)
+
+    def _preprocess(self, frame):
+        """Downscale + grayscale + blur"""
+        height, width = frame.shape[:2]
+        small_height = max(1, int(height * self.width / width))
+        small = cv2.resize(frame, (self.width, small_height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def should_infer(self, frame):
+        """
+        Cek apakah frame perlu inference
+
+        Args:
+            frame: Frame dari camera
+
+        Returns:
+            bool: True jika ada gerakan atau hasil terakhir sudah terlalu lama
+        """
+        self._current = self._preprocess(frame)
+
+        if self.reference is None or self.reference.shape != self._current.shape:
+            self.motion_mask = None
+            self.has_motion = True
+            return True
+
+        diff = cv2.absdiff(self._current, self.reference)
+        _, self.motion_mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+
+        changed_ratio = cv2.countNonZero(self.motion_mask) / self.motion_mask.size
+        self.has_motion = changed_ratio >= self.min_changed_ratio
+        if self.has_motion:
+            return True
+
+        if time.time() - self.last_inference_time >= self.max_staleness:
+            return True
+
+        self.skipped_count += 1
+        return False
+
+    def mark_inferred(self, detections):
+        """
+        Simpan hasil inference dan jadikan frame saat ini sebagai referensi
+
+        Args:
+            detections (Detections): Hasil inference untuk frame terakhir di should_infer()
+        """
+        self.reference = self._current
+        self.last_detections = detections
+        self.last_inference_time = time.time()
+        self.inference_count += 1
+
+    def get_stats(self):
+        """Statistik gate"""
+        total = self.inference_count + self.skipped_count
+        return {
+            'inferences': self.inference_count,
+            'skipped': self.skipped_count,
+            'skip_ratio': self.skipped_count / total if total > 0 else 0
+        }
@@ -12,6 +12,18 @@ from datetime import datetime
 from pathlib import Path
 from queue import Queue
 from detector import HumanDetector
+from camera_stream import HikvisionCamera, DEFAULT_IDLE_DECODE_CONFIG
+from connection_manager import ConnectionManager, backoff_delay
+from dual_stream import MainstreamEvidence, mainstream_url
+from event_clips import EventClipRecorder
+from inference_scheduler import BatchInferenceScheduler
+from inference_pool import InferenceWorkerPool
+from motion_gate import MotionGate
+from roi import RegionOfInterest
+from tiling import TileLayout
+from latency_controller import ResolutionController
+from latency_trace import LatencyRecorder
+from snapshot_writer import SnapshotWriter
 
 # Setup logging
 logging.basicConfig(
@@ -32,20 +44,70 @@ class CameraProcessor:
     Dijalankan di thread terpisah
     """
     
-    def __init__(self, camera_config, detector, display_queue=None):
+    def __init__(self, camera_config, detector, display_queue=None, scheduler=None, motion_config=None,
+                 connection_manager=None, snapshot_writer=None):
         """
         Args:
             camera_config (dict): Konfigurasi camera
             detector (HumanDetector): Shared detector instance
             display_queue (Queue): Queue untuk hasil display (optional)
+            scheduler (BatchInferenceScheduler): Shared batch scheduler / InferenceWorkerPool (optional)
+            motion_config (dict): Default motion gate config (None = disabled),
+                overridden by camera_config['motion'] (False = disabled for this camera)
+            connection_manager (ConnectionManager): Shared connect / reconnect supervisor (optional,
+                without it the processor reconnects itself with exponential backoff)
+            snapshot_writer (SnapshotWriter): Shared background JPEG writer for evidence crops
+                (optional, without it crops are written synchronously)
         """
         self.config = camera_config
         self.camera_name = camera_config['name']
         self.rtsp_url = camera_config['rtsp_url']
         self.detector = detector
         self.display_queue = display_queue
+        self.scheduler = scheduler
+        self.connection_manager = connection_manager
+        self.snapshot_writer = snapshot_writer
+        
+        # Motion gate: skip inference on static scenes
+        self.motion_gate = None
+        camera_motion = camera_config.get('motion')
+        if motion_config and camera_motion is not False:
+            self.motion_gate = MotionGate.from_config({**motion_config, **(camera_motion or {})})
+        
+        # Region of interest: cropped inference + polygon filtering
+        self.roi = RegionOfInterest.from_config(camera_config.get('roi'))
+        
+        # Tiled inference for long-range cameras (small, distant people)
+        self.tiling = TileLayout.from_config(camera_config.get('tiling'))
+        
+        # Threaded reader: always process the newest frame, stale frames are dropped
+        self.camera = HikvisionCamera(self.rtsp_url, self.camera_name,
+                                      threaded=camera_config.get('threaded', True),
+                                      decoder=camera_config.get('decoder', 'opencv'),
+                                      decoder_options=camera_config.get('decoder_options'),
+                                      output_size=self._decode_size(camera_config.get('decode_size')))
+        
+        # Dual stream: detect on this (sub)stream, crop people from the closest mainstream frame
+        self.mainstream = MainstreamEvidence.from_config(
+            camera_config.get('mainstream_url') or mainstream_url(self.rtsp_url),
+            self.camera_name, camera_config.get('dual_stream'))
+        self.last_evidence = None
+        self._inferred = False  # _detect() dipanggil untuk frame ini (bukan hasil motion gate / tracker)
+        
+        # Event clips: compressed packet ring buffer, pre/post-roll remuxed to MP4 (PyAV decoder only)
+        self.clips = EventClipRecorder.from_config(self.camera_name, camera_config.get('clips'))
+        if self.clips is not None and not self.clips.attach(self.camera):
+            self.clips = None
+        
+        # Reduced decoding (keyframes only) while the camera is idle, PyAV decoder only
+        self.idle_decode = None
+        idle_decode = camera_config.get('idle_decode')
+        if idle_decode:
+            self.idle_decode = dict(DEFAULT_IDLE_DECODE_CONFIG)
+            if isinstance(idle_decode, dict):
+                self.idle_decode.update(idle_decode)
+        self.last_activity = time.time()
         
-        self.cap = None
         self.is_running = False
         self.frame_count = 0
         self.detection_count = 0
@@ -57,35 +119,86 @@ class CameraProcessor:
         
         logger.info(f"Initialized processor for {self.camera_name}")
     
+    def _decode_size(self, decode_size):
+        """
+        Resolve 'decode_size' (downscale in the decoder, long side in pixels)
+        
+        True = largest inference size of the detector, int = explicit size.
+        """
+        if not decode_size:
+            return None
+        if self.tiling is not None:
+            # Tiles need the full resolution to find small people
+            logger.warning(f"{self.camera_name}: decode_size ignored for tiled camera")
+            return None
+        if self.roi is not None and not self.roi.normalized:
+            logger.warning(f"{self.camera_name}: decode_size with pixel ROI coordinates, "
+                           f"use normalized (0-1) coordinates instead")
+        if decode_size is True:
+            controller = self.detector.resolution_controller
+            return max(controller.sizes) if controller is not None else self.detector.imgsz
+        return int(decode_size)
+    
     def connect(self):
         """Connect to camera"""
-        try:
-            logger.info(f"{self.camera_name}: Connecting to {self.rtsp_url}")
-            self.cap = cv2.VideoCapture(self.rtsp_url)
-            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce latency
-            
-            if self.cap.isOpened():
-                width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                logger.info(f"{self.camera_name}: Connected! Resolution: {width}x{height}")
-                return True
-            else:
-                logger.error(f"{self.camera_name}: Failed to connect")
-                return False
-        except Exception as e:
-            logger.error(f"{self.camera_name}: Connection error: {str(e)}")
-            return False
+        logger.info(f"{self.camera_name}: Connecting to {self.rtsp_url}")
+        self.camera.disconnect()
+        
+        if self.camera.connect():
+            info = self.camera.get_frame_info()
+            logger.info(f"{self.camera_name}: Connected! Resolution: {info['width']}x{info['height']}")
+            return True
+        
+        logger.error(f"{self.camera_name}: Failed to connect")
+        return False
     
     def process_frame(self):
-        """Process single frame"""
-        ret, frame = self.cap.read()
+        """
+        Process single frame (detect-only, rendering dilakukan oleh consumer)
+        
+        Returns:
+            tuple: (frame, detections) atau None jika gagal baca frame
+        """
+        ret, frame = self.camera.read_frame()
         
         if not ret:
             logger.warning(f"{self.camera_name}: Failed to read frame")
             return None
         
-        # Run detection
-        annotated_frame, detections, human_count = self.detector.detect_humans(frame)
+        # Decode time of this frame (capture reference for end-to-end latency)
+        recorder = self.detector.latency_recorder
+        capture_time = self.camera.frame_timestamp
+        if recorder is not None:
+            recorder.record_since('decode_wait', capture_time)
+        
+        # Motion gate (within the ROI crop): reuse last result if nothing changed
+        gate_frame = self.roi.crop(frame)[0] if self.roi is not None else frame
+        self._inferred = False
+        if self.motion_gate is not None and not self.motion_gate.should_infer(gate_frame):
+            detections = self.motion_gate.last_detections
+        else:
+            # Tracker (if enabled) runs full inference only every N frames
+            detect_start = time.time()
+            detections = self.detector.track(frame, self.roi, self.camera_name, self._detect)
+            # Tracker prediction only: not a gate reference, not a 'detect' latency sample
+            if self._inferred:
+                if recorder is not None:
+                    recorder.record_since('detect', detect_start)
+                if self.motion_gate is not None:
+                    self.motion_gate.mark_inferred(detections)
+        # Only frames that ran inference (reused / predicted results would flood p50 with ~0 ms)
+        if recorder is not None and self._inferred:
+            recorder.record_since('capture_to_detection', capture_time)
+        human_count = len(detections)
+        
+        if self.idle_decode is not None:
+            self._update_decode_mode(human_count)
+        
+        if self.mainstream is not None:
+            self._fetch_evidence(frame, detections)
+        
+        if self.clips is not None:
+            self.clips.update(detections, capture_time, self.camera.frame_pts, self.camera.output_scale)
         
         # Update statistics
         self.frame_count += 1
@@ -100,23 +213,76 @@ class CameraProcessor:
             self.fps_counter = 0
             self.fps_start_time = time.time()
         
-        # Add camera info overlay
-        self._add_overlay(annotated_frame, human_count)
-        
         # Log detection
         if human_count > 0:
             logger.info(f"{self.camera_name}: Detected {human_count} person(s)")
         
-        return annotated_frame
+        return frame, detections
     
-    def _add_overlay(self, frame, human_count):
-        """Add camera info overlay"""
-        height, width = frame.shape[:2]
+    def _fetch_evidence(self, frame, detections):
+        """Full-resolution person crops from the mainstream (only when people are detected)"""
+        self.mainstream.update_activity(len(detections))
+        if len(detections) == 0 or not self.mainstream.due():
+            return
         
-        # Background
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (10, 10), (350, 100), (0, 0, 0), -1)
-        cv2.addWeighted(frame, 0.6, overlay, 0.4, 0, frame)
+        evidence = self.mainstream.extract(detections, frame.shape, self.camera.frame_timestamp)
+        if evidence is not None:
+            self.last_evidence = evidence
+            self.mainstream.save(evidence, self.snapshot_writer)
+    
+    def _update_decode_mode(self, human_count):
+        """Switch to reduced decoding when idle, back to full decoding on activity"""
+        now = time.time()
+        has_motion = self.motion_gate is not None and self.motion_gate.has_motion
+        if human_count > 0 or has_motion:
+            self.last_activity = now
+            self.camera.set_decode_mode('all')
+        elif now - self.last_activity >= self.idle_decode['idle_after']:
+            self.camera.set_decode_mode(self.idle_decode['mode'])
+    
+    def _detect(self, frame):
+        """Run detection (tiled, lewat batch scheduler, atau langsung)"""
+        self._inferred = True
+        if self.tiling is not None:
+            # Tiles are already batched inside detect_tiled()
+            motion_mask, previous = None, None
+            if self.motion_gate is not None:
+                motion_mask = self.motion_gate.motion_mask
+                previous = self.motion_gate.last_detections
+            return self.detector.detect_tiled(frame, self.tiling, self.roi, motion_mask, previous, self.camera_name)
+        
+        if self.scheduler is not None:
+            return self.scheduler.detect(frame, self.roi, self.camera_name)
+        return self.detector.detect(frame, self.roi, self.camera_name)
+    
+    def render(self, frame, detections, size=None):
+        """
+        Render detections + camera info (only called when a frame is displayed)
+        
+        Args:
+            frame: Raw frame from process_frame()
+            detections (Detections): Detections for the frame
+            size (tuple): Optional (width, height) to render at
+            
+        Returns:
+            New annotated frame
+        """
+        if size is not None:
+            height, width = frame.shape[:2]
+            frame = cv2.resize(frame, size)
+            detections = detections.scale(size[0] / width, size[1] / height)
+        else:
+            frame = frame.copy()
+        
+        self.detector.draw_detections(frame, detections)
+        self._add_overlay(frame, len(detections))
+        return frame
+    
+    def _add_overlay(self, frame, human_count):
+        """Add camera info overlay (in-place)"""
+        # Background - darken only the info panel
+        panel = frame[10:101, 10:351]
+        cv2.addWeighted(panel, 0.6, panel, 0, 0, dst=panel)
         
         # Text
         info = [
@@ -132,29 +298,50 @@ class CameraProcessor:
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
             y += 20
     
-    def run(self):
-        """Main processing loop"""
-        if not self.connect():
-            return
+    def _wait_for_connection(self):
+        """
+        Block until the camera is connected again (or the processor is stopped)
         
+        With a connection manager the reconnect runs in the background and this
+        thread only waits; otherwise reconnect here with jittered exponential backoff.
+        """
+        failures = 0
+        while self.is_running:
+            if self.connection_manager is not None:
+                if self.connection_manager.wait_ready(self.camera_name, timeout=1.0):
+                    return True
+                continue
+            
+            if self.connect():
+                return True
+            failures += 1
+            delay = backoff_delay(failures)
+            logger.warning(f"{self.camera_name}: Reconnect failed ({failures}x), retry in {delay:.1f}s")
+            time.sleep(delay)
+        return False
+    
+    def run(self):
+        """Main processing loop (never exits on connection errors, only on stop())"""
         self.is_running = True
         logger.info(f"{self.camera_name}: Starting processing loop")
         
         try:
             while self.is_running:
-                frame = self.process_frame()
-                
-                if frame is None:
-                    logger.warning(f"{self.camera_name}: Reconnecting...")
-                    time.sleep(2)
-                    if not self.connect():
+                if not self.camera.is_connected:
+                    if not self._wait_for_connection():
                         break
                     continue
                 
+                result = self.process_frame()
+                
+                if result is None:
+                    logger.warning(f"{self.camera_name}: Stream lost, waiting for reconnect...")
+                    continue
+                
                 # Send to display queue
                 if self.display_queue:
                     try:
-                        self.display_queue.put((self.camera_name, frame), block=False)
+                        self.display_queue.put((self.camera_name,) + result, block=False)
                     except:
                         pass  # Queue full, skip frame
                 
@@ -171,20 +358,32 @@ class CameraProcessor:
     
     def cleanup(self):
         """Cleanup resources"""
-        if self.cap:
-            self.cap.release()
+        self.camera.disconnect()
+        if self.mainstream is not None:
+            self.mainstream.camera.disconnect()
+        if self.clips is not None:
+            self.clips.close()
         
         logger.info(f"{self.camera_name}: Cleanup complete")
         logger.info(f"{self.camera_name}: Total frames: {self.frame_count}, Detections: {self.detection_count}")
     
     def get_stats(self):
         """Get statistics"""
-        return {
+        stats = {
             'name': self.camera_name,
             'frames': self.frame_count,
             'detections': self.detection_count,
-            'fps': self.fps
+            'fps': self.fps,
+            'dropped_frames': self.camera.dropped_frames,
+            'connected': self.camera.is_connected
         }
+        if self.motion_gate is not None:
+            stats['motion'] = self.motion_gate.get_stats()
+        if self.mainstream is not None:
+            stats['mainstream'] = self.mainstream.get_stats()
+        if self.clips is not None:
+            stats['clips'] = self.clips.get_stats()
+        return stats
 
 
 class MultiCameraSystem:
@@ -192,36 +391,99 @@ class MultiCameraSystem:
     System untuk manage multiple cameras
     """
     
-    def __init__(self, cameras_config, model_path='models/yolov8n.pt', conf_threshold=0.5):
+    def __init__(self, cameras_config, model_path='models/yolov8n.pt', conf_threshold=0.5,
+                 batch_size=8, max_batch_wait=0.02, backend=None, imgsz=640, motion_config=None,
+                 latency_config=None, tracking_config=None, workers=0, threads_per_worker=None,
+                 connection_config=None, snapshot_config=None):
         """
         Args:
             cameras_config (list): List of camera configurations
             model_path (str): Path to YOLOv8 model
             conf_threshold (float): Detection confidence threshold
+            batch_size (int): Max frames per inference batch (1 = no batching)
+            max_batch_wait (float): Max seconds to wait for a batch to fill
+            backend (str): Inference backend (pytorch, onnx, openvino, openvino-int8)
+            imgsz (int): Inference input size
+            motion_config (dict): Motion gate defaults for all cameras (None = disabled)
+            latency_config (dict): Adaptive imgsz / latency budget config (None = fixed imgsz)
+            tracking_config (dict): Detect-every-N-frames tracker config (None = detect every frame)
+            workers (int): Inference worker processes (0 = inference in this process)
+            threads_per_worker (int): Torch threads per worker (None = cores / workers)
+            connection_config (dict): Parallel connect / reconnect backoff / stall detection
+                (overrides DEFAULT_CONNECTION_CONFIG)
+            snapshot_config (dict): Background snapshot / evidence writer (overrides DEFAULT_SNAPSHOT_CONFIG)
         """
         self.cameras_config = cameras_config
+        self.motion_config = motion_config
         self.processors = []
         self.threads = []
         self.display_queue = Queue(maxsize=100)
         
+        # Connects all cameras in parallel, reconnects in the background
+        self.connection_manager = ConnectionManager.from_config(connection_config)
+        
+        # JPEG encode + disk writes off the camera threads (worker threads start on first snapshot)
+        self.snapshot_writer = SnapshotWriter.from_config(snapshot_config)
+        
         # Shared detector (efisien, model loaded sekali saja)
         logger.info("Loading YOLOv8 model...")
-        self.detector = HumanDetector(model_path, conf_threshold)
+        self.detector = HumanDetector(model_path, conf_threshold, backend, imgsz)
         if not self.detector.load_model():
             raise Exception("Failed to load model!")
         
+        # Adaptive inference resolution per camera under a latency budget
+        self.detector.set_resolution_controller(ResolutionController.from_config(latency_config))
+        
+        # Tracker: full inference every N frames, predicted boxes + stable IDs in between
+        self.detector.enable_tracking(tracking_config)
+        
+        # Per-stage latency histograms (decode wait, queue, inference, capture -> detection)
+        self.latency = LatencyRecorder()
+        self.detector.set_latency_recorder(self.latency)
+        
+        # Central micro-batching scheduler (or worker process pool), shared by all camera processors
+        self.scheduler = None
+        if workers > 0:
+            self.scheduler = InferenceWorkerPool(self.detector, workers, threads_per_worker, batch_size)
+        elif batch_size > 1:
+            self.scheduler = BatchInferenceScheduler(self.detector, batch_size, max_batch_wait)
+        
+        # Warm up every input size / batch shape used at runtime before cameras start
+        controller = self.detector.resolution_controller
+        self.detector.warmup(sizes=controller.sizes if controller is not None else None,
+                             batch_size=min(batch_size, len(cameras_config)))
+        
         logger.info(f"Initialized multi-camera system with {len(cameras_config)} cameras")
     
     def start(self):
         """Start all camera processors"""
         logger.info("Starting all cameras...")
         
+        if self.scheduler is not None:
+            try:
+                self.scheduler.start()
+            except RuntimeError as e:
+                logger.error(f"{e}, falling back to in-process inference")
+                self.scheduler = None
+        
         for cam_config in self.cameras_config:
-            processor = CameraProcessor(cam_config, self.detector, self.display_queue)
-            thread = threading.Thread(target=processor.run, name=cam_config['name'])
-            thread.daemon = True
-            
+            processor = CameraProcessor(cam_config, self.detector, self.display_queue, self.scheduler,
+                                        self.motion_config, self.connection_manager, self.snapshot_writer)
+            self.connection_manager.add(processor.camera)
+            if processor.mainstream is not None:
+                self.connection_manager.add(processor.mainstream.camera)
             self.processors.append(processor)
+        
+        # Startup takes as long as the slowest camera; unreachable ones keep retrying in the background
+        results = self.connection_manager.connect_all()
+        for name, connected in results.items():
+            if not connected:
+                logger.warning(f"{name}: not connected yet, retrying in background")
+        self.connection_manager.start()
+        
+        for processor in self.processors:
+            thread = threading.Thread(target=processor.run, name=processor.camera_name)
+            thread.daemon = True
             self.threads.append(thread)
             thread.start()
         
@@ -249,6 +511,7 @@ class MultiCameraSystem:
         
         # Frame buffer for each camera
         frames_buffer = {}
+        processors = {p.camera_name: p for p in self.processors}
         
         logger.info(f"Display grid: {grid_cols}x{grid_rows}")
         logger.info("Press 'q' to quit, 's' for statistics")
@@ -256,12 +519,15 @@ class MultiCameraSystem:
         try:
             while True:
                 # Get latest frames from queue
+                latest = {}
                 while not self.display_queue.empty():
-                    camera_name, frame = self.display_queue.get()
-                    
-                    # Resize frame
-                    frame_resized = cv2.resize(frame, (cell_width, cell_height))
-                    frames_buffer[camera_name] = frame_resized
+                    camera_name, frame, detections = self.display_queue.get()
+                    latest[camera_name] = (frame, detections)
+                
+                # Render only the newest frame per camera, at cell size
+                for camera_name, (frame, detections) in latest.items():
+                    frames_buffer[camera_name] = processors[camera_name].render(
+                        frame, detections, (cell_width, cell_height))
                 
                 # Create grid
                 grid = self._create_grid(frames_buffer, grid_rows, grid_cols, cell_width, cell_height)
@@ -315,6 +581,55 @@ class MultiCameraSystem:
             logger.info(f"  Frames: {stats['frames']}")
             logger.info(f"  Detections: {stats['detections']}")
             logger.info(f"  FPS: {stats['fps']:.1f}")
+            logger.info(f"  Dropped (stale) frames: {stats['dropped_frames']}")
+            if not stats['connected']:
+                connection = self.connection_manager.get_stats().get(stats['name'], {})
+                logger.info(f"  Disconnected ({connection.get('failures', 0)} failed attempts, "
+                            f"retry in {connection.get('retry_in') or 0:.0f}s)")
+            if 'motion' in stats:
+                logger.info(f"  Inference skipped (static): {stats['motion']['skip_ratio']:.0%}")
+            if 'mainstream' in stats:
+                mainstream = stats['mainstream']
+                logger.info(f"  Mainstream evidence: {mainstream['fetched']} fetched, {mainstream['missed']} missed "
+                            f"(decode: {mainstream['decode_mode']})")
+            if 'clips' in stats:
+                clips = stats['clips']
+                logger.info(f"  Event clips: {clips['clips_written']} written, buffer {clips['buffer_seconds']:.1f}s "
+                            f"({clips['buffer_bytes'] / 1e6:.1f} MB)")
+        
+        detector_stats = self.detector.get_statistics()
+        for name, tracking in detector_stats.get('tracking', {}).items():
+            logger.info(f"  {name}: {tracking['predicted_ratio']:.0%} frames predicted by tracker, "
+                        f"{tracking['active_tracks']} active tracks")
+        
+        camera_imgsz = detector_stats.get('camera_imgsz')
+        if camera_imgsz:
+            logger.info("\nInference size per camera:")
+            for name, info in camera_imgsz.items():
+                logger.info(f"  {name}: imgsz {info['imgsz']} ({info['latency_ms']:.1f} ms)")
+        
+        stages = self.latency.snapshot()['stages']
+        if stages:
+            logger.info("\nLatency per stage (p50 / p99 ms):")
+            for stage, histogram in stages.items():
+                logger.info(f"  {stage}: {histogram['p50_ms']:.1f} / {histogram['p99_ms']:.1f} "
+                            f"(n={histogram['count']})")
+        
+        snapshots = self.snapshot_writer.get_stats()
+        if snapshots['submitted']:
+            logger.info(f"\nSnapshots: {snapshots['written']} written, {snapshots['queued']} queued, "
+                        f"{snapshots['dropped']} dropped (queue full), {snapshots['failed']} failed")
+        
+        if self.scheduler is not None:
+            stats = self.scheduler.get_stats()
+            logger.info("\nInference scheduler:")
+            if 'workers' in stats:
+                logger.info(f"  Workers: {stats['workers']} (frames per worker: {stats['frames_per_worker']})")
+                logger.info(f"  Worker restarts: {stats['restarts']}, failed tasks: {stats['failed_tasks']}, "
+                            f"in-process fallbacks: {stats['fallbacks']}")
+            logger.info(f"  Batches: {stats['batches']}")
+            logger.info(f"  Avg batch size: {stats['average_batch_size']:.1f}")
+            logger.info(f"  Avg batch time: {stats['average_batch_time_ms']:.1f} ms")
         
         logger.info("=" * 60)
     
@@ -322,12 +637,17 @@ class MultiCameraSystem:
         """Stop all cameras"""
         logger.info("Stopping all cameras...")
         
+        self.connection_manager.stop()
         for processor in self.processors:
             processor.stop()
         
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        
         for thread in self.threads:
             thread.join(timeout=5)
         
+        self.snapshot_writer.stop()
         logger.info("All cameras stopped")
         self._print_statistics()
 
@@ -0,0 +1,296 @@
+"""
+Offline Analysis Module
+Analisis file video (export NVR) secepat mungkin: file dipotong di keyframe
+menjadi segmen, segmen di-decode + di-inference paralel di proses worker
+(batch, tanpa GUI), hasil per frame ditulis ke JSONL + ringkasan JSON
+"""
+
+import json
+import logging
+import multiprocessing as mp
+import os
+import time
+from pathlib import Path
+
+try:
+    import av
+except ImportError:  # PyAV dibutuhkan untuk scan keyframe + seek per segmen
+    av = None
+
+from inference_pool import _pin_worker
+
+# Default, bisa di-override dari argumen command line
+DEFAULT_OFFLINE_CONFIG = {
+    'workers': max(1, (os.cpu_count() or 2) // 2),  # Proses decode + inference
+    'threads_per_worker': None,  # Thread torch per worker (None = core / workers)
+    'batch_size': 8,             # Frame per forward pass
+    'segments_per_worker': 4,    # Segmen lebih kecil dari 1 / workers agar beban rata
+    'stride': 1,                 # Analisis setiap N frame (semua frame tetap di-decode)
+    'decode_size': True,         # Downscale di decoder (True = imgsz, None = resolusi asli)
+}
+
+# State proses worker (detector di-load sekali oleh _init_worker)
+_worker = {}
+
+
+def scan_keyframes(path):
+    """
+    Daftar keyframe tanpa decode (hanya demux packet)
+
+    Returns:
+        dict: 'keyframes' [(pts detik, index frame), ...], 'frames', 'duration',
+        'fps', 'width', 'height'
+    """
+    with av.open(str(path)) as container:
+        stream = container.streams.video[0]
+        time_base = stream.time_base
+        keyframes = []
+        frames = 0
+        first_pts, last_pts = None, 0.0
+        for packet in container.demux(stream):
+            if not packet.size:
+                continue
+            pts = packet.pts if packet.pts is not None else packet.dts
+            if pts is not None:
+                seconds = float(pts * time_base)
+                first_pts = seconds if first_pts is None else min(first_pts, seconds)
+                last_pts = max(last_pts, seconds)
+                if packet.is_keyframe:
+                    keyframes.append((seconds, frames))
+            frames += 1
+
+        rate = stream.average_rate or stream.guessed_rate
+        return {
+            'keyframes': keyframes,
+            'frames': frames,
+            'duration': last_pts - (first_pts or 0.0),
+            'fps': float(rate) if rate else None,
+            'width': stream.codec_context.width,
+            'height': stream.codec_context.height,
+        }
+
+
+def split_segments(keyframes, count):
+    """
+    Bagi video menjadi sampai `count` segmen yang dimulai di keyframe
+
+    Returns:
+        list: [(index, start pts, end pts atau None, index frame pertama), ...]
+    """
+    if not keyframes:
+        return [(0, None, None, 0)]
+    count = max(1, min(count, len(keyframes)))
+    step = len(keyframes) / count
+    starts = sorted({keyframes[int(i * step)] for i in range(count)})
+    segments = []
+    for index, (start, first_frame) in enumerate(starts):
+        end = starts[index + 1][0] if index + 1 < len(starts) else None
+        segments.append((index, start if index else None, end, first_frame))
+    return segments
+
+
+def _init_worker(options):
+    """Initializer proses worker: batasi thread BLAS / torch, load model sekali"""
+    _pin_worker(0, options['threads'], pin_cores=False)
+
+    import torch
+    from detector import HumanDetector
+
+    torch.set_num_threads(options['threads'])
+    _worker['options'] = options
+    detector = HumanDetector(options['model_path'], options['conf_threshold'], options['backend'],
+                             options['imgsz'])
+    # Gagal load tidak di-raise di sini (Pool akan terus membuat worker baru), tapi di task pertama
+    if detector.load_model():
+        detector.warmup(batch_size=options['batch_size'], runs=1)
+        _worker['detector'] = detector
+
+
+def _output_dims(width, height, size):
+    """Dimensi frame hasil downscale di decoder (sisi terpanjang = size, genap)"""
+    if not size or max(width, height) <= size:
+        return width, height
+    scale = size / max(width, height)
+    return max(2, int(round(width * scale / 2)) * 2), max(2, int(round(height * scale / 2)) * 2)
+
+
+def _analyze_segment(segment):
+    """
+    Decode + deteksi satu segmen, hasil per frame ke file part JSONL (proses worker)
+
+    Returns:
+        dict: index, part, frames (di-decode), analyzed, with_people, detections,
+        max_people, decode_s, inference_s
+    """
+    index, start, end, first_frame = segment
+    options = _worker['options']
+    detector = _worker.get('detector')
+    if detector is None:
+        raise RuntimeError(f"Worker gagal load model {options['model_path']}")
+    part = f"{options['output']}.part{index:05d}"
+    stats = {'index': index, 'part': part, 'frames': 0, 'analyzed': 0, 'with_people': 0,
+             'detections': 0, 'max_people': 0, 'decode_s': 0.0, 'inference_s': 0.0}
+
+    with av.open(options['video']) as container, open(part, 'w') as output:
+        stream = container.streams.video[0]
+        stream.thread_type = 'AUTO'
+        stream.codec_context.thread_count = options['decode_threads']
+        time_base = stream.time_base
+        width, height = stream.codec_context.width, stream.codec_context.height
+        out_width, out_height = _output_dims(width, height, options['decode_size'])
+        scale = (width / out_width, height / out_height)
+
+        if start is not None:
+            container.seek(int(round(start / time_base)), stream=stream, backward=True)
+
+        batch = []  # (frame index, pts detik, frame BGR)
+
+        def flush():
+            inference_start = time.time()
+            results = detector.detect_batch([item[2] for item in batch])
+            stats['inference_s'] += time.time() - inference_start
+            for (frame_index, pts, _), detections in zip(batch, results):
+                if scale != (1.0, 1.0):
+                    detections = detections.scale(*scale)
+                count = len(detections)
+                stats['analyzed'] += 1
+                stats['detections'] += count
+                stats['max_people'] = max(stats['max_people'], count)
+                if count:
+                    stats['with_people'] += 1
+                output.write(json.dumps({'frame': frame_index, 'pts': pts, 'human_count': count,
+                                         'detections': detections.to_list()}) + '\n')
+            batch.clear()
+
+        frame_index = first_frame
+        decode_start = time.time()
+        for frame in container.decode(stream):
+            pts = float(frame.pts * time_base) if frame.pts is not None else None
+            if start is not None and pts is not None and pts < start - 1e-6:
+                continue  # Frame sebelum batas segmen (open GOP / seek mundur)
+            if end is not None and pts is not None and pts >= end - 1e-6:
+                break
+
+            stats['frames'] += 1
+            if frame_index % options['stride'] == 0:
+                image = frame.to_ndarray(format='bgr24', width=out_width, height=out_height,
+                                         interpolation='AREA')
+                batch.append((frame_index, pts, image))
+            frame_index += 1
+
+            if len(batch) >= options['batch_size']:
+                stats['decode_s'] += time.time() - decode_start
+                flush()
+                decode_start = time.time()
+
+        stats['decode_s'] += time.time() - decode_start
+        if batch:
+            flush()
+
+    return stats
+
+
+def analyze_video(video, output, model_path='models/yolov8n.pt', conf_threshold=0.4, backend=None,
+                  imgsz=640, workers=None, threads_per_worker=None, batch_size=8, segments_per_worker=4,
+                  stride=1, decode_size=True):
+    """
+    Analisis satu file video secara paralel
+
+    Args:
+        video (str): Path file video
+        output (str): Path JSONL hasil per frame (ringkasan ke <output>.summary.json)
+        model_path, conf_threshold, backend, imgsz: Konfigurasi HumanDetector
+        workers (int): Proses worker (None = default)
+        threads_per_worker (int): Thread torch per worker (None = core / workers)
+        batch_size (int): Frame per forward pass
+        segments_per_worker (int): Jumlah segmen per worker (load balancing)
+        stride (int): Analisis setiap N frame
+        decode_size: Downscale di decoder (True = imgsz, int = sisi terpanjang, None = asli)
+
+    Returns:
+        dict: Ringkasan (juga ditulis ke <output>.summary.json)
+    """
+    if av is None:
+        raise ImportError("PyAV belum ter-install: pip install av")
+
+    logger = logging.getLogger(__name__)
+    workers = max(1, int(workers or DEFAULT_OFFLINE_CONFIG['workers']))
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    threads = threads_per_worker or max(1, cores // workers)
+    started = time.time()
+
+    info = scan_keyframes(video)
+    segments = split_segments(info['keyframes'], workers * segments_per_worker)
+    workers = min(workers, len(segments))
+    logger.info(f"{video}: {info['frames']} frames, {info['duration']:.1f}s, {len(info['keyframes'])} keyframes "
+                f"-> {len(segments)} segments on {workers} workers x {threads} threads "
+                f"(scan {time.time() - started:.1f}s)")
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    options = {
+        'video': str(video),
+        'output': str(output),
+        'model_path': model_path,
+        'conf_threshold': conf_threshold,
+        'backend': backend,
+        'imgsz': imgsz,
+        'threads': threads,
+        'decode_threads': max(1, threads // 2),
+        'batch_size': max(1, int(batch_size)),
+        'stride': max(1, int(stride)),
+        'decode_size': imgsz if decode_size is True else decode_size,
+    }
+
+    results = []
+    context = mp.get_context('spawn')
+    with context.Pool(workers, initializer=_init_worker, initargs=(options,)) as pool:
+        processing_started = time.time()
+        for stats in pool.imap_unordered(_analyze_segment, segments):
+            results.append(stats)
+            done = sum(s['frames'] for s in results)
+            elapsed = time.time() - processing_started
+            logger.info(f"Segment {stats['index'] + 1}/{len(segments)} done: {done}/{info['frames']} frames, "
+                        f"{done / elapsed:.1f} frames/s")
+
+    # Gabungkan part sesuai urutan segmen
+    results.sort(key=lambda s: s['index'])
+    with open(output, 'w') as merged:
+        for stats in results:
+            with open(stats['part']) as part:
+                for line in part:
+                    merged.write(line)
+            os.remove(stats['part'])
+
+    elapsed = time.time() - started
+    processing = time.time() - processing_started
+    frames = sum(s['frames'] for s in results)
+    analyzed = sum(s['analyzed'] for s in results)
+    summary = {
+        'video': str(video),
+        'output': str(output),
+        'resolution': [info['width'], info['height']],
+        'duration': info['duration'],
+        'fps': info['fps'],
+        'frames': frames,
+        'analyzed_frames': analyzed,
+        'frames_with_people': sum(s['with_people'] for s in results),
+        'total_detections': sum(s['detections'] for s in results),
+        'max_people': max((s['max_people'] for s in results), default=0),
+        'workers': workers,
+        'threads_per_worker': threads,
+        'segments': len(segments),
+        'batch_size': options['batch_size'],
+        'stride': options['stride'],
+        'elapsed_s': elapsed,
+        'frames_per_second': frames / processing if processing > 0 else None,
+        'analyzed_per_second': analyzed / processing if processing > 0 else None,
+        'realtime_factor': info['duration'] / elapsed if elapsed > 0 else None,
+        'decode_s': sum(s['decode_s'] for s in results),
+        'inference_s': sum(s['inference_s'] for s in results),
+    }
+    with open(f"{output}.summary.json", 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    logger.info(f"Selesai: {frames} frames dalam {elapsed:.1f}s ({summary['frames_per_second']:.1f} frames/s, "
+                f"{summary['realtime_factor']:.1f}x realtime) -> {output}")
+    return summary
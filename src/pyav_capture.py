@@ -0,0 +1,254 @@
+"""
+PyAV Capture Module
+Decoder stream berbasis PyAV (FFmpeg) dengan interface mirip cv2.VideoCapture:
+RTSP over TCP dengan timeout, decode multi-thread, PTS per frame, dan kontrol
+frame mana yang di-decode (semua / reference / keyframe saja)
+"""
+
+import logging
+from collections import deque
+
+import cv2
+
+try:
+    import av
+except ImportError:  # PyAV optional, hanya dibutuhkan untuk decoder='pyav'
+    av = None
+
+# Mode decode -> skip_frame FFmpeg decoder
+DECODE_MODES = {
+    'all': 'DEFAULT',        # Decode semua frame
+    'nonref': 'NONREF',      # Lewati frame yang tidak dipakai sebagai referensi (B-frame dll)
+    'keyframes': 'NONKEY',   # Hanya keyframe (packet non-key tidak dikirim ke decoder)
+}
+
+# Default, bisa di-override per camera lewat 'decoder_options'
+DEFAULT_PYAV_OPTIONS = {
+    'transport': 'tcp',       # RTSP transport: 'tcp' (stabil, tanpa packet loss) atau 'udp'
+    'open_timeout': 10.0,     # Detik - batas waktu buka koneksi
+    'read_timeout': 5.0,      # Detik - batas waktu tunggu packet (stream macet -> read() gagal)
+    'decode_threads': 2,      # Thread decoder per camera (0 = satu per core, mahal untuk banyak camera)
+    'thread_type': 'SLICE',   # 'SLICE' (latency rendah), 'FRAME' (throughput, menahan threads - 1 frame), 'AUTO'
+}
+
+
+class PyAVCapture:
+    """
+    Pengganti cv2.VideoCapture (isOpened/read/get/release) berbasis PyAV
+
+    Frame dikonversi ke BGR oleh scaler FFmpeg langsung ke buffer frame hasil
+    reformat; array NumPy yang dikembalikan adalah view ke buffer tersebut
+    (tanpa copy tambahan, stride baris bisa lebih besar dari width * 3).
+    """
+
+    def __init__(self, url, transport='tcp', open_timeout=10.0, read_timeout=5.0,
+                 decode_threads=2, thread_type='SLICE'):
+        """
+        Args:
+            url (str): URL RTSP atau path file video
+            transport (str): RTSP transport ('tcp' atau 'udp')
+            open_timeout (float): Timeout buka koneksi (detik)
+            read_timeout (float): Timeout baca packet (detik)
+            decode_threads (int): Jumlah thread decoder (0 = otomatis)
+            thread_type (str): Mode threading decoder FFmpeg (mode 'keyframes' selalu tanpa frame threading)
+        """
+        if av is None:
+            raise ImportError("PyAV belum ter-install: pip install av")
+
+        self.url = url
+        self.transport = transport
+        self.open_timeout = open_timeout
+        self.read_timeout = read_timeout
+        self.decode_threads = decode_threads
+        self.thread_type = thread_type
+        self.logger = logging.getLogger(__name__)
+
+        # PTS frame terakhir (detik, time base stream) - None jika stream tidak punya PTS
+        self.last_pts = None
+
+        # Callable(av.Packet) untuk setiap packet video (sebelum decode), misalnya ring buffer klip
+        self.packet_sink = None
+
+        self.decode_mode = 'all'
+        self.skipped_packets = 0
+        self._mode_changed = False
+        self._codec = None           # Decoder untuk mode 'all' / 'nonref' (awalnya context stream)
+        self._keyframe_codec = None  # Decoder keyframe tanpa frame threading (thread_type selain 'SLICE')
+        self._resync = False         # Keluar dari mode keyframe, tunggu keyframe berikutnya
+
+        self.container = None
+        self.stream = None
+        self._packets = None
+        self._frames = deque()
+        self._current = None
+        self._open()
+
+    def _open(self):
+        """Buka container dan stream video pertama"""
+        options = {}
+        if str(self.url).startswith('rtsp://'):
+            options['rtsp_transport'] = self.transport
+            options['timeout'] = str(int(self.read_timeout * 1e6))  # Socket timeout (mikrodetik)
+
+        try:
+            # timeout=(open, read) juga berlaku untuk protokol selain RTSP
+            self.container = av.open(str(self.url), options=options,
+                                     timeout=(self.open_timeout, self.read_timeout))
+            self.stream = self.container.streams.video[0]
+            self.stream.thread_type = self.thread_type
+            self.stream.codec_context.thread_count = self.decode_threads
+            self._codec = self.stream.codec_context
+            self._packets = self.container.demux(self.stream)
+        except (av.error.FFmpegError, IndexError, OSError) as e:
+            self.logger.error(f"PyAV gagal membuka {self.url}: {str(e)}")
+            self.release()
+
+    def isOpened(self):
+        return self.container is not None
+
+    def set_decode_mode(self, mode):
+        """
+        Pilih frame mana yang di-decode (boleh dipanggil dari thread lain,
+        diterapkan di read() berikutnya)
+
+        Args:
+            mode (str): 'all', 'nonref', atau 'keyframes'
+        """
+        if mode not in DECODE_MODES:
+            raise ValueError(f"Mode decode tidak dikenal: {mode} (pilihan: {', '.join(DECODE_MODES)})")
+        if mode != self.decode_mode:
+            self.decode_mode = mode
+            self._mode_changed = True
+
+    def grab(self):
+        """
+        Decode frame berikutnya (sesuai decode_mode) tanpa konversi ke BGR
+
+        Returns:
+            bool: True jika ada frame
+        """
+        self._current = None
+        if self.container is None:
+            return False
+
+        if self._mode_changed:
+            self._mode_changed = False
+            self._codec.skip_frame = DECODE_MODES[self.decode_mode]
+
+        try:
+            while not self._frames:
+                packet = next(self._packets, None)
+                if packet is None:
+                    return False
+                if self.packet_sink is not None and packet.size:
+                    self.packet_sink(packet)
+
+                # Mode keyframe: packet lain dibuang sebelum masuk decoder (hemat parsing + decode).
+                # decode_mode dibaca sekali per packet karena bisa diubah thread lain
+                mode = self.decode_mode
+                if (mode == 'keyframes' or self._resync) and packet.size and not packet.is_keyframe:
+                    self.skipped_packets += 1
+                    continue
+
+                self._frames.extend(self._decoder(mode).decode(packet))
+
+        except av.error.FFmpegError as e:
+            self.logger.warning(f"PyAV decode error: {str(e)}")
+            return False
+
+        self._current = self._frames.popleft()
+        self.last_pts = self._current.time
+        return True
+
+    def _decoder(self, mode):
+        """
+        Codec context untuk packet berikutnya
+
+        Frame threading menahan (threads - 1) frame di decoder, di mode keyframe
+        itu berarti beberapa GOP (detik). Keyframe di-decode oleh context terpisah
+        dengan slice threading; setelah kembali ke mode lain, decoding dilanjutkan
+        mulai keyframe berikutnya oleh context baru. flush_buffers() pada context
+        lama tidak cukup: dengan frame threading frame sesudahnya bisa keluar
+        dengan PTS / referensi yang bergeser satu frame sampai keyframe berikutnya.
+        """
+        if self.thread_type == 'SLICE':
+            return self._codec
+
+        if mode == 'keyframes':
+            if self._keyframe_codec is None:
+                self._keyframe_codec = self._create_codec('SLICE')
+            self._resync = True
+            return self._keyframe_codec
+
+        if self._resync:
+            self._resync = False
+            self._codec = self._create_codec(self.thread_type)
+            self._codec.skip_frame = DECODE_MODES[mode]
+        return self._codec
+
+    def _create_codec(self, thread_type):
+        """Decoder baru untuk stream ini (codec + extradata dari context stream)"""
+        codec = av.CodecContext.create(self.stream.codec_context.name, 'r')
+        codec.extradata = self.stream.codec_context.extradata
+        codec.thread_type = thread_type
+        codec.thread_count = self.decode_threads
+        return codec
+
+    @property
+    def current_frame(self):
+        """av.VideoFrame hasil grab() terakhir (belum dikonversi)"""
+        return self._current
+
+    def retrieve(self):
+        """
+        Konversi frame hasil grab() terakhir ke BGR
+
+        Returns:
+            tuple: (success, frame BGR numpy array)
+        """
+        if self._current is None:
+            return False, None
+        return True, self._current.to_ndarray(format='bgr24')
+
+    def read(self):
+        """
+        grab() + retrieve()
+
+        Returns:
+            tuple: (success, frame BGR numpy array)
+        """
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def get(self, prop):
+        """Subset property cv2.CAP_PROP_* yang dipakai sistem ini"""
+        if self.stream is None:
+            return 0
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.stream.codec_context.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.stream.codec_context.height
+        if prop == cv2.CAP_PROP_FPS:
+            rate = self.stream.average_rate or self.stream.guessed_rate
+            return float(rate) if rate else 0
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.last_pts * 1000 if self.last_pts is not None else 0
+        return 0
+
+    def set(self, prop, value):
+        """Tidak ada property yang bisa diubah (kompatibilitas cv2.VideoCapture)"""
+        return False
+
+    def release(self):
+        """Tutup container"""
+        if self.container is not None:
+            self.container.close()
+        self.container = None
+        self.stream = None
+        self._packets = None
+        self._codec = None
+        self._keyframe_codec = None
+        self._resync = False
+        self._frames.clear()
+        self._current = None
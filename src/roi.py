@@ -0,0 +1,115 @@
+"""
+Region of Interest Module
+Polygon ROI per camera: inference hanya pada area crop, deteksi di luar polygon dibuang
+"""
+
+import cv2
+import numpy as np
+
+
+class RegionOfInterest:
+    """
+    ROI berupa satu atau beberapa polygon
+
+    Koordinat boleh normalized (0-1, tidak tergantung resolusi stream) atau pixel.
+    Mask dan area crop di-compile sekali per resolusi frame lalu di-cache.
+    """
+
+    def __init__(self, polygons, anchor='bottom'):
+        """
+        Args:
+            polygons: List polygon, setiap polygon list of (x, y)
+            anchor (str): Titik box yang dicek terhadap polygon:
+                'bottom' (tengah bawah / posisi kaki) atau 'center'
+        """
+        self.polygons = [np.asarray(p, dtype=np.float32).reshape(-1, 2) for p in polygons]
+        if not self.polygons or any(len(p) < 3 for p in self.polygons):
+            raise ValueError("ROI membutuhkan minimal satu polygon dengan 3 titik")
+
+        self.normalized = max(float(p.max()) for p in self.polygons) <= 1.0
+        self.anchor = anchor
+        self._compiled = {}
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Buat ROI dari konfigurasi camera
+
+        Args:
+            config: List polygon, atau dict {'polygons': [...], 'anchor': 'bottom'}
+
+        Returns:
+            RegionOfInterest atau None jika tidak ada ROI
+        """
+        if not config:
+            return None
+        if isinstance(config, dict):
+            return cls(config['polygons'], config.get('anchor', 'bottom'))
+        return cls(config)
+
+    def compile(self, shape):
+        """
+        Compile mask dan area crop untuk resolusi frame tertentu
+
+        Args:
+            shape: frame.shape
+
+        Returns:
+            tuple: (mask, (x1, y1, x2, y2)) - mask uint8 ukuran frame, crop = bounding box semua polygon
+        """
+        height, width = shape[:2]
+        key = (height, width)
+        if key in self._compiled:
+            return self._compiled[key]
+
+        scale = np.array([width, height], dtype=np.float32) if self.normalized else 1.0
+        points = [np.round(p * scale).astype(np.int32) for p in self.polygons]
+
+        mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.fillPoly(mask, points, 255)
+
+        all_points = np.concatenate(points)
+        x1, y1 = np.clip(all_points.min(axis=0), 0, [width - 1, height - 1])
+        x2, y2 = np.clip(all_points.max(axis=0) + 1, 1, [width, height])
+
+        self._compiled[key] = (mask, (int(x1), int(y1), int(x2), int(y2)))
+        return self._compiled[key]
+
+    def crop(self, frame):
+        """
+        Crop frame ke bounding box ROI (view, tanpa copy)
+
+        Returns:
+            tuple: (cropped_frame, (offset_x, offset_y))
+        """
+        _, (x1, y1, x2, y2) = self.compile(frame.shape)
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    def filter(self, detections, shape):
+        """
+        Buang deteksi yang titik anchor-nya di luar polygon (vectorized)
+
+        Args:
+            detections (Detections): Deteksi dalam koordinat frame penuh
+            shape: frame.shape
+
+        Returns:
+            Detections: Deteksi di dalam ROI
+        """
+        if len(detections) == 0:
+            return detections
+
+        mask, _ = self.compile(shape)
+        height, width = mask.shape
+
+        boxes = detections.xyxy
+        xs = ((boxes[:, 0] + boxes[:, 2]) / 2).astype(np.int32)
+        if self.anchor == 'center':
+            ys = ((boxes[:, 1] + boxes[:, 3]) / 2).astype(np.int32)
+        else:
+            ys = boxes[:, 3].astype(np.int32)
+
+        xs = np.clip(xs, 0, width - 1)
+        ys = np.clip(ys, 0, height - 1)
+
+        return detections.select(mask[ys, xs] > 0)
@@ -0,0 +1,220 @@
+"""
+Snapshot Writer Module
+Simpan snapshot JPEG di background: antrian terbatas (penuh -> drop terlama),
+encode + tulis di thread pool, nama file unik berurutan, rate limit per camera
+"""
+
+import itertools
+import logging
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+
+# Default, bisa di-override dari config
+DEFAULT_SNAPSHOT_CONFIG = {
+    'output_dir': 'outputs/frames',  # File ke <output_dir>/<camera>/<prefix>_<waktu>_<seq>.jpg
+    'workers': 2,                    # Thread encode + tulis (cv2.imencode melepas GIL)
+    'queue_size': 64,                # Snapshot yang menunggu, penuh -> snapshot terlama di-drop
+    'batch_size': 4,                 # Snapshot yang diambil satu worker sekaligus
+    'min_interval': 1.0,             # Detik - snapshot per camera maksimal sekali per interval (force=True lewat)
+    'jpeg_quality': 90,
+}
+
+
+class SnapshotWriter:
+    """
+    Penulis snapshot asynchronous untuk semua camera
+
+    submit() hanya menyalin frame ke antrian dan langsung mengembalikan path
+    tujuan, sehingga disk yang lambat tidak pernah menahan loop deteksi.
+    Render (optional), encode JPEG dan tulis file dijalankan worker thread.
+    Nama file memakai nomor urut global, jadi snapshot beruntun di detik yang
+    sama tidak saling menimpa.
+    """
+
+    def __init__(self, output_dir='outputs/frames', workers=2, queue_size=64, batch_size=4,
+                 min_interval=1.0, jpeg_quality=90):
+        """
+        Args:
+            output_dir (str): Directory utama snapshot
+            workers (int): Jumlah worker thread
+            queue_size (int): Maksimal snapshot di antrian
+            batch_size (int): Snapshot per pengambilan worker
+            min_interval (float): Jarak minimal snapshot per camera (detik, 0 = tanpa batas)
+            jpeg_quality (int): Kualitas JPEG default (0-100)
+        """
+        self.output_dir = Path(output_dir)
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+        self.batch_size = max(1, int(batch_size))
+        self.min_interval = min_interval
+        self.jpeg_quality = jpeg_quality
+        self.logger = logging.getLogger(__name__)
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._sequence = itertools.count(1)
+        self._last_submit = {}   # camera -> waktu snapshot terakhir yang diterima
+        self._directories = set()
+        self._threads = []
+        self._running = False
+
+        # Statistik
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0        # Dibuang karena antrian penuh (drop terlama)
+        self.rate_limited = 0   # Ditolak karena min_interval
+        self.failed = 0
+        self.bytes_written = 0
+        self.total_encode_time = 0.0
+        self.total_write_time = 0.0
+
+    @classmethod
+    def from_config(cls, config=None):
+        """Buat writer dari dict konfigurasi (override DEFAULT_SNAPSHOT_CONFIG)"""
+        options = dict(DEFAULT_SNAPSHOT_CONFIG)
+        options.update(config or {})
+        return cls(**options)
+
+    def start(self):
+        """Start worker thread (otomatis dipanggil submit() pertama)"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._threads = [threading.Thread(target=self._worker, daemon=True, name=f"SnapshotWriter-{i}")
+                             for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=10.0):
+        """Tulis sisa antrian lalu stop worker"""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+        if self._queue:
+            self.logger.warning(f"{len(self._queue)} snapshot belum ditulis saat stop")
+
+    def submit(self, camera_name, frame, prefix='snapshot', timestamp=None, render=None, force=False,
+               directory=None, quality=None, copy=True):
+        """
+        Antrikan snapshot (tidak blocking)
+
+        Args:
+            camera_name (str): Nama camera (sub-directory + rate limit)
+            frame: Frame BGR
+            prefix (str): Awalan nama file
+            timestamp (float): Waktu frame untuk nama file (None = sekarang)
+            render: Callable(frame) -> frame yang dijalankan di worker (misalnya gambar bounding box)
+            force (bool): Abaikan rate limit (snapshot manual)
+            directory (str): Directory tujuan (None = <output_dir>/<camera>)
+            quality (int): Kualitas JPEG (None = jpeg_quality)
+            copy (bool): Salin frame (False jika frame tidak akan diubah pemanggil)
+
+        Returns:
+            str: Path tujuan, atau None jika ditolak rate limit. File muncul setelah
+            worker selesai dan tidak pernah dibuat jika snapshot di-drop.
+        """
+        now = time.time()
+        with self._condition:
+            if not force and now - self._last_submit.get(camera_name, 0.0) < self.min_interval:
+                self.rate_limited += 1
+                return None
+            self._last_submit[camera_name] = now
+
+            stamp = datetime.fromtimestamp(timestamp or now).strftime("%Y%m%d_%H%M%S_%f")
+            folder = Path(directory) if directory else self.output_dir / re.sub(r'[^\w.-]+', '_', camera_name)
+            path = folder / f"{prefix}_{stamp}_{next(self._sequence):06d}.jpg"
+
+            if len(self._queue) >= self.queue_size:
+                dropped = self._queue.popleft()
+                self.dropped += 1
+                self.logger.debug(f"Antrian snapshot penuh, drop {dropped['path'].name}")
+            self._queue.append({
+                'path': path,
+                'frame': frame.copy() if copy else frame,
+                'render': render,
+                'quality': self.jpeg_quality if quality is None else quality,
+            })
+            self.submitted += 1
+            self._condition.notify()
+
+        if not self._running:
+            self.start()
+        return str(path)
+
+    def _next_batch(self):
+        """Ambil sampai batch_size snapshot (None jika stop dan antrian kosong)"""
+        with self._condition:
+            while self._running and not self._queue:
+                self._condition.wait()
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                batch.append(self._queue.popleft())
+            return batch or None
+
+    def _worker(self):
+        """Loop worker: render + encode + tulis"""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+            for item in batch:
+                self._write(item)
+
+    def _write(self, item):
+        path = item['path']
+        try:
+            start = time.time()
+            frame = item['render'](item['frame']) if item['render'] is not None else item['frame']
+            ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, item['quality']])
+            if not ok:
+                raise ValueError("JPEG encode gagal")
+            encoded = time.time()
+
+            if path.parent not in self._directories:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._directories.add(path.parent)
+            path.write_bytes(buffer.tobytes())
+
+            with self._condition:
+                self.written += 1
+                self.bytes_written += buffer.nbytes
+                self.total_encode_time += encoded - start
+                self.total_write_time += time.time() - encoded
+        except Exception as e:
+            with self._condition:
+                self.failed += 1
+            self.logger.error(f"Error saat menyimpan snapshot {path}: {str(e)}")
+
+    def get_stats(self):
+        """
+        Statistik writer
+
+        Returns:
+            dict: submitted, written, dropped, rate_limited, failed, queued,
+            bytes_written, rata-rata encode / tulis (ms)
+        """
+        with self._condition:
+            written = self.written
+            return {
+                'submitted': self.submitted,
+                'written': written,
+                'dropped': self.dropped,
+                'rate_limited': self.rate_limited,
+                'failed': self.failed,
+                'queued': len(self._queue),
+                'bytes_written': self.bytes_written,
+                'average_encode_ms': self.total_encode_time / written * 1000 if written else None,
+                'average_write_ms': self.total_write_time / written * 1000 if written else None,
+            }
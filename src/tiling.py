@@ -0,0 +1,119 @@
+"""
+Tiling Module
+Layout tile (sliced inference) untuk mendeteksi orang kecil / jarak jauh
+"""
+
+import numpy as np
+
+# Default, bisa di-override per camera
+DEFAULT_TILING_CONFIG = {
+    'rows': 2,
+    'cols': 2,
+    'overlap': 0.2,               # Overlap antar tile (rasio ukuran tile)
+    'include_full_frame': True,   # Tambah satu pass full frame untuk orang besar yang melewati seam
+    'motion_only': False,         # Hanya proses tile yang ada gerakan (butuh motion gate)
+    'nms_threshold': 0.6,
+    'nms_metric': 'ios',          # 'ios' merge potongan orang di seam, 'iou' NMS biasa
+}
+
+
+class TileLayout:
+    """
+    Layout tile rows x cols dengan overlap, di-cache per resolusi frame
+    """
+
+    def __init__(self, rows=2, cols=2, overlap=0.2, include_full_frame=True,
+                 motion_only=False, nms_threshold=0.6, nms_metric='ios'):
+        """
+        Args:
+            rows (int): Jumlah baris tile
+            cols (int): Jumlah kolom tile
+            overlap (float): Overlap antar tile (0-0.5)
+            include_full_frame (bool): Tambah pass full frame di batch yang sama
+            motion_only (bool): Hanya tile dengan gerakan yang di-inference
+            nms_threshold (float): Threshold NMS saat merge box antar tile
+            nms_metric (str): 'ios' atau 'iou'
+        """
+        self.rows = max(1, int(rows))
+        self.cols = max(1, int(cols))
+        self.overlap = min(max(float(overlap), 0.0), 0.5)
+        self.include_full_frame = include_full_frame
+        self.motion_only = motion_only
+        self.nms_threshold = nms_threshold
+        self.nms_metric = nms_metric
+        self._cache = {}
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Buat TileLayout dari konfigurasi camera
+
+        Args:
+            config (dict): Override untuk DEFAULT_TILING_CONFIG (None/False = tanpa tiling)
+
+        Returns:
+            TileLayout atau None
+        """
+        if not config:
+            return None
+        options = dict(DEFAULT_TILING_CONFIG)
+        if isinstance(config, dict):
+            options.update(config)
+        return cls(**options)
+
+    def tiles(self, shape):
+        """
+        Koordinat tile untuk resolusi frame tertentu
+
+        Args:
+            shape: frame.shape
+
+        Returns:
+            numpy.ndarray: Array K x 4 (x1, y1, x2, y2) int
+        """
+        height, width = shape[:2]
+        key = (height, width)
+        if key in self._cache:
+            return self._cache[key]
+
+        # Ukuran tile sehingga rows/cols tile dengan overlap menutup seluruh frame
+        tile_w = int(np.ceil(width / (self.cols - (self.cols - 1) * self.overlap)))
+        tile_h = int(np.ceil(height / (self.rows - (self.rows - 1) * self.overlap)))
+
+        xs = np.linspace(0, width - tile_w, self.cols).astype(int) if self.cols > 1 else np.array([0])
+        ys = np.linspace(0, height - tile_h, self.rows).astype(int) if self.rows > 1 else np.array([0])
+
+        tiles = np.array([[x, y, min(x + tile_w, width), min(y + tile_h, height)]
+                          for y in ys for x in xs], dtype=np.int32)
+        self._cache[key] = tiles
+        return tiles
+
+    def active_tiles(self, tiles, motion_mask, shape):
+        """
+        Tile yang ada gerakan menurut motion mask (ukuran kecil dari MotionGate)
+
+        Args:
+            tiles: Array K x 4 koordinat tile
+            motion_mask: Mask perubahan (uint8) resolusi rendah, atau None
+            shape: Shape frame yang di-tile
+
+        Returns:
+            numpy.ndarray: Boolean mask K (semua True jika tidak ada info gerakan)
+        """
+        if motion_mask is None:
+            return np.ones(len(tiles), dtype=bool)
+
+        height, width = shape[:2]
+        mask_h, mask_w = motion_mask.shape[:2]
+        scale = np.array([mask_w / width, mask_h / height, mask_w / width, mask_h / height])
+        small = np.round(tiles * scale).astype(int)
+
+        # Integral image: jumlah pixel berubah per tile dalam O(1)
+        integral = np.pad((motion_mask > 0).cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+        x1, y1, x2, y2 = small.T
+        changed = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+
+        active = changed > 0
+        if not active.any():
+            active[:] = True
+        return active
@@ -0,0 +1,329 @@
+"""
+Tracker Module
+Multi-object tracker ringan (Kalman + IoU, gaya ByteTrack, pure NumPy)
+agar YOLO cukup dijalankan setiap N frame dan ID orang tetap stabil
+"""
+
+import numpy as np
+
+from detections import Detections, box_iou
+
+# Default, bisa di-override dari config
+DEFAULT_TRACKER_CONFIG = {
+    'enabled': False,
+    'detect_interval': 3,        # Inference penuh setiap N frame, frame di antaranya pakai prediksi
+    'high_threshold': 0.5,       # Deteksi >= ini diasosiasikan lebih dulu (tahap 1 ByteTrack)
+    'match_iou': 0.3,            # IoU minimal tahap 1 (deteksi confidence tinggi)
+    'low_match_iou': 0.5,        # IoU minimal tahap 2 (deteksi confidence rendah)
+    'max_age': 30,               # Frame tanpa update sebelum track dihapus
+    'max_uncertainty': 0.15,     # Std posisi per sumbu / tinggi box; lebih dari ini -> inference dipercepat
+}
+
+# Bobot noise Kalman relatif terhadap tinggi box (nilai dari SORT/ByteTrack)
+STD_WEIGHT_POSITION = 1.0 / 20
+STD_WEIGHT_VELOCITY = 1.0 / 160
+
+
+def xyxy_to_xyah(boxes):
+    """Box (x1, y1, x2, y2) -> (center x, center y, aspect w/h, tinggi)"""
+    width = boxes[:, 2] - boxes[:, 0]
+    height = np.maximum(boxes[:, 3] - boxes[:, 1], 1e-3)
+    return np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2,
+                     width / height, height], axis=1)
+
+
+def xyah_to_xyxy(states):
+    """State (center x, center y, aspect, tinggi) -> box (x1, y1, x2, y2)"""
+    width = states[:, 2] * states[:, 3]
+    half = np.stack([width / 2, states[:, 3] / 2], axis=1)
+    return np.concatenate([states[:, :2] - half, states[:, :2] + half], axis=1)
+
+
+def greedy_match(iou, threshold):
+    """
+    Asosiasi greedy berdasarkan IoU tertinggi
+
+    Args:
+        iou: Matriks IoU tracks x detections
+        threshold (float): IoU minimal
+
+    Returns:
+        list: Pasangan (track_index, detection_index)
+    """
+    pairs = []
+    if iou.size == 0:
+        return pairs
+
+    iou = iou.copy()
+    while True:
+        track, det = np.unravel_index(np.argmax(iou), iou.shape)
+        if iou[track, det] < threshold:
+            return pairs
+        pairs.append((int(track), int(det)))
+        iou[track, :] = -1.0
+        iou[:, det] = -1.0
+
+
+class KalmanBoxFilter:
+    """
+    Kalman filter constant-velocity untuk banyak box sekaligus
+
+    State 8 dimensi: (cx, cy, a, h, vcx, vcy, va, vh). Semua operasi
+    vectorized di atas array N x 8 (mean) dan N x 8 x 8 (covariance).
+    """
+
+    def __init__(self):
+        self.motion = np.eye(8, dtype=np.float64)
+        self.motion[:4, 4:] = np.eye(4)
+        self.observation = np.eye(4, 8, dtype=np.float64)
+
+    def initiate(self, measurements):
+        """
+        State awal dari pengukuran (N x 4 xyah)
+
+        Returns:
+            tuple: (mean N x 8, covariance N x 8 x 8)
+        """
+        count = len(measurements)
+        mean = np.zeros((count, 8))
+        mean[:, :4] = measurements
+
+        height = measurements[:, 3]
+        std = np.stack([
+            2 * STD_WEIGHT_POSITION * height, 2 * STD_WEIGHT_POSITION * height,
+            np.full(count, 1e-2), 2 * STD_WEIGHT_POSITION * height,
+            10 * STD_WEIGHT_VELOCITY * height, 10 * STD_WEIGHT_VELOCITY * height,
+            np.full(count, 1e-5), 10 * STD_WEIGHT_VELOCITY * height,
+        ], axis=1)
+        covariance = np.zeros((count, 8, 8))
+        covariance[:, np.arange(8), np.arange(8)] = std ** 2
+        return mean, covariance
+
+    def predict(self, mean, covariance):
+        """Prediksi satu frame ke depan"""
+        height = mean[:, 3]
+        std = np.stack([
+            STD_WEIGHT_POSITION * height, STD_WEIGHT_POSITION * height,
+            np.full(len(mean), 1e-2), STD_WEIGHT_POSITION * height,
+            STD_WEIGHT_VELOCITY * height, STD_WEIGHT_VELOCITY * height,
+            np.full(len(mean), 1e-5), STD_WEIGHT_VELOCITY * height,
+        ], axis=1)
+
+        mean = mean @ self.motion.T
+        covariance = self.motion @ covariance @ self.motion.T
+        covariance[:, np.arange(8), np.arange(8)] += std ** 2
+        return mean, covariance
+
+    def update(self, mean, covariance, measurements):
+        """Koreksi state dengan pengukuran (N x 4 xyah)"""
+        height = mean[:, 3]
+        std = np.stack([
+            STD_WEIGHT_POSITION * height, STD_WEIGHT_POSITION * height,
+            np.full(len(mean), 1e-1), STD_WEIGHT_POSITION * height,
+        ], axis=1)
+
+        projected_mean = mean @ self.observation.T
+        projected_cov = self.observation @ covariance @ self.observation.T
+        projected_cov[:, np.arange(4), np.arange(4)] += std ** 2
+
+        # Kalman gain K = P H^T S^-1 (S simetris)
+        cross = covariance @ self.observation.T
+        gain = np.linalg.solve(projected_cov, cross.transpose(0, 2, 1)).transpose(0, 2, 1)
+
+        innovation = measurements - projected_mean
+        mean = mean + np.einsum('nij,nj->ni', gain, innovation)
+        covariance = covariance - gain @ projected_cov @ gain.transpose(0, 2, 1)
+        return mean, covariance
+
+
+class ObjectTracker:
+    """
+    Tracker per camera
+
+    update() dipanggil dengan hasil inference penuh: track diasosiasikan dalam dua
+    tahap (deteksi confidence tinggi dulu, lalu sisanya ke track yang belum cocok).
+    predict() dipanggil pada frame di antaranya dan mengembalikan box prediksi
+    Kalman dengan track ID yang sama.
+    """
+
+    def __init__(self, detect_interval=3, high_threshold=0.5, match_iou=0.3,
+                 low_match_iou=0.5, max_age=30, max_uncertainty=0.15):
+        """
+        Args:
+            detect_interval (int): Inference penuh setiap N frame
+            high_threshold (float): Batas confidence tahap 1 asosiasi
+            match_iou (float): IoU minimal tahap 1
+            low_match_iou (float): IoU minimal tahap 2
+            max_age (int): Frame tanpa update sebelum track dihapus
+            max_uncertainty (float): Std posisi per sumbu relatif tinggi box yang memicu inference
+        """
+        self.detect_interval = max(1, int(detect_interval))
+        self.high_threshold = high_threshold
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        self.max_age = max_age
+        self.max_uncertainty = max_uncertainty
+
+        self.kalman = KalmanBoxFilter()
+        self.next_id = 1
+        self.frames_since_detection = None  # None = belum pernah inference
+
+        # State semua track (array paralel)
+        self.mean = np.zeros((0, 8))
+        self.covariance = np.zeros((0, 8, 8))
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.scores = np.zeros(0, dtype=np.float32)
+        self.class_ids = np.zeros(0, dtype=np.float32)
+        self.misses = np.zeros(0, dtype=np.int32)     # Frame sejak update terakhir
+        self.hits = np.zeros(0, dtype=np.int32)       # Update sejak track dibuat
+        self.visible = np.zeros(0, dtype=bool)        # Cocok di inference terakhir
+
+        # Statistik
+        self.detected_frames = 0
+        self.predicted_frames = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Buat tracker dari dict konfigurasi
+
+        Returns:
+            ObjectTracker atau None jika dinonaktifkan
+        """
+        options = dict(DEFAULT_TRACKER_CONFIG)
+        options.update(config or {})
+        if not options.pop('enabled'):
+            return None
+        return cls(**options)
+
+    def needs_detection(self):
+        """
+        Apakah frame berikutnya perlu inference penuh
+
+        Returns:
+            bool: True setiap detect_interval frame, atau jika ada track yang
+                prediksinya sudah terlalu tidak pasti
+        """
+        if self.frames_since_detection is None:
+            return True
+        if self.frames_since_detection + 1 >= self.detect_interval:
+            return True
+        # Track baru (belum pernah di-update) selalu mulai dengan covariance awal yang
+        # lebar, tidak dihitung agar setiap orang baru tidak memaksa inference berikutnya
+        confirmed = self.visible & (self.hits > 0)
+        if not confirmed.any():
+            return False
+
+        # Std posisi per sumbu (terbesar dari x / y) setelah satu prediksi lagi, relatif terhadap tinggi box
+        mean, covariance = self.kalman.predict(self.mean[confirmed], self.covariance[confirmed])
+        variance = np.maximum(covariance[:, 0, 0], covariance[:, 1, 1])
+        spread = np.sqrt(variance) / np.maximum(mean[:, 3], 1.0)
+        return bool((spread > self.max_uncertainty).any())
+
+    def _advance(self):
+        """Prediksi semua track satu frame ke depan dan buang track yang terlalu lama hilang"""
+        if len(self.ids) > 0:
+            self.mean, self.covariance = self.kalman.predict(self.mean, self.covariance)
+            self.misses += 1
+
+        keep = self.misses <= self.max_age
+        if not keep.all():
+            self.mean = self.mean[keep]
+            self.covariance = self.covariance[keep]
+            self.ids = self.ids[keep]
+            self.scores = self.scores[keep]
+            self.class_ids = self.class_ids[keep]
+            self.misses = self.misses[keep]
+            self.hits = self.hits[keep]
+            self.visible = self.visible[keep]
+
+    def update(self, detections):
+        """
+        Asosiasikan hasil inference penuh dengan track
+
+        Args:
+            detections (Detections): Hasil inference frame ini
+
+        Returns:
+            Detections: Deteksi yang sama (box dari detector) dengan track_ids
+        """
+        self._advance()
+        self.frames_since_detection = 0
+        self.detected_frames += 1
+
+        count = len(detections)
+        det_track = np.full(count, -1, dtype=np.int64)  # Index track per deteksi
+        matched_tracks = np.zeros(len(self.ids), dtype=bool)
+
+        if count > 0 and len(self.ids) > 0:
+            iou = box_iou(xyah_to_xyxy(self.mean[:, :4]), detections.xyxy)
+
+            # Tahap 1: deteksi confidence tinggi ke semua track
+            high = detections.confidence >= self.high_threshold
+            for track, det in greedy_match(np.where(high[None, :], iou, -1.0), self.match_iou):
+                det_track[det] = track
+                matched_tracks[track] = True
+
+            # Tahap 2: deteksi sisanya ke track yang belum cocok, IoU lebih ketat
+            remaining = (det_track < 0)[None, :] & ~matched_tracks[:, None]
+            for track, det in greedy_match(np.where(remaining, iou, -1.0), self.low_match_iou):
+                det_track[det] = track
+                matched_tracks[track] = True
+
+        matched = det_track >= 0
+        if matched.any():
+            tracks = det_track[matched]
+            measurements = xyxy_to_xyah(detections.xyxy[matched].astype(np.float64))
+            self.mean[tracks], self.covariance[tracks] = self.kalman.update(
+                self.mean[tracks], self.covariance[tracks], measurements)
+            self.scores[tracks] = detections.confidence[matched]
+            self.misses[tracks] = 0
+            self.hits[tracks] += 1
+        self.visible = matched_tracks
+
+        # Deteksi tanpa pasangan -> track baru
+        new = ~matched
+        if new.any():
+            mean, covariance = self.kalman.initiate(xyxy_to_xyah(detections.xyxy[new].astype(np.float64)))
+            new_ids = np.arange(self.next_id, self.next_id + int(new.sum()), dtype=np.int64)
+            self.next_id += len(new_ids)
+
+            det_track[new] = np.arange(len(self.ids), len(self.ids) + len(new_ids))
+            self.mean = np.concatenate([self.mean, mean])
+            self.covariance = np.concatenate([self.covariance, covariance])
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.scores = np.concatenate([self.scores, detections.confidence[new]])
+            self.class_ids = np.concatenate([self.class_ids, detections.data[new, 5]])
+            self.misses = np.concatenate([self.misses, np.zeros(len(new_ids), dtype=np.int32)])
+            self.hits = np.concatenate([self.hits, np.zeros(len(new_ids), dtype=np.int32)])
+            self.visible = np.concatenate([self.visible, np.ones(len(new_ids), dtype=bool)])
+
+        return Detections(detections.data, self.ids[det_track])
+
+    def predict(self):
+        """
+        Box prediksi untuk frame tanpa inference
+
+        Returns:
+            Detections: Track yang terlihat di inference terakhir, dengan track_ids
+        """
+        self._advance()
+        self.frames_since_detection = (self.frames_since_detection or 0) + 1
+        self.predicted_frames += 1
+
+        visible = self.visible
+        data = np.zeros((int(visible.sum()), 6), dtype=np.float32)
+        data[:, :4] = xyah_to_xyxy(self.mean[visible, :4])
+        data[:, 4] = self.scores[visible]
+        data[:, 5] = self.class_ids[visible]
+        return Detections(data, self.ids[visible])
+
+    def get_stats(self):
+        """Statistik tracker"""
+        total = self.detected_frames + self.predicted_frames
+        return {
+            'active_tracks': int(self.visible.sum()),
+            'detected_frames': self.detected_frames,
+            'predicted_frames': self.predicted_frames,
+            'predicted_ratio': self.predicted_frames / total if total > 0 else 0
+        }
@@ -0,0 +1,328 @@
+"""
+Virtual Camera Module
+Camera virtual untuk benchmark / load test tanpa camera Hikvision: file video
+diputar ulang dengan frame rate asli (loop), dengan jitter jaringan dan
+disconnect yang bisa disuntikkan. Dipakai lewat HikvisionCamera(decoder='replay')
+atau lewat RTSP stand-in server lokal (mediamtx + ffmpeg)
+"""
+
+import logging
+import random
+import shutil
+import subprocess
+import threading
+import time
+
+import cv2
+
+from latency_trace import LatencyHistogram
+
+# Default, bisa di-override per camera lewat 'decoder_options' (decoder 'replay')
+DEFAULT_REPLAY_OPTIONS = {
+    'fps': None,                  # Frame rate replay (None = FPS file)
+    'loop': True,                 # Putar ulang dari awal saat file habis
+    'start': 0.0,                 # Detik awal di file (camera berbeda tidak sinkron)
+    'jitter': 0.0,                # Detik - keterlambatan acak maksimal per frame (frame tetap berurutan)
+    'disconnect_every': None,     # Detik rata-rata antar disconnect (None = tidak pernah)
+    'disconnect_duration': 3.0,   # Detik camera tidak bisa dihubungi setelah disconnect
+    'seed': None,                 # Seed random (jitter / jadwal disconnect bisa diulang)
+}
+
+# Statistik + jadwal outage per source (key = nama camera), bertahan lintas reconnect
+_sources = {}
+_sources_lock = threading.Lock()
+
+
+def _source_state(key):
+    with _sources_lock:
+        state = _sources.get(key)
+        if state is None:
+            state = _sources[key] = {
+                'connects': 0,
+                'refused': 0,           # Connect ditolak selama outage
+                'frames': 0,            # Frame yang diserahkan ke decoder
+                'disconnects': 0,       # Disconnect yang disuntikkan
+                'outage_until': 0.0,
+                'lag': LatencyHistogram(),  # Frame tersedia -> diambil reader (ms)
+            }
+        return state
+
+
+def get_replay_stats():
+    """
+    Statistik semua source replay
+
+    Returns:
+        dict: {nama: {'connects', 'refused', 'frames', 'disconnects', 'lag' (LatencyHistogram.snapshot())}}
+    """
+    with _sources_lock:
+        items = list(_sources.items())
+    return {
+        key: {
+            'connects': state['connects'],
+            'refused': state['refused'],
+            'frames': state['frames'],
+            'disconnects': state['disconnects'],
+            'lag': state['lag'].snapshot(),
+        }
+        for key, state in items
+    }
+
+
+def reset_replay_stats():
+    """Reset counter + histogram (misalnya setelah warmup), jadwal outage tetap"""
+    with _sources_lock:
+        for state in _sources.values():
+            state.update(connects=0, refused=0, frames=0, disconnects=0, lag=LatencyHistogram())
+
+
+class ReplayCapture:
+    """
+    Pengganti cv2.VideoCapture (isOpened/read/grab/retrieve/get/release) yang
+    memutar file video seperti camera live
+
+    Frame ke-n tersedia pada t0 + n / fps (+ jitter acak, urutan tetap);
+    read() menunggu sampai frame tersedia, jadi reader yang lambat tertinggal
+    (lag tercatat) seperti buffer RTSP, bukan membaca file secepat mungkin.
+    Disconnect yang disuntikkan membuat read() gagal dan connect berikutnya
+    ditolak selama disconnect_duration detik.
+    """
+
+    def __init__(self, path, name=None, fps=None, loop=True, start=0.0, jitter=0.0, disconnect_every=None,
+                 disconnect_duration=3.0, seed=None):
+        """
+        Args:
+            path (str): Path file video
+            name (str): Key statistik / outage (default: path)
+            fps, loop, start, jitter, disconnect_every, disconnect_duration, seed: Lihat DEFAULT_REPLAY_OPTIONS
+        """
+        self.path = str(path)
+        self.name = name or self.path
+        self.loop = loop
+        self.jitter = jitter
+        self.disconnect_duration = disconnect_duration
+        self.logger = logging.getLogger(__name__)
+        self._state = _source_state(self.name)
+        self._random = random.Random(seed)
+        self._cap = None
+
+        now = time.time()
+        if now < self._state['outage_until']:
+            self._state['refused'] += 1  # Camera "mati", connect gagal seperti host tidak bisa dihubungi
+            return
+
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            self.logger.error(f"Replay gagal membuka {self.path}")
+            return
+        if start:
+            cap.set(cv2.CAP_PROP_POS_MSEC, start * 1000)
+
+        self._cap = cap
+        self.fps = fps or cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self._started = now
+        self._index = 0
+        self._available = now
+        self._disconnect_at = None
+        if disconnect_every:
+            self._disconnect_at = now + self._random.expovariate(1.0 / disconnect_every)
+        self._state['connects'] += 1
+
+    def isOpened(self):
+        return self._cap is not None
+
+    def _wait_next(self):
+        """Tunggu sampai frame berikutnya tersedia, catat lag reader (0 jika tepat waktu)"""
+        due = self._started + self._index / self.fps
+        if self.jitter:
+            due += self._random.uniform(0, self.jitter)
+        self._available = max(self._available, due)
+
+        now = time.time()
+        if self._disconnect_at is not None and self._disconnect_at <= max(now, self._available):
+            return False
+        if now < self._available:
+            time.sleep(self._available - now)
+        self._state['lag'].record(max(0.0, now - self._available) * 1000)
+        return True
+
+    def _disconnect(self):
+        """Disconnect yang disuntikkan: stream putus + camera tidak bisa dihubungi sementara"""
+        wait = self._disconnect_at - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        self._state['disconnects'] += 1
+        self._state['outage_until'] = time.time() + self.disconnect_duration
+        self.logger.info(f"{self.name}: disconnect disuntikkan, offline {self.disconnect_duration:.1f}s")
+        self.release()
+
+    def grab(self):
+        if self._cap is None:
+            return False
+        if not self._wait_next():
+            self._disconnect()
+            return False
+
+        ok = self._cap.grab()
+        if not ok and self.loop:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok = self._cap.grab()
+        if not ok:
+            return False
+        self._index += 1
+        self._state['frames'] += 1
+        return True
+
+    def retrieve(self):
+        if self._cap is None:
+            return False, None
+        return self._cap.retrieve()
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def get(self, prop):
+        if self._cap is None:
+            return 0.0
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self._index / self.fps * 1000  # PTS terus naik walau file diputar ulang
+        return self._cap.get(prop)
+
+    def set(self, prop, value):
+        return False  # Buffer / codec tidak berlaku untuk file replay
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+
+class RtspReplayServer:
+    """
+    RTSP stand-in server lokal: mediamtx + satu publisher ffmpeg per camera
+    (-re, stream copy, loop), sehingga camera dibaca lewat decoder opencv / pyav
+    yang sama dengan camera Hikvision
+
+    Disconnect disuntikkan dengan menghentikan publisher selama
+    disconnect_duration detik; jitter tidak didukung (stream copy).
+    """
+
+    def __init__(self, port=8554, mediamtx='mediamtx', ffmpeg='ffmpeg', disconnect_every=None,
+                 disconnect_duration=3.0, seed=None):
+        """
+        Args:
+            port (int): Port RTSP mediamtx
+            mediamtx (str): Binary mediamtx (None = server sudah berjalan di port)
+            ffmpeg (str): Binary ffmpeg untuk publisher
+            disconnect_every (float): Detik rata-rata antar disconnect per camera (None = tidak pernah)
+            disconnect_duration (float): Detik publisher dihentikan
+            seed: Seed random jadwal disconnect
+        """
+        self.port = port
+        self.mediamtx = mediamtx
+        self.ffmpeg = ffmpeg
+        self.disconnect_every = disconnect_every
+        self.disconnect_duration = disconnect_duration
+        self.logger = logging.getLogger(__name__)
+        self._random = random.Random(seed)
+        self._server = None
+        self._publishers = {}  # path -> {'source', 'process', 'next_disconnect', 'restart_at'}
+        self._lock = threading.Lock()  # publish() bisa dipanggil setelah thread penjadwal berjalan
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start mediamtx (jika dikonfigurasi) dan thread penjadwal disconnect"""
+        if shutil.which(self.ffmpeg) is None:
+            raise FileNotFoundError(f"ffmpeg tidak ditemukan: {self.ffmpeg}")
+        if self.mediamtx:
+            if shutil.which(self.mediamtx) is None:
+                raise FileNotFoundError(f"mediamtx tidak ditemukan: {self.mediamtx}")
+            self._server = subprocess.Popen([self.mediamtx], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            time.sleep(1.0)  # Tunggu port RTSP siap
+        self._running = True
+        self._thread = threading.Thread(target=self._supervise, daemon=True, name="RtspReplayServer")
+        self._thread.start()
+
+    def publish(self, path, source):
+        """
+        Publish file video (loop, frame rate asli) ke rtsp://127.0.0.1:<port>/<path>
+
+        Returns:
+            str: URL RTSP camera virtual
+        """
+        url = f"rtsp://127.0.0.1:{self.port}/{path}"
+        entry = {'source': str(source), 'url': url, 'process': None, 'restart_at': None,
+                 'next_disconnect': self._next_disconnect(), 'disconnects': 0}
+        with self._lock:
+            self._start_publisher(entry)
+            self._publishers[path] = entry
+        return url
+
+    def _next_disconnect(self):
+        if not self.disconnect_every:
+            return None
+        return time.time() + self._random.expovariate(1.0 / self.disconnect_every)
+
+    def _start_publisher(self, entry):
+        entry['process'] = subprocess.Popen(
+            [self.ffmpeg, '-nostdin', '-loglevel', 'error', '-re', '-stream_loop', '-1', '-i', entry['source'],
+             '-an', '-c', 'copy', '-f', 'rtsp', '-rtsp_transport', 'tcp', entry['url']],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def _supervise(self):
+        """Hentikan / start ulang publisher sesuai jadwal disconnect"""
+        while self._running:
+            now = time.time()
+            with self._lock:
+                for path, entry in self._publishers.items():
+                    if entry['restart_at'] is not None:
+                        if now >= entry['restart_at']:
+                            entry['restart_at'] = None
+                            entry['next_disconnect'] = self._next_disconnect()
+                            self._start_publisher(entry)
+                    elif entry['next_disconnect'] is not None and now >= entry['next_disconnect']:
+                        self.logger.info(f"{path}: disconnect disuntikkan, offline {self.disconnect_duration:.1f}s")
+                        entry['process'].terminate()
+                        entry['disconnects'] += 1
+                        entry['restart_at'] = now + self.disconnect_duration
+                    elif entry['process'].poll() is not None:
+                        self.logger.warning(f"{path}: publisher ffmpeg berhenti, start ulang")
+                        self._start_publisher(entry)
+            time.sleep(0.2)
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: {path: {'url', 'disconnects', 'online'}}
+        """
+        with self._lock:
+            return {
+                path: {'url': entry['url'], 'disconnects': entry['disconnects'],
+                       'online': entry['restart_at'] is None}
+                for path, entry in self._publishers.items()
+            }
+
+    def stop(self):
+        """Hentikan semua publisher dan mediamtx"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        with self._lock:
+            processes = [entry['process'] for entry in self._publishers.values() if entry['process'] is not None]
+            self._publishers.clear()
+        if self._server is not None:
+            processes.append(self._server)
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self._server = None
@@ -7,10 +7,10 @@ Untuk deteksi jarak jauh
 import cv2
 import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
 
-from src.detector import HumanDetector
-from src.camera_stream import HikvisionCamera
+from detector import HumanDetector
+from camera_stream import HikvisionCamera
 
 # ============================================
 # CAMERA CONFIG
@@ -33,20 +33,21 @@ print("-" * 70)
 # Test beberapa threshold values
 THRESHOLDS = [0.15, 0.20, 0.25, 0.30]
 
+# Model di-load (dan warm-up) sekali saja, threshold diganti per iterasi
+print(f"[1/3] Loading YOLOv8 model...")
+detector = HumanDetector(model_path="models/yolov8n.pt", conf_threshold=THRESHOLDS[0])
+if not detector.load_model(warmup=True):
+    print("❌ Failed to load model!")
+    sys.exit(1)
+print("✅ Model loaded")
+
 for threshold in THRESHOLDS:
     print(f"\n{'='*70}")
     print(f"Testing dengan CONFIDENCE THRESHOLD: {threshold} ({int(threshold*100)}%)")
     print(f"{'='*70}")
     
-    # Initialize detector dengan threshold rendah
-    detector = HumanDetector(model_path="models/yolov8n.pt", conf_threshold=threshold)
-    
-    print(f"[1/3] Loading YOLOv8 model...")
-    if not detector.load_model():
-        print("❌ Failed to load model!")
-        continue
-    
-    print(f"✅ Model loaded with confidence threshold: {threshold}")
+    detector.conf_threshold = threshold
+    detector.reset_statistics()
     
     # Connect camera
     print(f"\n[2/3] Connecting to camera...")
@@ -141,6 +142,11 @@ print("""
    - yolov8s.pt: Better accuracy
    - yolov8m.pt: Even better, but slower
    - yolov8l.pt: Best, but very slow
+
+8. TILED MODE (camera jarak jauh):
+   - Tambahkan 'tiling': {'rows': 2, 'cols': 2, 'overlap': 0.2} di CAMERAS
+   - Frame dipotong jadi tile, orang kecil terdeteksi tanpa menurunkan threshold
+   - 'motion_only': True -> hanya tile yang ada gerakan yang di-inference
 """)
 
 print("\n" + "=" * 70)
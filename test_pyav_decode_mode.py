@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test PyAV Decode Mode Switch
+Bandingkan PTS dan pixel frame di sekitar perpindahan mode decode
+('all' -> 'keyframes' -> 'all') dengan decode referensi tanpa threading
+
+Jalankan: python test_pyav_decode_mode.py [video.mp4]
+Tanpa argumen, clip H.264 sintetis dibuat otomatis (25 fps, GOP 50, tanpa B-frame)
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from pyav_capture import PyAVCapture, av
+
+if av is None:
+    print("❌ PyAV belum ter-install: pip install av")
+    sys.exit(1)
+
+FPS = 25
+GOP = 50
+NUM_FRAMES = 200
+FRAME_STEP = 1.0 / FPS
+MAX_PIXEL_ERROR = 0.0  # Decoder sama, hasil harus identik dengan referensi
+
+# (frame 'all' sebelum switch, keyframe yang dibaca di mode 'keyframes')
+SWITCH_POINTS = [(0, 1), (1, 1), (10, 0), (30, 1), (49, 1), (50, 2)]
+THREAD_TYPES = ['SLICE', 'FRAME', 'AUTO']
+DECODE_THREADS = 4
+FRAMES_AFTER_SWITCH = 60
+
+
+def make_clip(path):
+    """Clip sintetis: gradient bergerak, setiap frame berbeda"""
+    output = av.open(path, 'w')
+    stream = output.add_stream('libx264', rate=FPS)
+    stream.width, stream.height, stream.pix_fmt = 320, 240, 'yuv420p'
+    stream.options = {'g': str(GOP), 'keyint_min': str(GOP), 'bf': '0', 'sc_threshold': '0'}
+
+    yy, xx = np.mgrid[0:240, 0:320]
+    for i in range(NUM_FRAMES):
+        image = np.zeros((240, 320, 3), np.uint8)
+        image[..., 0] = (xx * 2 + i * 7) % 256
+        image[..., 1] = (yy * 3 + i * 5) % 256
+        image[..., 2] = (xx + yy + i * 11) % 256
+        for packet in stream.encode(av.VideoFrame.from_ndarray(image, format='bgr24')):
+            output.mux(packet)
+    for packet in stream.encode():
+        output.mux(packet)
+    output.close()
+
+
+def decode_reference(path):
+    """{pts: frame} dari decode semua frame, satu thread"""
+    cap = PyAVCapture(path, decode_threads=1, thread_type='SLICE')
+    frames = {}
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames[round(cap.last_pts, 3)] = frame.astype(np.float32)
+    cap.release()
+    return frames
+
+
+def check_switch(path, reference, thread_type, before, keyframes):
+    """
+    Returns:
+        list: Pesan error (kosong = OK)
+    """
+    cap = PyAVCapture(path, decode_threads=DECODE_THREADS, thread_type=thread_type)
+    for _ in range(before):
+        cap.read()
+    cap.set_decode_mode('keyframes')
+    for _ in range(keyframes):
+        cap.read()
+    cap.set_decode_mode('all')
+
+    errors = []
+    previous = None
+    for _ in range(FRAMES_AFTER_SWITCH):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        pts = round(cap.last_pts, 3)
+        if pts not in reference:
+            errors.append(f"pts {pts}: tidak ada di referensi")
+        else:
+            error = float(np.abs(reference[pts] - frame).mean())
+            if error > MAX_PIXEL_ERROR:
+                errors.append(f"pts {pts}: pixel error {error:.2f}")
+        # Setelah resync ke keyframe, frame harus berurutan tanpa lompatan
+        if previous is not None and round(pts - previous, 3) != round(FRAME_STEP, 3):
+            errors.append(f"pts {previous} -> {pts}: frame hilang / bergeser")
+        previous = pts
+    cap.release()
+    return errors
+
+
+print("=" * 70)
+print("PYAV DECODE MODE SWITCH TEST")
+print("=" * 70)
+
+with tempfile.TemporaryDirectory() as tmp:
+    if len(sys.argv) > 1:
+        clip = sys.argv[1]
+    else:
+        clip = os.path.join(tmp, 'gop.mp4')
+        print(f"[1/2] Membuat clip sintetis ({NUM_FRAMES} frame, {FPS} fps, GOP {GOP})...")
+        make_clip(clip)
+
+    reference = decode_reference(clip)
+    print(f"      Referensi: {len(reference)} frame")
+
+    print(f"[2/2] Switch 'all' -> 'keyframes' -> 'all' ({DECODE_THREADS} decode threads)")
+    failed = 0
+    for thread_type in THREAD_TYPES:
+        for before, keyframes in SWITCH_POINTS:
+            errors = check_switch(clip, reference, thread_type, before, keyframes)
+            label = f"{thread_type:6s} switch setelah {before:2d} frame, {keyframes} keyframe"
+            if errors:
+                failed += 1
+                print(f"  ❌ {label}: {errors[0]}" + (f" (+{len(errors) - 1} lagi)" if len(errors) > 1 else ""))
+            else:
+                print(f"  ✅ {label}")
+
+print("-" * 70)
+if failed:
+    print(f"❌ FAILED: {failed} skenario")
+    sys.exit(1)
+print("✅ PTS dan pixel identik dengan referensi di semua skenario")